@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Batch Optimization
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkBatchOptimization.py).
+# Description: "Benchmark Batch Optimization" runs the bayesian optimization of the classifier on a synthetic presence-absence dataset with each of several batch sizes and reports the wall-clock time, the number of evaluations and the wall-clock time after which each optimization came within a tolerance of its best score, and the best score, so that the batch size can be chosen for the number of cores of a machine.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and data manipulation
+import argparse
+import os
+import sys
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_Statistics.hyperparameterOptimization import batchOptimizer
+from package_Statistics.hyperparameterOptimization import createClassifier
+from benchmarks.syntheticSites import syntheticSites
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batch bayesian optimization across batch sizes.')
+    parser.add_argument('--rows', type=int, default=1000, help='Number of synthetic sites.')
+    parser.add_argument('--initial', type=int, default=16, help='Number of random initial evaluations.')
+    parser.add_argument('--iterations', type=int, default=32, help='Number of evaluations after the initial design.')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8], help='Batch sizes to compare.')
+    parser.add_argument('--threads', type=int, default=1, help='Number of XGBoost threads per evaluation.')
+    parser.add_argument('--early-stopping-rounds', type=int, default=20, help='Rounds without improvement before boosting stops.')
+    arguments = parser.parse_args()
+
+    # Create the synthetic dataset
+    X, y = syntheticSites(arguments.rows)
+    budget = {'early_stopping_rounds': arguments.early_stopping_rounds}
+
+    # Run the optimization with each batch size
+    reports = []
+    for batch_size in arguments.batch_sizes:
+        print(f'Optimizing with batch size {batch_size} ({batch_size * arguments.threads} cores)...')
+        optimizer = batchOptimizer(createClassifier, X, y, 'roc_auc', 'logloss', arguments.initial, arguments.iterations,
+                                   n_jobs=arguments.threads, budget=budget, batch_size=batch_size)
+        reports.append(optimizer.convergence)
+        print(f'\tElapsed time: {optimizer.convergence["seconds"]:.1f} s')
+
+    # Report the wall-clock time against the evaluations to convergence
+    print(f'{"batch":>5} {"cores":>5} {"seconds":>8} {"converged evaluations":>22} {"converged seconds":>18} {"best score":>10} {"speedup":>8}')
+    for report in reports:
+        print(f'{report["batch_size"]:>5} {report["batch_size"] * arguments.threads:>5} {report["seconds"]:>8.1f} '
+              f'{report["converged_evaluations"]:>11} of {report["evaluations"]:<7} {report["converged_seconds"]:>18.1f} '
+              f'{report["best_score"]:>10.4f} {reports[0]["seconds"] / report["seconds"]:>7.2f}x')
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Composite
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkComposite.py).
+# Description: "Benchmark Composite" compares the row-wise data frame apply composite with the vectorized composite on a synthetic watershed and verifies that both produce identical predictions.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_Statistics import compositeArray
+from package_Statistics import compositePrediction
+
+# Define variable sets
+presence = ['presence']
+response = ['response']
+
+
+# Define the original row-wise composite function as a reference
+def compositePredictionApply(input_data, presence, response, threshold):
+    # Define a function to threshold absences and set presences equal to regression response
+    def compositeRows(row):
+        if row[presence[0]] < threshold:
+            return 0
+        elif row[presence[0]] >= threshold:
+            return row[response[0]]
+    # Apply function to all rows in test data
+    input_data['prediction'] = input_data.apply(lambda row: compositeRows(row), axis=1)
+    # Return the test data frame with composited results
+    return input_data
+
+
+# Define a function to create a synthetic watershed of classifier and regressor predictions
+def syntheticWatershed(rows, seed=314):
+    random = np.random.default_rng(seed)
+    classification = random.random(rows, dtype=np.float32)
+    watershed_data = pd.DataFrame({'absence': 1 - classification,
+                                   'presence': classification,
+                                   'response': random.gamma(2, 8, rows).astype(np.float32)})
+    return watershed_data
+
+
+# Define a function to time a composite function
+def timeComposite(composite_function):
+    iteration_start = time.perf_counter()
+    result = composite_function()
+    iteration_elapsed = time.perf_counter() - iteration_start
+    return result, iteration_elapsed
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the row-wise and vectorized composite predictions.')
+    parser.add_argument('--rows', type=int, default=5000000, help='Number of synthetic grid points.')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Presence threshold.')
+    arguments = parser.parse_args()
+
+    # Create the synthetic watershed
+    print(f'Creating synthetic watershed with {arguments.rows} rows...')
+    watershed_data = syntheticWatershed(arguments.rows)
+
+    # Time the row-wise apply composite
+    print('Compositing with row-wise apply...')
+    apply_data, apply_elapsed = timeComposite(
+        lambda: compositePredictionApply(watershed_data.copy(), presence, response, arguments.threshold))
+    print(f'\tElapsed time: {apply_elapsed:.2f} s')
+
+    # Time the vectorized data frame composite
+    print('Compositing with vectorized data frame composite...')
+    vector_data, vector_elapsed = timeComposite(
+        lambda: compositePrediction(watershed_data.copy(), presence, response, arguments.threshold))
+    print(f'\tElapsed time: {vector_elapsed:.2f} s')
+
+    # Time the vectorized in-place float32 composite
+    print('Compositing in place with float32 arrays...')
+    response_array = watershed_data[response[0]].to_numpy(dtype=np.float32, copy=True)
+    presence_array = watershed_data[presence[0]].to_numpy(dtype=np.float32)
+    inplace_array, inplace_elapsed = timeComposite(
+        lambda: compositeArray(presence_array, response_array, arguments.threshold, out=response_array))
+    print(f'\tElapsed time: {inplace_elapsed:.2f} s')
+
+    # Verify that all composites are identical
+    reference = apply_data['prediction'].to_numpy(dtype=np.float64)
+    if not np.array_equal(reference, vector_data['prediction'].to_numpy(dtype=np.float64)):
+        raise AssertionError('Vectorized composite does not match row-wise apply composite.')
+    if not np.array_equal(reference, inplace_array.astype(np.float64)):
+        raise AssertionError('In-place composite does not match row-wise apply composite.')
+    print('All composites are identical.')
+    print(f'Speedup of vectorized composite: {apply_elapsed / vector_elapsed:.0f}x')
+    print(f'Speedup of in-place float32 composite: {apply_elapsed / inplace_elapsed:.0f}x')
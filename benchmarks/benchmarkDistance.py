@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Distance
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkDistance.py).
+# Description: "Benchmark Distance" rasterizes synthetic stream lines and floodplain polygons onto a synthetic snap raster, calculates the tiled euclidean distance transform with halos sized from a coarse distance bound, verifies that the tiled distances are identical to the distance transform of the full raster, and reports the elapsed time of each.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+# Import geopandas, shapely, and rasterio for synthetic features and rasters
+import geopandas
+import rasterio
+from rasterio.transform import from_origin
+from scipy.ndimage import distance_transform_edt
+from shapely.geometry import LineString
+from shapely.geometry import Point
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_GeospatialProcessing.distanceTransform import default_coarse_size
+from package_GeospatialProcessing.distanceTransform import default_max_halo
+from package_GeospatialProcessing.distanceTransform import distanceRasters
+from package_GeospatialProcessing.distanceTransform import rasterizeSources
+
+
+# Define a function to create synthetic stream lines and floodplain polygons within an extent
+def syntheticSources(extent, streams, floodplains, seed=314):
+    random = np.random.default_rng(seed)
+    large_streams = geopandas.GeoSeries([LineString(random.uniform(0, extent, (4, 2))) for i in range(streams)], crs='EPSG:3338')
+    small_streams = geopandas.GeoSeries([LineString(random.uniform(0, extent, (2, 2))) for i in range(streams * 4)], crs='EPSG:3338')
+    floodplain = geopandas.GeoSeries([Point(random.uniform(0, extent, 2)).buffer(random.uniform(300, 3000)) for i in range(floodplains)], crs='EPSG:3338')
+    return [large_streams, small_streams, floodplain]
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the tiled euclidean distance transform.')
+    parser.add_argument('--cells', type=int, default=4096, help='Width and height of the synthetic snap raster in cells.')
+    parser.add_argument('--tile-size', type=int, default=1024, help='Width and height of the tiles in cells.')
+    parser.add_argument('--max-halo', type=int, default=default_max_halo, help='Largest width of the halo in cells; small values exercise the nearest source search of distant tiles.')
+    parser.add_argument('--coarse-size', type=int, default=default_coarse_size, help='Width and height of the coarse blocks in cells.')
+    parser.add_argument('--streams', type=int, default=20, help='Number of synthetic large streams.')
+    parser.add_argument('--floodplains', type=int, default=10, help='Number of synthetic floodplains.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes.')
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_folder:
+        # Create the synthetic snap raster and sources
+        snap_raster = os.path.join(work_folder, 'snap.tif')
+        with rasterio.open(snap_raster, 'w', driver='GTiff', width=arguments.cells, height=arguments.cells, count=1, dtype='uint8',
+                           crs='EPSG:3338', transform=from_origin(0, arguments.cells * 30, 30, 30)) as snap_dataset:
+            snap_dataset.write(np.ones((arguments.cells, arguments.cells), dtype=np.uint8), 1)
+        geometry_sets = syntheticSources(arguments.cells * 30, arguments.streams, arguments.floodplains)
+        output_rasters = [os.path.join(work_folder, f'distance_{index}.tif') for index in range(len(geometry_sets))]
+
+        # Time the tiled distance transform, including the rasterization of the sources
+        print(f'Calculating tiled distances for a {arguments.cells} x {arguments.cells} raster...')
+        tiled_start = time.perf_counter()
+        distanceRasters(snap_raster, geometry_sets, output_rasters, work_folder, tile_size=arguments.tile_size,
+                        max_halo=arguments.max_halo, coarse_size=arguments.coarse_size, workers=arguments.workers)
+        tiled_elapsed = time.perf_counter() - tiled_start
+        print(f'\tElapsed time: {tiled_elapsed:.1f} s')
+
+        # Time the distance transform of the full raster and verify that the distances are identical
+        print('Calculating distances for the full raster...')
+        source_raster = os.path.join(work_folder, 'sources.tif')
+        rasterizeSources(snap_raster, geometry_sets, source_raster)
+        with rasterio.open(source_raster) as source_dataset:
+            sources = source_dataset.read(1)
+        full_start = time.perf_counter()
+        for bit, output_raster in enumerate(output_rasters):
+            full_distance = distance_transform_edt((sources & (1 << bit)) == 0, sampling=(30, 30)).astype(np.float32)
+            with rasterio.open(output_raster) as output_dataset:
+                if not np.array_equal(output_dataset.read(1), full_distance):
+                    raise AssertionError(f'Tiled distances of source {bit} do not match the distances of the full raster.')
+        full_elapsed = time.perf_counter() - full_start
+        print(f'\tElapsed time: {full_elapsed:.1f} s')
+        print('Tiled distances are identical to the distances of the full raster.')
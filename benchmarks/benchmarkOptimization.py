@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Optimization
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkOptimization.py).
+# Description: "Benchmark Optimization" evaluates the same random hyperparameter sets from the bayesian optimization domain with the full 1000-tree cross validation objective, the same objective on cached fold matrices, and the budget-aware objective with early stopping and pruning on a synthetic presence-absence dataset, and reports the elapsed time and the agreement of the scores.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from scipy.stats import spearmanr
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_Statistics.foldMatrices import FoldMatrices
+from package_Statistics.hyperparameterOptimization import BudgetObjective
+from package_Statistics.hyperparameterOptimization import createClassifier
+from package_Statistics.hyperparameterOptimization import cvCached
+from package_Statistics.hyperparameterOptimization import cvClassifier
+from package_Statistics.hyperparameterOptimization import domain
+from benchmarks.syntheticSites import syntheticSites
+
+
+# Define a function to sample random parameter sets from the search domain
+def sampleParameters(evaluations, seed=21):
+    random = np.random.default_rng(seed)
+    samples = []
+    for i in range(evaluations):
+        samples.append([random.choice(variable['domain']) if variable['type'] == 'discrete'
+                        else random.uniform(*variable['domain']) for variable in domain])
+    return np.array(samples)
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the full and budget-aware hyperparameter objectives.')
+    parser.add_argument('--rows', type=int, default=2000, help='Number of synthetic sites.')
+    parser.add_argument('--evaluations', type=int, default=10, help='Number of random hyperparameter sets.')
+    parser.add_argument('--threads', type=int, default=4, help='Number of XGBoost threads.')
+    parser.add_argument('--early-stopping-rounds', type=int, default=50, help='Rounds without improvement before boosting stops.')
+    arguments = parser.parse_args()
+
+    # Create the synthetic dataset and parameter sets
+    X, y = syntheticSites(arguments.rows)
+    parameter_sets = sampleParameters(arguments.evaluations)
+
+    # Time the full cross validation objective
+    print(f'Evaluating {arguments.evaluations} parameter sets with the full objective...')
+    full_start = time.perf_counter()
+    full_scores = np.array([-float(cvClassifier(parameters[np.newaxis, :], X, y, n_jobs=arguments.threads))
+                            for parameters in parameter_sets])
+    full_elapsed = time.perf_counter() - full_start
+    print(f'\tElapsed time: {full_elapsed:.1f} s')
+
+    # Time the full objective on cached fold matrices, including the time to build the matrices
+    print(f'Evaluating {arguments.evaluations} parameter sets with the full objective on cached fold matrices...')
+    cached_start = time.perf_counter()
+    matrices = FoldMatrices(X, y, nthread=arguments.threads)
+    cached_scores = np.array([-float(cvCached(parameters[np.newaxis, :], matrices, createClassifier, 'roc_auc', n_jobs=arguments.threads))
+                              for parameters in parameter_sets])
+    cached_elapsed = time.perf_counter() - cached_start
+    print(f'\tElapsed time: {cached_elapsed:.1f} s')
+    if not np.array_equal(full_scores, cached_scores):
+        raise AssertionError('Cached fold matrix scores do not match the full objective scores.')
+    report = matrices.report()
+    print(f'\tScores are identical; matrices built once in {report["build_seconds"]} s ({report["cached_mb"]} MB cached, {report["converted_mb_per_evaluation"]} MB of conversions avoided per evaluation)')
+
+    # Time the budget-aware objective, including the time to build the matrices
+    print(f'Evaluating {arguments.evaluations} parameter sets with early stopping and pruning...')
+    budget_start = time.perf_counter()
+    objective = BudgetObjective(createClassifier, FoldMatrices(X, y, validation_fraction=0.1, nthread=arguments.threads),
+                                'roc_auc', 'logloss', n_jobs=arguments.threads,
+                                early_stopping_rounds=arguments.early_stopping_rounds)
+    budget_scores = np.array([-float(objective(parameters[np.newaxis, :])) for parameters in parameter_sets])
+    budget_elapsed = time.perf_counter() - budget_start
+    print(f'\tElapsed time: {budget_elapsed:.1f} s')
+
+    # Report the agreement of the objectives
+    complete = np.array([not evaluation['pruned'] for evaluation in objective.history])
+    print(f'Pruned evaluations: {np.sum(~complete)} of {arguments.evaluations}')
+    print(f'Mean trees with early stopping: {np.mean([evaluation["trees"] for evaluation in objective.history]):.0f} of 1000')
+    print(f'Rank correlation of scores: {spearmanr(full_scores, budget_scores).correlation:.3f}')
+    print(f'Best full score: {full_scores.max():.4f} (set {np.argmax(full_scores)}); best budget-aware score: {budget_scores[complete].max():.4f} (set {np.flatnonzero(complete)[np.argmax(budget_scores[complete])]})')
+    print(f'Speedup of cached fold matrices: {full_elapsed / cached_elapsed:.2f}x')
+    print(f'Speedup of budget-aware objective: {full_elapsed / budget_elapsed:.1f}x')
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Threshold
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkThreshold.py).
+# Description: "Benchmark Threshold" compares the original looped threshold search with the sorted threshold search on synthetic cross-validated probabilities, verifies that both select the same threshold with the same performance metrics, and reports the elapsed time of each.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_Statistics.thresholdOptimization import determineOptimalThreshold
+from package_Statistics.thresholdOptimization import testPresenceThreshold
+
+
+# Define the original looped threshold search as a reference
+def determineOptimalThresholdLoop(predict_probability, y_test):
+    # Iterate through numbers between 0 and 1000 to output a list of sensitivity and specificity values per threshold number
+    i = 1
+    sensitivity_list = []
+    specificity_list = []
+    while i < 1001:
+        threshold = i/1000
+        sensitivity, specificity, auc, accuracy = testPresenceThreshold(predict_probability, threshold, y_test)
+        sensitivity_list.append(sensitivity)
+        specificity_list.append(specificity)
+        i = i + 1
+    # Calculate a list of absolute value difference between sensitivity and specificity and find the optimal threshold
+    difference_list = [np.absolute(a - b) for a, b in zip(sensitivity_list, specificity_list)]
+    value, threshold = min((value, threshold) for (threshold, value) in enumerate(difference_list))
+    threshold = threshold/1000
+    # Calculate the performance of the optimal threshold
+    sensitivity, specificity, auc, accuracy = testPresenceThreshold(predict_probability, threshold, y_test)
+    # Return the optimal threshold and the performance metrics of the optimal threshold
+    return threshold, sensitivity, specificity, auc, accuracy
+
+
+# Define a function to create synthetic cross-validated probabilities and observed classes
+def syntheticProbabilities(rows, seed, dtype=np.float32, decimals=None):
+    random = np.random.default_rng(seed)
+    y_test = (random.random(rows) < random.uniform(0.1, 0.9)).astype('int32')
+    predict_probability = np.clip(random.normal(0.35 + 0.3 * y_test, 0.2), 0, 1)
+    # Round probabilities to create ties with the candidate thresholds
+    if decimals is not None:
+        predict_probability = np.round(predict_probability, decimals)
+    return pd.Series(predict_probability.astype(dtype)), pd.Series(y_test)
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the looped and sorted threshold searches.')
+    parser.add_argument('--rows', type=int, default=5000, help='Number of cross-validated predictions.')
+    parser.add_argument('--cases', type=int, default=20, help='Number of synthetic cases to verify.')
+    arguments = parser.parse_args()
+
+    # Verify that the sorted search matches the looped search for float32 and float64 probabilities with and without ties
+    print(f'Verifying {arguments.cases} synthetic cases...')
+    loop_elapsed = 0
+    sorted_elapsed = 0
+    for case in range(arguments.cases):
+        dtype = [np.float32, np.float64][case % 2]
+        decimals = [None, 2, 3][case % 3]
+        predict_probability, y_test = syntheticProbabilities(arguments.rows, case, dtype, decimals)
+        iteration_start = time.perf_counter()
+        reference = determineOptimalThresholdLoop(predict_probability, y_test)
+        loop_elapsed += time.perf_counter() - iteration_start
+        iteration_start = time.perf_counter()
+        result = determineOptimalThreshold(predict_probability, y_test)
+        sorted_elapsed += time.perf_counter() - iteration_start
+        if tuple(float(value) for value in reference) != tuple(float(value) for value in result):
+            raise AssertionError(f'Case {case}: sorted search {result} does not match looped search {reference}.')
+    print('All cases are identical.')
+    print(f'Looped search: {loop_elapsed / arguments.cases:.3f} s per case')
+    print(f'Sorted search: {sorted_elapsed / arguments.cases:.4f} s per case')
+    print(f'Speedup of sorted search: {loop_elapsed / sorted_elapsed:.0f}x')
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Benchmark Tree Ensemble
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python benchmarks/benchmarkTreeEnsemble.py).
+# Description: "Benchmark Tree Ensemble" trains a 1000-tree classifier and regressor on a synthetic presence-absence dataset with 16-bit integer predictors, converts them to compiled tree ensembles, and predicts watershed-sized batches of 16-bit integer rows with XGBoost (including the conversion of each batch to an XGBoost matrix, as in "Predict Watersheds") and with the tree ensembles. The elapsed time, rows per second, and the maximum absolute difference from the XGBoost predictions are reported for each batch size.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from xgboost import DMatrix
+
+# Add the repository folder to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_Statistics.foldMatrices import createClassifier
+from package_Statistics.foldMatrices import createRegressor
+from package_Statistics.treeEnsemble import TreeEnsemble
+from benchmarks.syntheticSites import syntheticSites
+
+
+# Define a function to scale synthetic features to 16-bit integers as stored in the watershed tables
+def integerFeatures(X, scale=1000):
+    return np.clip(np.round(X * scale), -32768, 32767).astype('int16')
+
+
+# Run the benchmark when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark compiled tree ensembles against XGBoost prediction.')
+    parser.add_argument('--training-rows', type=int, default=5000, help='Number of synthetic sites used to train the models.')
+    parser.add_argument('--batch-rows', type=int, nargs='+', default=[100000, 500000], help='Watershed batch sizes to predict.')
+    parser.add_argument('--trees', type=int, default=1000, help='Number of trees per model.')
+    parser.add_argument('--max-depth', type=int, default=6, help='Maximum depth of the trees.')
+    parser.add_argument('--threads', type=int, default=1, help='Number of prediction threads.')
+    arguments = parser.parse_args()
+
+    # Train the models on the synthetic dataset with parameters in the middle of the search domain
+    X, y = syntheticSites(arguments.training_rows)
+    X = integerFeatures(X)
+    parameters = [arguments.max_depth, 0.1, 1, 1, 0, 0.8, 0.8, 0.8, 1, 1, 1]
+    print(f'Training a {arguments.trees}-tree classifier and regressor...')
+    classifier = createClassifier(parameters, n_jobs=arguments.threads, n_estimators=arguments.trees).fit(X.astype('float32'), y)
+    regressor = createRegressor(parameters, n_jobs=arguments.threads, n_estimators=arguments.trees).fit(X.astype('float32'), X[:, 0] / 100 + 10 * y)
+
+    # Convert the models to tree ensembles
+    models = []
+    for name, model in [('classifier', classifier), ('regressor', regressor)]:
+        compile_start = time.perf_counter()
+        ensemble = TreeEnsemble(model)
+        ensemble.predict(X[:10], arguments.threads)
+        report = ensemble.report()
+        print(f'\tConverted {name} in {time.perf_counter() - compile_start:.1f} s ({report["trees"]} trees of depth {report["depth"]}, '
+              f'{report["node_mb"]} MB of nodes, compiled: {report["compiled"]})')
+        models.append((name, model, ensemble))
+
+    # Predict each batch size with XGBoost and the tree ensembles
+    print(f'{"model":>10} {"rows":>8} {"xgboost s":>10} {"ensemble s":>11} {"xgboost rows/s":>15} {"ensemble rows/s":>16} {"speedup":>8} {"max difference":>15}')
+    for batch_rows in arguments.batch_rows:
+        batch, labels = syntheticSites(batch_rows, seed=batch_rows)
+        batch = integerFeatures(batch)
+        for name, model, ensemble in models:
+            xgboost_start = time.perf_counter()
+            reference = model.get_booster().predict(DMatrix(batch, nthread=arguments.threads))
+            xgboost_elapsed = time.perf_counter() - xgboost_start
+            ensemble_start = time.perf_counter()
+            prediction = ensemble.predict(batch, arguments.threads)
+            ensemble_elapsed = time.perf_counter() - ensemble_start
+            difference = float(np.abs(prediction - reference).max())
+            print(f'{name:>10} {batch_rows:>8} {xgboost_elapsed:>10.2f} {ensemble_elapsed:>11.2f} {batch_rows / xgboost_elapsed:>15.0f} '
+                  f'{batch_rows / ensemble_elapsed:>16.0f} {xgboost_elapsed / ensemble_elapsed:>7.2f}x {difference:>15.2e}')
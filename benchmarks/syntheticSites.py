@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Synthetic Sites
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the benchmarks folder in an Anaconda 3 installation.
+# Description: "Synthetic Sites" creates the synthetic presence-absence dataset shared by the benchmarks. It depends only on numpy so that the prediction benchmarks can run without the bayesian optimization packages.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation
+import numpy as np
+
+
+# Define a function to create a synthetic presence-absence dataset
+def syntheticSites(rows, features=83, seed=314):
+    random = np.random.default_rng(seed)
+    X = random.normal(size=(rows, features))
+    signal = X[:, 0] - 0.5 * X[:, 1] + 0.5 * X[:, 2] * X[:, 3] + random.normal(scale=1.0, size=rows)
+    y = (signal > 0).astype('int32')
+    return X, y
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Geospatial Processing Package
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Add the repository folder to the python path and import from package_GeospatialProcessing in an Anaconda 3 installation.
+# Description: "Geospatial Processing Package" contains the raster functions that operate directly on the predictor and area of interest rasters without an ArcGIS Pro installation.
+# ---------------------------------------------------------------------------
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Climate Reduction
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.climateReduction --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Climate Reduction" performs the operations of the ArcGIS Pro "Average Climate Data" and "Summer Warmth Index" tools without arcpy or intermediate files. The aligned input rasters are read together one block at a time, and each block is reduced to the rounded integer mean of each group of rasters and, for the summer warmth index, to the sum of the monthly means weighted by the number of days per month. Cells that are no data in any input raster are no data in the output, and the output is written to a tiled and compressed 16-bit signed GeoTIFF.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+# Import rasterio for raster input and output
+import rasterio
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import alignedOffset
+from package_GeospatialProcessing.rasterBlocks import bit_depths
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import castInteger
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import roundHalfUp
+from package_GeospatialProcessing.rasterBlocks import shiftWindow
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+
+# Define the number of days per month from May through September for the summer warmth index
+summer_days = [31, 30, 31, 31, 30]
+
+
+# Define a function to calculate the rounded integer mean of each group of blocks
+def groupMeans(blocks, group_sizes, scaling_factor=1):
+    means = []
+    start = 0
+    for group_size in group_sizes:
+        # Sum the blocks of the group in double precision
+        block_sum = np.zeros(blocks[start].shape, dtype=np.float64)
+        for block in blocks[start:start + group_size]:
+            block_sum += block
+        means.append(roundHalfUp(block_sum / group_size, scaling_factor))
+        start += group_size
+    return means
+
+
+# Define a function to calculate the weighted sum of the rounded integer mean of each group of blocks
+def weightedSum(blocks, group_sizes, weights, scaling_factor=1):
+    output = np.zeros(blocks[0].shape, dtype=np.float64)
+    for mean, weight in zip(groupMeans(blocks, group_sizes, scaling_factor), weights):
+        output += mean * weight
+    return output
+
+
+# Define a function to reduce aligned rasters block by block into a single integer raster
+def reduceRasters(input_rasters, output_raster, reduceBlock, bit_depth='16_BIT_SIGNED', block_size=default_block_size):
+    dtype, nodata = bit_depths[bit_depth]
+    datasets = [rasterio.open(input_raster) for input_raster in input_rasters]
+    try:
+        # Align all rasters to the grid and extent of the first raster
+        reference = datasets[0]
+        offsets = [alignedOffset(reference, dataset) for dataset in datasets]
+        profile = tiledProfile(reference.height, reference.width, reference.transform, reference.crs, dtype, nodata, block_size)
+        with rasterio.open(output_raster + '.partial', 'w', **profile) as output_dataset:
+            for window in blockWindows(reference.height, reference.width, block_size):
+                # Read one block from each raster and propagate no data from any raster
+                blocks = []
+                missing = np.zeros((window.height, window.width), dtype=bool)
+                for dataset, offset in zip(datasets, offsets):
+                    band = dataset.read(1, window=shiftWindow(window, offset), masked=True)
+                    missing |= np.ma.getmaskarray(band)
+                    blocks.append(band.filled(0))
+                output_dataset.write(castInteger(reduceBlock(blocks), missing, dtype, nodata), 1, window=window)
+    finally:
+        for dataset in datasets:
+            dataset.close()
+    os.replace(output_raster + '.partial', output_raster)
+
+
+# Define a function to calculate the integer mean of multiple decadal climate rasters
+def averageClimate(input_rasters, output_raster, block_size=default_block_size):
+    reduceRasters(input_rasters,
+                  output_raster,
+                  lambda blocks: groupMeans(blocks, [len(input_rasters)])[0],
+                  block_size=block_size)
+
+
+# Define a function to calculate the summer warmth index from decadal mean monthly temperature rasters for May through September
+def summerWarmthIndex(monthly_rasters, output_raster, block_size=default_block_size):
+    if len(monthly_rasters) != len(summer_days):
+        raise ValueError(f'Summer warmth index requires rasters for {len(summer_days)} months but {len(monthly_rasters)} were provided.')
+    # Monthly means are rounded to tenths of a degree before weighting by the number of days per month
+    group_sizes = [len(month_rasters) for month_rasters in monthly_rasters]
+    reduceRasters([input_raster for month_rasters in monthly_rasters for input_raster in month_rasters],
+                  output_raster,
+                  lambda blocks: weightedSum(blocks, group_sizes, summer_days, scaling_factor=10),
+                  block_size=block_size)
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Average decadal climate rasters or calculate the summer warmth index block by block.')
+    subparsers = parser.add_subparsers(dest='operation', required=True)
+    average_parser = subparsers.add_parser('average', help='Calculate the integer mean of multiple decadal climate rasters.')
+    average_parser.add_argument('--input-rasters', nargs='+', required=True, help='Decadal climate rasters on the same grid.')
+    warmth_parser = subparsers.add_parser('summer-warmth', help='Calculate the summer warmth index from mean monthly temperature rasters.')
+    for month in ['may', 'june', 'july', 'august', 'september']:
+        warmth_parser.add_argument(f'--{month}', nargs='+', required=True, help=f'Decadal mean monthly temperature rasters for {month.capitalize()}.')
+    for operation_parser in [average_parser, warmth_parser]:
+        operation_parser.add_argument('--output-raster', required=True, help='Output GeoTIFF.')
+        operation_parser.add_argument('--block-size', type=int, default=default_block_size, help='Width and height in cells of the blocks read and written at one time.')
+    return parser.parse_args()
+
+
+# Run the reduction when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    total_start = time.time()
+    if arguments.operation == 'average':
+        averageClimate(arguments.input_rasters, arguments.output_raster, block_size=arguments.block_size)
+    else:
+        summerWarmthIndex([arguments.may, arguments.june, arguments.july, arguments.august, arguments.september],
+                          arguments.output_raster,
+                          block_size=arguments.block_size)
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
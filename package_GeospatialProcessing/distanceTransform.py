@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Distance Transform
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.distanceTransform --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Distance Transform" calculates the euclidean distance to large streams, small streams, and floodplains of the ArcGIS Pro "Distance to Streams (Large and Small)" and "Distance to Floodplain" tools in a single run without arcpy. The source features are rasterized once onto the grid of the snap raster as one bit per source in a single byte raster, and the exact euclidean distance of each source is calculated in square tiles across a pool of worker processes. A coarse distance transform of the blocks that contain sources bounds the distance of every tile, and each tile is expanded by a halo as wide as its bound, up to a maximum halo. Tiles farther from the sources than the maximum halo query the nearest source cell on the border of the sources within the bound instead. The tiled distances are identical to the distances of the full raster.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import numpy as np
+# Import geopandas and shapely for feature input
+import geopandas
+from shapely.geometry import box
+# Import rasterio for raster input, output, and rasterization
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import bounds as windowBounds
+from rasterio.windows import transform as windowTransform
+# Import modules for distance transforms from SciPy
+from scipy.ndimage import distance_transform_edt
+from scipy.spatial import cKDTree
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import alignedOffset
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import borderCells
+from package_GeospatialProcessing.rasterBlocks import coarseBounds
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import default_coarse_size
+from package_GeospatialProcessing.rasterBlocks import haloWindow
+from package_GeospatialProcessing.rasterBlocks import nearbyBlocks
+from package_GeospatialProcessing.rasterBlocks import shiftWindow
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+from package_GeospatialProcessing.rasterBlocks import windowBound
+
+# Define the default tile size and maximum halo in cells and the no data value of the output rasters
+default_tile_size = 2048
+default_max_halo = 1024
+default_nodata = -9999
+
+# Define the stream orders of large and small streams
+large_orders = [3, 4, 5, 6, 7, 8, 9]
+small_orders = [1, 2]
+
+
+# Define a function to read the geometries of a feature class, optionally selecting features by the values of a field
+def readGeometries(feature_file, layer=None, field=None, values=None):
+    features = geopandas.read_file(feature_file, layer=layer)
+    if field is not None:
+        features = features[features[field].isin(values)]
+    return features.geometry
+
+
+# Define a function to rasterize sets of geometries onto the grid of a snap raster as one bit per set
+def rasterizeSources(snap_raster, geometry_sets, source_raster, block_size=default_tile_size):
+    if len(geometry_sets) > 8:
+        raise ValueError(f'At most 8 sources can be rasterized into a byte raster but {len(geometry_sets)} were provided.')
+    with rasterio.open(snap_raster) as snap_dataset:
+        height, width = snap_dataset.height, snap_dataset.width
+        transform, crs = snap_dataset.transform, snap_dataset.crs
+    # Project the geometries to the snap raster and rasterize lines along every cell they touch
+    prepared = []
+    for geometries in geometry_sets:
+        if crs is not None and geometries.crs is not None:
+            geometries = geometries.to_crs(crs)
+        geometries = geometries[~geometries.is_empty & geometries.notna()].reset_index(drop=True)
+        all_touched = bool(geometries.geom_type.isin(['LineString', 'MultiLineString']).all())
+        prepared.append((geometries, geometries.sindex, all_touched))
+    profile = tiledProfile(height, width, transform, crs, 'uint8', None, default_block_size)
+    with rasterio.open(source_raster + '.partial', 'w', **profile) as source_dataset:
+        for window in blockWindows(height, width, block_size):
+            block = np.zeros((window.height, window.width), dtype=np.uint8)
+            block_box = box(*windowBounds(window, transform))
+            for bit, (geometries, spatial_index, all_touched) in enumerate(prepared):
+                # Rasterize only the geometries that intersect the block
+                selection = spatial_index.query(block_box, predicate='intersects')
+                if len(selection) > 0:
+                    mask = rasterize(geometries.iloc[selection],
+                                     out_shape=block.shape,
+                                     transform=windowTransform(window, transform),
+                                     fill=0,
+                                     default_value=1,
+                                     all_touched=all_touched,
+                                     dtype='uint8')
+                    block |= mask << bit
+            source_dataset.write(block, 1, window=window)
+    os.replace(source_raster + '.partial', source_raster)
+
+
+# Define a function to find the coarse blocks of the source raster that contain each source
+def coarseSources(source_raster, source_count, coarse_size=default_coarse_size):
+    with rasterio.open(source_raster) as source_dataset:
+        height, width = source_dataset.height, source_dataset.width
+        coarse = np.zeros((source_count, -(-height // coarse_size), -(-width // coarse_size)), dtype=bool)
+        # Read windows that are whole multiples of the coarse block size
+        for window in blockWindows(height, width, coarse_size * 32):
+            rows, columns = -(-window.height // coarse_size), -(-window.width // coarse_size)
+            block = np.zeros((rows * coarse_size, columns * coarse_size), dtype=np.uint8)
+            block[:window.height, :window.width] = source_dataset.read(1, window=window)
+            block = block.reshape(rows, coarse_size, columns, coarse_size)
+            row, column = window.row_off // coarse_size, window.col_off // coarse_size
+            for bit in range(source_count):
+                coarse[bit, row:row + rows, column:column + columns] = ((block & (1 << bit)) > 0).any(axis=(1, 3))
+    return coarse
+
+
+# Define a function to calculate an upper bound of the distance to each source for the cells of each coarse block
+def sourceBounds(coarse, cell_size, coarse_size=default_coarse_size):
+    return np.stack([coarseBounds(coarse[bit], cell_size, coarse_size) for bit in range(coarse.shape[0])])
+
+
+# Define the coarse source blocks and distance bounds loaded once in each worker process
+worker_coarse = None
+worker_bounds = None
+
+
+# Define a function to store the coarse source blocks and distance bounds once when a worker process starts
+def initializeWorker(coarse, bounds):
+    global worker_coarse, worker_bounds
+    worker_coarse = coarse
+    worker_bounds = bounds
+
+
+# Define a function to read the source cells that border a non-source cell within the coarse blocks that may contain the nearest source of a tile
+def boundaryCells(source_dataset, window, bit, bound, coarse_size=default_coarse_size):
+    cell_width, cell_height = source_dataset.res
+    height, width = source_dataset.height, source_dataset.width
+    cells = []
+    for block in nearbyBlocks(worker_coarse[bit], window, bound, height, width, source_dataset.res, coarse_size):
+        # Read the block with a margin of one cell to find the source cells next to a non-source cell
+        outer, inner = haloWindow(block, 1, height, width)
+        rows, columns = np.nonzero(borderCells((source_dataset.read(1, window=outer) & (1 << bit)) > 0, inner))
+        cells.append(np.column_stack([(rows + block.row_off) * cell_height, (columns + block.col_off) * cell_width]))
+    return np.concatenate(cells)
+
+
+# Define a function to calculate the exact distance to each source within a tile
+def tileDistances(source_raster, window, source_count, max_halo=default_max_halo, coarse_size=default_coarse_size, nodata=default_nodata):
+    distances = []
+    with rasterio.open(source_raster) as source_dataset:
+        cell_width, cell_height = source_dataset.res
+        for bit in range(source_count):
+            # Bound the distance of every cell of the tile from the coarse blocks that cover the tile
+            bound = windowBound(worker_bounds[bit], window, coarse_size)
+            if not np.isfinite(bound):
+                # Set the tile to no data if the source does not exist in the raster
+                distances.append(np.full((window.height, window.width), nodata, dtype=np.float32))
+                continue
+            halo = int(np.ceil(bound / min(cell_width, cell_height)))
+            if halo <= max_halo:
+                # The nearest source cell of every cell in the tile lies within a halo as wide as the distance bound
+                outer, inner = haloWindow(window, halo, source_dataset.height, source_dataset.width)
+                source = (source_dataset.read(1, window=outer) & (1 << bit)) > 0
+                distances.append(distance_transform_edt(~source, sampling=(cell_height, cell_width))[inner].astype(np.float32))
+            else:
+                # Far from the sources, query the nearest source cell that borders a non-source cell within the distance bound
+                tree = cKDTree(boundaryCells(source_dataset, window, bit, bound, coarse_size))
+                columns = (np.arange(window.width) + window.col_off) * cell_width
+                distance = np.empty((window.height, window.width), dtype=np.float32)
+                for row in range(window.height):
+                    points = np.column_stack([np.full(window.width, (window.row_off + row) * cell_height), columns])
+                    distance[row] = tree.query(points)[0]
+                # Source cells within the tile are at zero distance
+                distance[(source_dataset.read(1, window=window) & (1 << bit)) > 0] = 0
+                distances.append(distance)
+    return window, distances
+
+
+# Define a function to calculate the distance to each set of geometries on the grid of a snap raster in parallel tiles
+def distanceRasters(snap_raster, geometry_sets, output_rasters, work_folder, tile_size=default_tile_size, max_halo=default_max_halo,
+                    coarse_size=default_coarse_size, workers=None, nodata=default_nodata):
+    if len(geometry_sets) != len(output_rasters):
+        raise ValueError('Provide one output raster per set of source geometries.')
+    if not os.path.exists(work_folder):
+        os.makedirs(work_folder)
+    # Rasterize the sources once
+    print(f'Rasterizing {len(geometry_sets)} sources onto the snap raster grid...')
+    source_raster = os.path.join(work_folder, 'distance_sources.tif')
+    rasterizeSources(snap_raster, geometry_sets, source_raster)
+    # Bound the distance to each source from the coarse blocks that contain sources
+    with rasterio.open(source_raster) as source_dataset:
+        height, width = source_dataset.height, source_dataset.width
+        profile = tiledProfile(height, width, source_dataset.transform, source_dataset.crs, 'float32', nodata)
+        cell_size = source_dataset.res
+    coarse = coarseSources(source_raster, len(output_rasters), coarse_size)
+    bounds = sourceBounds(coarse, cell_size, coarse_size)
+    # Calculate the distance transforms of the tiles in parallel and write each tile as it is completed
+    windows = list(blockWindows(height, width, tile_size))
+    print(f'Calculating euclidean distances in {len(windows)} tiles...')
+    output_datasets = [rasterio.open(output_raster + '.partial', 'w', **profile) for output_raster in output_rasters]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializeWorker, initargs=(coarse, bounds)) as executor:
+            futures = [executor.submit(tileDistances, source_raster, window, len(output_rasters), max_halo, coarse_size, nodata) for window in windows]
+            for future in as_completed(futures):
+                window, distances = future.result()
+                for output_dataset, distance in zip(output_datasets, distances):
+                    output_dataset.write(distance, 1, window=window)
+    finally:
+        for output_dataset in output_datasets:
+            output_dataset.close()
+    for output_raster in output_rasters:
+        os.replace(output_raster + '.partial', output_raster)
+    os.remove(source_raster)
+
+
+# Define a function to report the agreement of a distance raster with a reference distance raster
+def distanceAgreement(reference_raster, test_raster, block_size=default_tile_size):
+    with rasterio.open(test_raster) as test_dataset, rasterio.open(reference_raster) as reference_dataset:
+        offset = alignedOffset(test_dataset, reference_dataset)
+        cell_size = max(test_dataset.res)
+        cells = 0
+        within_cell = 0
+        difference_sum = 0
+        difference_max = 0
+        for window in blockWindows(test_dataset.height, test_dataset.width, block_size):
+            test = test_dataset.read(1, window=window, masked=True)
+            reference = reference_dataset.read(1, window=shiftWindow(window, offset), masked=True)
+            valid = ~(np.ma.getmaskarray(test) | np.ma.getmaskarray(reference))
+            difference = np.abs(test.data[valid].astype(np.float64) - reference.data[valid])
+            cells += len(difference)
+            within_cell += np.count_nonzero(difference <= cell_size)
+            difference_sum += difference.sum()
+            difference_max = max(difference_max, difference.max(initial=0))
+    return {'cells': cells,
+            'max_difference': round(float(difference_max), 2),
+            'mean_difference': round(float(difference_sum / max(cells, 1)), 2),
+            'within_one_cell': round(float(within_cell / max(cells, 1)), 4)}
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Calculate the euclidean distance to large streams, small streams, and floodplains in parallel tiles.')
+    parser.add_argument('--snap-raster', required=True, help='Raster that defines the extent, cell size, grid, and projection of the outputs.')
+    parser.add_argument('--stream-network', default=None, help='Stream network feature class attributed with strmOrder.')
+    parser.add_argument('--stream-layer', default=None, help='Layer of the stream network within a geodatabase or geopackage.')
+    parser.add_argument('--floodplain-feature', default=None, help='Floodplain feature class.')
+    parser.add_argument('--floodplain-layer', default=None, help='Layer of the floodplain feature class within a geodatabase or geopackage.')
+    parser.add_argument('--large-streams-output', default=None, help='Output distance to large streams (orders 3-9) raster.')
+    parser.add_argument('--small-streams-output', default=None, help='Output distance to small streams (orders 1-2) raster.')
+    parser.add_argument('--floodplain-output', default=None, help='Output distance to floodplain raster.')
+    parser.add_argument('--reference-rasters', nargs='+', default=None,
+                        help='Optional distance rasters from the ArcGIS Pro tools to compare with the outputs, in the order large streams, small streams, floodplain for the outputs requested.')
+    parser.add_argument('--work-folder', required=True, help='Folder where the rasterized sources are written.')
+    parser.add_argument('--tile-size', type=int, default=default_tile_size, help='Width and height in cells of the tiles calculated by each worker.')
+    parser.add_argument('--max-halo', type=int, default=default_max_halo, help='Largest width in cells of the halo around each tile.')
+    parser.add_argument('--coarse-size', type=int, default=default_coarse_size, help='Width and height in cells of the coarse blocks used to bound the distances.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores).')
+    return parser.parse_args()
+
+
+# Run the distance transforms when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    total_start = time.time()
+    # Read the source geometries of each requested output
+    geometry_sets = []
+    output_rasters = []
+    if arguments.large_streams_output is not None:
+        geometry_sets.append(readGeometries(arguments.stream_network, arguments.stream_layer, 'strmOrder', large_orders))
+        output_rasters.append(arguments.large_streams_output)
+    if arguments.small_streams_output is not None:
+        geometry_sets.append(readGeometries(arguments.stream_network, arguments.stream_layer, 'strmOrder', small_orders))
+        output_rasters.append(arguments.small_streams_output)
+    if arguments.floodplain_output is not None:
+        geometry_sets.append(readGeometries(arguments.floodplain_feature, arguments.floodplain_layer))
+        output_rasters.append(arguments.floodplain_output)
+    if len(output_rasters) == 0:
+        raise ValueError('Provide at least one output raster.')
+    distanceRasters(arguments.snap_raster,
+                    geometry_sets,
+                    output_rasters,
+                    arguments.work_folder,
+                    tile_size=arguments.tile_size,
+                    max_halo=arguments.max_halo,
+                    coarse_size=arguments.coarse_size,
+                    workers=arguments.workers)
+    # Compare the outputs with the reference rasters
+    if arguments.reference_rasters is not None:
+        for reference_raster, output_raster in zip(arguments.reference_rasters, output_rasters):
+            print(f'Agreement of {os.path.basename(output_raster)} with {os.path.basename(reference_raster)}: {distanceAgreement(reference_raster, output_raster)}')
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
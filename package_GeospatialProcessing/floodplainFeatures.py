@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Floodplain Features
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.floodplainFeatures --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Floodplain Features" creates the coarse floodplain of the ArcGIS Pro "Distance to Floodplain" tool without arcpy or intermediate feature classes. The stream network is read once and every stream of order 3-9 is buffered by its order squared times 10 m in a single vectorized operation. The buffers and the floodplains of the Landscape Level Ecological Mapping of Northern Alaska and the Circumboreal Vegetation Map that intersect the study area are selected with spatial indices, dissolved into a single multipart floodplain, and clipped to the study area. The floodplain can also be rasterized onto the grid of a snap raster and passed directly to the distance transform.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+# Import geopandas and shapely for feature input, output, and overlay
+import geopandas
+import shapely
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.distanceTransform import distanceRasters
+from package_GeospatialProcessing.distanceTransform import rasterizeSources
+from package_GeospatialProcessing.distanceTransform import readGeometries
+
+# Define the stream orders that are buffered into floodplains
+floodplain_orders = [3, 4, 5, 6, 7, 8, 9]
+
+
+# Define a function to calculate the buffer distance in meters of each stream order as the stream order squared * 10 m
+def bufferDistances(orders):
+    return np.asarray(orders, dtype=np.float64) ** 2 * 10
+
+
+# Define a function to buffer all streams of orders 3-9 by stream order in a single pass
+def bufferStreams(stream_network, layer=None):
+    streams = geopandas.read_file(stream_network, layer=layer)
+    streams = streams[streams['strmOrder'].isin(floodplain_orders)]
+    return streams.geometry.buffer(bufferDistances(streams['strmOrder']))
+
+
+# Define a function to select the geometries that intersect an area with a spatial index
+def selectIntersecting(geometries, area):
+    return geometries.iloc[geometries.sindex.query(area, predicate='intersects')]
+
+
+# Define a function to create the floodplain within the study area
+def buildFloodplain(stream_network, northern_alaska_subsections, circumboreal_vegetation, study_area, stream_layer=None, northern_alaska_layer=None, circumboreal_layer=None, study_area_layer=None):
+    # Read the study area and dissolve it into a single geometry
+    study_geometries = geopandas.read_file(study_area, layer=study_area_layer).geometry
+    crs = study_geometries.crs
+    study_geometry = shapely.union_all(study_geometries.to_numpy())
+    # Buffer the streams and select the floodplains of each source
+    print('Buffering streams by stream order...')
+    floodplain_sets = [bufferStreams(stream_network, stream_layer),
+                       readGeometries(northern_alaska_subsections, northern_alaska_layer, 'PHYSIOGRAP', ['Floodplain']),
+                       readGeometries(circumboreal_vegetation, circumboreal_layer, 'Physiograp', ['R'])]
+    # Select the geometries of each source that intersect the study area
+    print('Selecting floodplains that intersect the study area...')
+    selected = []
+    for geometries in floodplain_sets:
+        if crs is not None and geometries.crs is not None:
+            geometries = geometries.to_crs(crs)
+        selected.append(selectIntersecting(geometries, study_geometry).to_numpy())
+    # Dissolve the floodplains into a single multipart geometry and clip to the study area
+    print('Dissolving and clipping floodplains...')
+    floodplain = shapely.intersection(shapely.union_all(np.concatenate(selected)), study_geometry)
+    return geopandas.GeoSeries([floodplain], crs=crs)
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Create the floodplain from buffered streams and mapped floodplains and optionally its distance raster.')
+    parser.add_argument('--stream-network', required=True, help='Stream network feature class attributed with strmOrder.')
+    parser.add_argument('--stream-layer', default=None, help='Layer of the stream network within a geodatabase or geopackage.')
+    parser.add_argument('--northern-alaska-subsections', required=True, help='Landscape Level Ecological Mapping of Northern Alaska.')
+    parser.add_argument('--northern-alaska-layer', default=None, help='Layer of the Landscape Level Ecological Mapping within a geodatabase.')
+    parser.add_argument('--circumboreal-vegetation', required=True, help='Circumboreal Vegetation Map.')
+    parser.add_argument('--circumboreal-layer', default=None, help='Layer of the Circumboreal Vegetation Map within a geodatabase.')
+    parser.add_argument('--study-area', required=True, help='Polygon feature class that defines the region of analysis.')
+    parser.add_argument('--study-area-layer', default=None, help='Layer of the study area within a geodatabase or geopackage.')
+    parser.add_argument('--floodplain-feature', required=True, help='Output floodplain feature class (e.g., a shapefile or geopackage).')
+    parser.add_argument('--snap-raster', default=None, help='Raster that defines the grid of the mask and distance outputs.')
+    parser.add_argument('--mask-raster', default=None, help='Optional output raster with a value of 1 in floodplain cells.')
+    parser.add_argument('--distance-output', default=None, help='Optional output distance to floodplain raster.')
+    parser.add_argument('--work-folder', default=None, help='Folder where the rasterized floodplain is written for the distance transform.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes for the distance transform (default: all cores).')
+    return parser.parse_args()
+
+
+# Run the floodplain creation when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    if (arguments.mask_raster is not None or arguments.distance_output is not None) and arguments.snap_raster is None:
+        raise ValueError('A snap raster is required for the mask and distance outputs.')
+    total_start = time.time()
+    floodplain = buildFloodplain(arguments.stream_network,
+                                 arguments.northern_alaska_subsections,
+                                 arguments.circumboreal_vegetation,
+                                 arguments.study_area,
+                                 stream_layer=arguments.stream_layer,
+                                 northern_alaska_layer=arguments.northern_alaska_layer,
+                                 circumboreal_layer=arguments.circumboreal_layer,
+                                 study_area_layer=arguments.study_area_layer)
+    geopandas.GeoDataFrame(geometry=floodplain).to_file(arguments.floodplain_feature)
+    # Rasterize the floodplain onto the snap raster grid
+    if arguments.mask_raster is not None:
+        print('Rasterizing floodplain onto the snap raster grid...')
+        rasterizeSources(arguments.snap_raster, [floodplain], arguments.mask_raster)
+    # Calculate the distance to floodplain from the floodplain geometry without reading the feature class
+    if arguments.distance_output is not None:
+        work_folder = arguments.work_folder if arguments.work_folder is not None else os.path.dirname(os.path.abspath(arguments.distance_output))
+        distanceRasters(arguments.snap_raster, [floodplain], [arguments.distance_output], work_folder, workers=arguments.workers)
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
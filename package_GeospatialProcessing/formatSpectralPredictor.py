@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Format Spectral Predictor
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.formatSpectralPredictor --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Format Spectral Predictor" performs the operations of the ArcGIS Pro "Format Spectral Predictor" tool without arcpy. Input tiles of single band imagery are scaled, rounded, and converted to 16-bit integers in blocks across a pool of worker processes. The integer tiles are mosaicked in blocks into a surface on disk, no data cells are filled with the value of the nearest cell with data in parallel tiles with bounded halos, and the filled surface is resampled to the area of interest by bilinear interpolation of the four nearest cell centers in blocks of a tiled and compressed GeoTIFF.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import numpy as np
+# Import rasterio for raster input, output, and reprojection
+import rasterio
+from rasterio.warp import transform as transformCoordinates
+from rasterio.windows import Window
+from rasterio.windows import transform as windowTransform
+# Import modules for distance transforms, nearest neighbors, and interpolation from SciPy
+from scipy.ndimage import distance_transform_edt
+from scipy.ndimage import map_coordinates
+from scipy.spatial import cKDTree
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import bit_depths
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import borderCells
+from package_GeospatialProcessing.rasterBlocks import castInteger
+from package_GeospatialProcessing.rasterBlocks import coarseBounds
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import default_coarse_size
+from package_GeospatialProcessing.rasterBlocks import gridOffset
+from package_GeospatialProcessing.rasterBlocks import haloWindow
+from package_GeospatialProcessing.rasterBlocks import nearbyBlocks
+from package_GeospatialProcessing.rasterBlocks import roundHalfUp
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+from package_GeospatialProcessing.rasterBlocks import windowBound
+
+# Define the default tile size and maximum halo in cells of the nearest neighbor fill
+default_tile_size = 2048
+default_max_halo = 1024
+
+
+# Define a function to convert a float tile to an integer tile in blocks
+def integerTile(input_tile, output_tile, scaling_factor, bit_depth, block_size=default_block_size):
+    dtype, nodata = bit_depths[bit_depth]
+    with rasterio.open(input_tile) as input_dataset:
+        profile = tiledProfile(input_dataset.height, input_dataset.width, input_dataset.transform, input_dataset.crs, dtype, nodata, block_size)
+        with rasterio.open(output_tile, 'w', **profile) as output_dataset:
+            for window in blockWindows(input_dataset.height, input_dataset.width, block_size):
+                # Scale, round, and cast the block in a single pass
+                band = input_dataset.read(1, window=window, masked=True)
+                missing = np.ma.getmaskarray(band) | ~np.isfinite(band.data)
+                output_dataset.write(castInteger(roundHalfUp(band.data, scaling_factor), missing, dtype, nodata), 1, window=window)
+    return output_tile
+
+
+# Define a function to mosaic integer tiles on the grid of the first tile in blocks, averaging overlapping cells, and return the number of no data cells
+def mosaicTiles(tile_files, bit_depth, mosaic_raster, tile_size=default_tile_size, block_size=default_block_size):
+    dtype, nodata = bit_depths[bit_depth]
+    datasets = [rasterio.open(tile_file) for tile_file in tile_files]
+    try:
+        # Determine the extent of the mosaic on the grid of the first tile
+        reference = datasets[0]
+        offsets = [gridOffset(dataset.transform, reference, dataset.name) for dataset in datasets]
+        top = min(row for row, column in offsets)
+        left = min(column for row, column in offsets)
+        height = max(row + dataset.height for (row, column), dataset in zip(offsets, datasets)) - top
+        width = max(column + dataset.width for (row, column), dataset in zip(offsets, datasets)) - left
+        transform = windowTransform(Window(left, top, width, height), reference.transform)
+        profile = tiledProfile(height, width, transform, reference.crs, dtype, nodata, block_size)
+        missing_count = 0
+        with rasterio.open(mosaic_raster + '.partial', 'w', **profile) as mosaic_dataset:
+            for window in blockWindows(height, width, tile_size):
+                # Sum the values and count the tiles with data in each cell of the block
+                value_sum = np.zeros((window.height, window.width), dtype=np.int64)
+                value_count = np.zeros((window.height, window.width), dtype=np.uint16)
+                for (row, column), dataset in zip(offsets, datasets):
+                    first_row = max(window.row_off, row - top)
+                    last_row = min(window.row_off + window.height, row - top + dataset.height)
+                    first_column = max(window.col_off, column - left)
+                    last_column = min(window.col_off + window.width, column - left + dataset.width)
+                    if first_row >= last_row or first_column >= last_column:
+                        continue
+                    # Read the part of the tile that overlaps the block
+                    band = dataset.read(1, window=Window(first_column - (column - left), first_row - (row - top),
+                                                         last_column - first_column, last_row - first_row), masked=True)
+                    valid = ~np.ma.getmaskarray(band)
+                    rows = slice(first_row - window.row_off, last_row - window.row_off)
+                    columns = slice(first_column - window.col_off, last_column - window.col_off)
+                    value_sum[rows, columns][valid] += band.data[valid]
+                    value_count[rows, columns] += valid
+                # Store the mean of overlapping cells in the integer pixel type
+                missing = value_count == 0
+                block = np.full((window.height, window.width), nodata, dtype=dtype)
+                block[~missing] = (value_sum[~missing] / value_count[~missing]).astype(dtype)
+                missing_count += int(np.count_nonzero(missing))
+                mosaic_dataset.write(block, 1, window=window)
+    finally:
+        for dataset in datasets:
+            dataset.close()
+    os.replace(mosaic_raster + '.partial', mosaic_raster)
+    return missing_count
+
+
+# Define a function to find the coarse blocks of a surface that contain cells with data
+def coarseData(surface_raster, coarse_size=default_coarse_size):
+    with rasterio.open(surface_raster) as surface_dataset:
+        height, width = surface_dataset.height, surface_dataset.width
+        coarse = np.zeros((-(-height // coarse_size), -(-width // coarse_size)), dtype=bool)
+        # Read windows that are whole multiples of the coarse block size
+        for window in blockWindows(height, width, coarse_size * 32):
+            rows, columns = -(-window.height // coarse_size), -(-window.width // coarse_size)
+            block = np.zeros((rows * coarse_size, columns * coarse_size), dtype=bool)
+            block[:window.height, :window.width] = surface_dataset.read_masks(1, window=window) > 0
+            row, column = window.row_off // coarse_size, window.col_off // coarse_size
+            coarse[row:row + rows, column:column + columns] = block.reshape(rows, coarse_size, columns, coarse_size).any(axis=(1, 3))
+    return coarse
+
+
+# Define the coarse data blocks and distance bounds loaded once in each worker process
+worker_coarse = None
+worker_bounds = None
+
+
+# Define a function to store the coarse data blocks and distance bounds once when a worker process starts
+def initializeWorker(coarse, bounds):
+    global worker_coarse, worker_bounds
+    worker_coarse = coarse
+    worker_bounds = bounds
+
+
+# Define a function to fill the no data cells of a tile with the value of the nearest cell with data
+def fillTile(surface_raster, window, max_halo=default_max_halo, coarse_size=default_coarse_size):
+    with rasterio.open(surface_raster) as surface_dataset:
+        height, width, nodata = surface_dataset.height, surface_dataset.width, surface_dataset.nodata
+        values = surface_dataset.read(1, window=window)
+        missing = values == nodata
+        if not missing.any():
+            return window, values
+        # Bound the distance in cells to the nearest cell with data from the coarse blocks that cover the tile
+        bound = windowBound(worker_bounds, window, coarse_size)
+        halo = int(np.ceil(bound))
+        if halo <= max_halo:
+            # Find the row and column of the nearest cell with data for every cell within a halo as wide as the distance bound
+            outer, inner = haloWindow(window, halo, height, width)
+            outer_values = surface_dataset.read(1, window=outer)
+            indices = distance_transform_edt(outer_values == nodata, return_distances=False, return_indices=True)
+            return window, outer_values[indices[0][inner], indices[1][inner]]
+        # Far from the cells with data, query the nearest cell with data that borders a no data cell within the distance bound
+        cells = []
+        cell_values = []
+        for block in nearbyBlocks(worker_coarse, window, bound, height, width, coarse_size=coarse_size):
+            outer, inner = haloWindow(block, 1, height, width)
+            block_values = surface_dataset.read(1, window=outer)
+            rows, columns = np.nonzero(borderCells(block_values != nodata, inner))
+            cells.append(np.column_stack([rows + block.row_off, columns + block.col_off]))
+            cell_values.append(block_values[inner][rows, columns])
+        rows, columns = np.nonzero(missing)
+        nearest = cKDTree(np.concatenate(cells)).query(np.column_stack([rows + window.row_off, columns + window.col_off]))[1]
+        values[missing] = np.concatenate(cell_values)[nearest]
+    return window, values
+
+
+# Define a function to fill no data cells of a surface with the value of the nearest cell with data in parallel tiles
+def nearestFill(surface_raster, filled_raster, tile_size=default_tile_size, max_halo=default_max_halo, coarse_size=default_coarse_size,
+                workers=None, block_size=default_block_size):
+    # Bound the distance to the nearest cell with data from the coarse blocks that contain data
+    coarse = coarseData(surface_raster, coarse_size)
+    if not coarse.any():
+        raise ValueError('The mosaic does not contain any cells with data.')
+    bounds = coarseBounds(coarse, coarse_size=coarse_size)
+    with rasterio.open(surface_raster) as surface_dataset:
+        profile = tiledProfile(surface_dataset.height, surface_dataset.width, surface_dataset.transform, surface_dataset.crs,
+                               surface_dataset.dtypes[0], surface_dataset.nodata, block_size)
+        windows = list(blockWindows(surface_dataset.height, surface_dataset.width, tile_size))
+    # Fill the tiles in parallel and write each tile as it is completed
+    with rasterio.open(filled_raster + '.partial', 'w', **profile) as filled_dataset:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializeWorker, initargs=(coarse, bounds)) as executor:
+            futures = [executor.submit(fillTile, surface_raster, window, max_halo, coarse_size) for window in windows]
+            for future in as_completed(futures):
+                window, values = future.result()
+                filled_dataset.write(values, 1, window=window)
+    os.replace(filled_raster + '.partial', filled_raster)
+
+
+# Define a function to resample a surface at points with bilinear interpolation of the four nearest cell centers
+def bilinearSample(surface_dataset, x, y):
+    # Convert the coordinates to fractional rows and columns measured from the first cell center
+    column, row = ~surface_dataset.transform * (x, y)
+    column -= 0.5
+    row -= 0.5
+    # Points outside of the surface are no data and points within half a cell of the edge use the edge cells
+    outside = ~(np.isfinite(row) & np.isfinite(column))
+    outside[~outside] = ((row[~outside] < -0.5) | (row[~outside] > surface_dataset.height - 0.5)
+                         | (column[~outside] < -0.5) | (column[~outside] > surface_dataset.width - 0.5))
+    sample = np.zeros(row.shape, dtype=np.float64)
+    if outside.all():
+        return sample, outside
+    # Read the window of the surface that contains the four nearest cell centers of every point
+    row, column = row[~outside], column[~outside]
+    first_row = max(0, int(np.floor(row.min())))
+    last_row = min(surface_dataset.height - 1, int(np.floor(row.max())) + 1)
+    first_column = max(0, int(np.floor(column.min())))
+    last_column = min(surface_dataset.width - 1, int(np.floor(column.max())) + 1)
+    values = surface_dataset.read(1, window=Window(first_column, first_row, last_column - first_column + 1, last_row - first_row + 1))
+    sample[~outside] = map_coordinates(values, [row - first_row, column - first_column], output=np.float64, order=1, mode='nearest')
+    return sample, outside
+
+
+# Define a function to reproject a surface to the area of interest and extract it to the area of interest in blocks
+def projectExtract(surface_raster, area_of_interest, output_raster, bit_depth, block_size=default_block_size):
+    dtype, nodata = bit_depths[bit_depth]
+    with rasterio.open(surface_raster) as surface_dataset, rasterio.open(area_of_interest) as area_dataset:
+        profile = tiledProfile(area_dataset.height, area_dataset.width, area_dataset.transform, area_dataset.crs, dtype, nodata, block_size)
+        with rasterio.open(output_raster + '.partial', 'w', **profile) as output_dataset:
+            for window in blockWindows(area_dataset.height, area_dataset.width, block_size):
+                valid = area_dataset.read_masks(1, window=window) > 0
+                output_block = np.full((window.height, window.width), nodata, dtype=dtype)
+                if valid.any():
+                    # Project the centers of the cells within the area of interest to the coordinate system of the surface
+                    row, column = np.nonzero(valid)
+                    x, y = area_dataset.transform * (column + window.col_off + 0.5, row + window.row_off + 0.5)
+                    x, y = transformCoordinates(area_dataset.crs, surface_dataset.crs, x, y)
+                    # Resample the surface with bilinear interpolation and round the results to integers
+                    sample, outside = bilinearSample(surface_dataset, np.asarray(x), np.asarray(y))
+                    output_block[valid] = castInteger(roundHalfUp(sample), outside, dtype, nodata)
+                output_dataset.write(output_block, 1, window=window)
+    os.replace(output_raster + '.partial', output_raster)
+
+
+# Define a function to format spectral tiles into a predictor raster that matches the area of interest
+def formatSpectralPredictor(input_tiles, area_of_interest, scaling_factor, bit_depth, work_folder, output_raster, workers=None, block_size=default_block_size,
+                            tile_size=default_tile_size, max_halo=default_max_halo, coarse_size=default_coarse_size):
+    if bit_depth not in bit_depths:
+        raise ValueError(f'Bit depth must be one of {", ".join(bit_depths)} but was {bit_depth}.')
+    if not os.path.exists(work_folder):
+        os.makedirs(work_folder)
+    total_start = time.time()
+    # Convert the float tiles to integer tiles in parallel
+    print(f'Converting {len(input_tiles)} tiles from float to integer...')
+    output_tiles = [os.path.join(work_folder, os.path.split(input_tile)[1]) for input_tile in input_tiles]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(integerTile,
+                          input_tiles,
+                          output_tiles,
+                          [scaling_factor] * len(input_tiles),
+                          [bit_depth] * len(input_tiles),
+                          [block_size] * len(input_tiles)))
+    # Mosaic the formatted tiles into a single continuous surface
+    print('Compiling tiles into a continuous surface...')
+    surface_raster = os.path.join(work_folder, 'spectral_mosaic.tif')
+    missing_count = mosaicTiles(output_tiles, bit_depth, surface_raster, tile_size, block_size)
+    for output_tile in output_tiles:
+        os.remove(output_tile)
+    # Extrapolate missing data using nearest neighbors
+    if missing_count > 0:
+        print(f'Filling {missing_count} no data cells based on extension of nearest neighbors...')
+        filled_raster = os.path.join(work_folder, 'spectral_filled.tif')
+        nearestFill(surface_raster, filled_raster, tile_size, max_halo, coarse_size, workers, block_size)
+        os.remove(surface_raster)
+        surface_raster = filled_raster
+    # Reproject the filled surface to match and extract to the area of interest
+    print('Reprojecting, resampling, and extracting output to area of interest...')
+    projectExtract(surface_raster, area_of_interest, output_raster, bit_depth, block_size)
+    # Delete intermediate files
+    os.remove(surface_raster)
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Format spectral tiles into a predictor raster that matches the area of interest.')
+    parser.add_argument('--input-tiles', nargs='+', required=True, help='Single band float imagery tiles.')
+    parser.add_argument('--area-of-interest', required=True, help='Raster that defines the extent, cell size, grid, and projection of the output.')
+    parser.add_argument('--scaling-factor', type=int, required=True, help='Factor by which the float values are multiplied before rounding to integers.')
+    parser.add_argument('--bit-depth', choices=list(bit_depths), default='16_BIT_SIGNED', help='Bit depth of the output raster.')
+    parser.add_argument('--work-folder', required=True, help='Folder where the intermediate integer tiles are written.')
+    parser.add_argument('--output-raster', required=True, help='Output GeoTIFF.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes that convert and fill tiles (default: all cores).')
+    parser.add_argument('--block-size', type=int, default=default_block_size, help='Width and height in cells of the blocks read and written at one time.')
+    parser.add_argument('--tile-size', type=int, default=default_tile_size, help='Width and height in cells of the mosaic tiles filled by each worker.')
+    parser.add_argument('--max-halo', type=int, default=default_max_halo, help='Largest width in cells of the halo around each filled tile.')
+    parser.add_argument('--coarse-size', type=int, default=default_coarse_size, help='Width and height in cells of the coarse blocks used to bound the fill distances.')
+    return parser.parse_args()
+
+
+# Run the formatting when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    formatSpectralPredictor(arguments.input_tiles,
+                            arguments.area_of_interest,
+                            arguments.scaling_factor,
+                            arguments.bit_depth,
+                            arguments.work_folder,
+                            arguments.output_raster,
+                            workers=arguments.workers,
+                            block_size=arguments.block_size,
+                            tile_size=arguments.tile_size,
+                            max_halo=arguments.max_halo,
+                            coarse_size=arguments.coarse_size)
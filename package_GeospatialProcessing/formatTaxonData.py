@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Format Taxon Data
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.formatTaxonData --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Format Taxon Data" performs the operations of the ArcGIS Pro "Format Taxon Data" tool in memory without arcpy or intermediate feature classes, and formats any number of taxa in a single run with the survey sites read once. Presence sites are merged with the survey sites at which the taxon was absent within the area of interest, and the sites are binned into grid cells of the merge distance snapped to the grid of the area of interest with integer cell keys. The rounded mean cover of each cell is assigned to the site nearest the cell center, found with a KD-tree, and the other sites in the cell are removed. Cover strata and thresholds are calculated as arrays, and the values of the predictor rasters are sampled once at all survey sites and joined to the remaining sites of each taxon from a site feature cache.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+import pandas as pd
+# Import geopandas for feature input and output
+import geopandas
+# Import rasterio for raster input
+import rasterio
+# Import modules for nearest neighbor queries from SciPy
+from scipy.spatial import cKDTree
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import samplePoints
+from package_GeospatialProcessing.siteFeatures import joinFeatures
+from package_GeospatialProcessing.siteFeatures import predictorName
+from package_GeospatialProcessing.siteFeatures import siteFeatures
+# Import variable sets from the statistics package
+from package_Statistics.variableSets import taxon_predictors
+from package_Statistics.variableSets import taxon_variables
+
+# Define the fields removed from the presence and absence sites before merging
+presence_drop = ['abundanceID', 'vegObserver1', 'vegObserver2', 'nameAccepted', 'tsnITIS']
+absence_drop = ['initialProject', 'initialProjectTitle']
+
+
+# Define a function to read the coordinates of point features
+def pointCoordinates(features):
+    return features.geometry.x.to_numpy(), features.geometry.y.to_numpy()
+
+
+# Define a function to select the features that fall within cells with data in the area of interest
+def selectArea(features, area_dataset):
+    x, y = pointCoordinates(features)
+    return features[~np.isnan(samplePoints(area_dataset, x, y))]
+
+
+# Define a function to merge the presence sites of a taxon with the survey sites where the taxon was absent
+def mergeSites(cover_sites, survey_sites):
+    # Survey sites that coincide with a presence site are removed from the absence sites
+    cover_x, cover_y = pointCoordinates(cover_sites)
+    survey_x, survey_y = pointCoordinates(survey_sites)
+    present = pd.MultiIndex.from_arrays([cover_x, cover_y])
+    absence_sites = survey_sites[~pd.MultiIndex.from_arrays([survey_x, survey_y]).isin(present)].copy()
+    # Absence sites are assigned a cover of 0 and the initial project of the site
+    absence_sites['cover'] = 0.0
+    absence_sites['project'] = absence_sites['initialProject']
+    absence_sites = absence_sites.drop(columns=absence_drop, errors='ignore')
+    presence_sites = cover_sites.drop(columns=presence_drop, errors='ignore')
+    return pd.concat([presence_sites, absence_sites], ignore_index=True)
+
+
+# Define a function to find the key of the merge grid cell of each point, with the grid snapped to the cells of the area of interest
+def cellKeys(x, y, transform, merge_distance):
+    # Anchor the merge grid at the lower left corner of the point extent snapped down to the grid of the area of interest
+    cell_width, cell_height = transform.a, -transform.e
+    origin_x = transform.c + np.floor((x.min() - transform.c) / cell_width) * cell_width
+    origin_y = transform.f + np.floor((y.min() - transform.f) / cell_height) * cell_height
+    column = np.floor((x - origin_x) / merge_distance).astype(np.int64)
+    row = np.floor((y - origin_y) / merge_distance).astype(np.int64)
+    # Combine the column and row into a single integer key
+    keys = (column << 32) | row
+    centers = (origin_x + (column + 0.5) * merge_distance, origin_y + (row + 0.5) * merge_distance)
+    return keys, centers
+
+
+# Define a function to average cover within merge grid cells and keep the site nearest to each cell center
+def meanCoverSites(merged_sites, transform, merge_distance):
+    x, y = pointCoordinates(merged_sites)
+    keys, (center_x, center_y) = cellKeys(x, y, transform, merge_distance)
+    cells, cell_index = np.unique(keys, return_inverse=True)
+    cell_index = cell_index.ravel()
+    # Calculate the mean cover of each cell and round to the nearest integer
+    cover = merged_sites['cover'].to_numpy(dtype=np.float64)
+    mean_cover = np.floor(np.bincount(cell_index, weights=cover, minlength=len(cells)) / np.bincount(cell_index, minlength=len(cells)) + 0.5)
+    # Find the site nearest to the center of each cell
+    cell_x = np.zeros(len(cells), dtype=np.float64)
+    cell_y = np.zeros(len(cells), dtype=np.float64)
+    cell_x[cell_index] = center_x
+    cell_y[cell_index] = center_y
+    nearest = cKDTree(np.column_stack([x, y])).query(np.column_stack([cell_x, cell_y]))[1]
+    # Keep the sites that are nearest to the center of their cell and assign the mean cover of the cell
+    keep = nearest[cell_index] == np.arange(len(merged_sites))
+    mean_cover_sites = merged_sites[keep].copy()
+    mean_cover_sites['cover'] = mean_cover[cell_index[keep]]
+    return mean_cover_sites.reset_index(drop=True)
+
+
+# Define a function to calculate the cover strata and cover thresholds
+def coverClasses(sites):
+    cover = sites['cover'].to_numpy(dtype=np.float64)
+    sites['strata'] = np.select([cover == 0, cover <= 10, cover <= 25], [0.0, 1.0, 2.0], 3.0)
+    sites['zero'] = (cover > 0).astype(np.float64)
+    sites['ten'] = (cover > 10).astype(np.float64)
+    sites['twentyfive'] = (cover > 25).astype(np.float64)
+    return sites
+
+
+# Define a function to format the cover data of multiple taxa with the survey sites read once
+def formatTaxa(cover_features, survey_sites, area_of_interest, merge_distance, predictor_rasters, output_csvs, output_features=None, site_cache=None):
+    if len(cover_features) != len(output_csvs):
+        raise ValueError(f'Number of cover features ({len(cover_features)}) does not match number of output csvs ({len(output_csvs)}).')
+    if output_features is not None and len(output_features) != len(cover_features):
+        raise ValueError(f'Number of output features ({len(output_features)}) does not match number of cover features ({len(cover_features)}).')
+    missing = [predictor for predictor in taxon_predictors if predictor not in [predictorName(predictor_raster) for predictor_raster in predictor_rasters]]
+    if len(missing) > 0:
+        raise ValueError(f'Predictor rasters are missing for {", ".join(missing)}.')
+    total_start = time.time()
+    # Read the survey sites once and select the sites within the area of interest
+    print('Reading survey sites...')
+    with rasterio.open(area_of_interest) as area_dataset:
+        transform = area_dataset.transform
+        all_sites = selectArea(geopandas.read_file(survey_sites), area_dataset)
+        # Sample all predictor rasters at all survey sites once
+        print('Sampling predictor rasters at survey sites...')
+        features = siteFeatures(all_sites, predictor_rasters, site_cache)
+        for count, (cover_feature, output_csv) in enumerate(zip(cover_features, output_csvs), 1):
+            iteration_start = time.time()
+            # Merge the presence and absence sites within the area of interest
+            cover_sites = selectArea(geopandas.read_file(cover_feature), area_dataset)
+            merged_sites = mergeSites(cover_sites, all_sites)
+            # Average cover within the merge distance and derive the cover strata and thresholds
+            mean_cover_sites = coverClasses(meanCoverSites(merged_sites, transform, merge_distance))
+            mean_cover_sites = joinFeatures(mean_cover_sites, features, predictor_rasters)
+            # Add coordinates to sites that do not have coordinate fields
+            x, y = pointCoordinates(mean_cover_sites)
+            for field, values in zip(['POINT_X', 'POINT_Y'], [x, y]):
+                if field not in mean_cover_sites.columns:
+                    mean_cover_sites[field] = values
+            if output_features is not None:
+                mean_cover_sites.to_file(output_features[count - 1])
+            mean_cover_sites[taxon_variables].to_csv(output_csv + '.partial', header=True, index=False, sep=',', encoding='utf-8')
+            os.replace(output_csv + '.partial', output_csv)
+            iteration_elapsed = int(time.time() - iteration_start)
+            print(f'\tFormatted taxon {count} of {len(cover_features)} ({os.path.basename(cover_feature)}: {len(cover_sites)} presences, {len(mean_cover_sites)} sites) in {datetime.timedelta(seconds=iteration_elapsed)}')
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Format foliar cover data of multiple taxa into training tables.')
+    parser.add_argument('--cover-features', nargs='+', required=True, help='Feature classes containing foliar cover values for a taxon or aggregate.')
+    parser.add_argument('--survey-sites', required=True, help='Feature class containing all surveyed sites.')
+    parser.add_argument('--area-of-interest', required=True, help='Raster that defines the extent, cell size, grid, and projection for the analysis.')
+    parser.add_argument('--merge-distance', type=float, required=True, help='Distance within which to merge and average nearby survey points.')
+    parser.add_argument('--predictor-rasters', nargs='+', required=True, help='Formatted predictor rasters named by predictor.')
+    parser.add_argument('--output-csvs', nargs='+', required=True, help='Output csv table of each cover feature.')
+    parser.add_argument('--output-features', nargs='+', default=None, help='Optional output feature class of mean cover sites for each cover feature.')
+    parser.add_argument('--site-cache', default=None, help='Optional csv in which the predictor values of the survey sites are cached between runs.')
+    return parser.parse_args()
+
+
+# Run the formatting when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    formatTaxa(arguments.cover_features,
+               arguments.survey_sites,
+               arguments.area_of_interest,
+               arguments.merge_distance,
+               arguments.predictor_rasters,
+               arguments.output_csvs,
+               output_features=arguments.output_features,
+               site_cache=arguments.site_cache)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Intermediate Cache
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_GeospatialProcessing folder in an Anaconda 3 installation or from an ArcPy script that adds the repository folder to the python path.
+# Description: "Intermediate Cache" stores the intermediate products of geoprocessing steps, such as the TauDEM rasters of the hydrologic predictors, in a content addressed cache folder. Each product is identified by a hash of the name of the step, the contents of its input files, and its parameters, so that a step is only run again when something upstream of it has changed. Cached products are copied back to the work folder on a hit, the total size of the cache is limited by evicting the least recently used products, and the number of hits and misses is reported.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and timing
+import datetime
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Define the default maximum size of the cache in gigabytes
+default_cache_gigabytes = 100
+
+# Define the extensions of the files that make up a shapefile
+shapefile_extensions = ['.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx', '.shp.xml']
+
+# Define the size in bytes of the chunks read when hashing files
+hash_chunk = 8 * 1024 * 1024
+
+
+# Define a function to list the files that make up a dataset, including the sidecar files of shapefiles
+def datasetFiles(dataset):
+    if dataset.lower().endswith('.shp'):
+        stem = dataset[:-4]
+        return [stem + extension for extension in shapefile_extensions if os.path.exists(stem + extension)]
+    if os.path.isdir(dataset):
+        return sorted(file for file in glob.glob(os.path.join(dataset, '**', '*'), recursive=True) if os.path.isfile(file))
+    return [dataset] if os.path.exists(dataset) else []
+
+
+# Define a function to find the path shared by the files of a dataset, to which the suffix of each file is appended
+def datasetStem(dataset):
+    return dataset[:-4] if dataset.lower().endswith('.shp') else dataset
+
+
+# Define a function to find the nearest existing path of a dataset, such as the geodatabase of a feature class
+def existingPath(dataset):
+    path = os.path.abspath(dataset)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            raise ValueError(f'Input {dataset} does not exist.')
+        path = parent
+    return path
+
+
+# Define a class to store intermediate geoprocessing products in a size limited content addressed cache
+class IntermediateCache:
+
+    def __init__(self, cache_folder=None, max_gigabytes=default_cache_gigabytes, message=print):
+        self.cache_folder = cache_folder
+        self.max_bytes = int(max_gigabytes * 1024 ** 3)
+        self.message = message
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0
+        self.digests = {}
+        self.index = {}
+        if cache_folder is not None:
+            if not os.path.exists(cache_folder):
+                os.makedirs(cache_folder)
+            self.index_file = os.path.join(cache_folder, 'index.json')
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r') as index_file:
+                    self.index = json.load(index_file)
+
+    # Define a function to hash the contents of the files of an input dataset, reusing the hashes of unchanged files
+    def inputDigest(self, dataset):
+        digest = hashlib.sha256()
+        path = existingPath(dataset)
+        digest.update(os.path.relpath(os.path.abspath(dataset), path).encode('utf-8'))
+        for file in datasetFiles(path):
+            status = os.stat(file)
+            identity = (os.path.abspath(file), status.st_size, status.st_mtime_ns)
+            if identity not in self.digests:
+                file_digest = hashlib.sha256()
+                with open(file, 'rb') as input_file:
+                    for chunk in iter(lambda: input_file.read(hash_chunk), b''):
+                        file_digest.update(chunk)
+                self.digests[identity] = file_digest.hexdigest()
+            digest.update(os.path.basename(file).encode('utf-8'))
+            digest.update(self.digests[identity].encode('utf-8'))
+        return digest.hexdigest()
+
+    # Define a function to create the key of a step from its name, inputs, and parameters
+    def stepKey(self, step, input_datasets, parameters):
+        key = {'step': step,
+               'inputs': [self.inputDigest(input_dataset) for input_dataset in input_datasets],
+               'parameters': parameters}
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    # Define a function to write the cache index
+    def writeIndex(self):
+        with open(self.index_file + '.partial', 'w') as index_file:
+            json.dump(self.index, index_file, indent=2)
+        os.replace(self.index_file + '.partial', self.index_file)
+
+    # Define a function to remove the least recently used products until the cache is within its maximum size
+    def evict(self, keep):
+        total_bytes = sum(entry['bytes'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda key: self.index[key]['last_used']):
+            if total_bytes <= self.max_bytes:
+                break
+            if key == keep and self.index[key]['bytes'] <= self.max_bytes:
+                continue
+            self.message(f'\tEvicting cached {self.index[key]["step"]} ({round(self.index[key]["bytes"] / 1024 ** 2)} MB)...')
+            shutil.rmtree(os.path.join(self.cache_folder, key), ignore_errors=True)
+            total_bytes -= self.index.pop(key)['bytes']
+
+    # Define a function to run a step or restore its output datasets from the cache
+    def run(self, step, input_datasets, parameters, output_datasets, runStep):
+        if self.cache_folder is None:
+            runStep()
+            return False
+        key = self.stepKey(step, input_datasets, parameters)
+        entry = self.index.get(key)
+        product_folder = os.path.join(self.cache_folder, key)
+        hit = entry is not None and len(entry['suffixes']) == len(output_datasets) and all(os.path.exists(os.path.join(product_folder, str(output), str(file)))
+                                                                                          for output, suffixes in enumerate(entry['suffixes']) for file in range(len(suffixes)))
+        if hit:
+            # Copy the cached files of each output dataset to the output name of this run
+            for output, (output_dataset, suffixes) in enumerate(zip(output_datasets, entry['suffixes'])):
+                stem = datasetStem(os.path.abspath(output_dataset))
+                for file, suffix in enumerate(suffixes):
+                    if not os.path.exists(os.path.dirname(stem + suffix)):
+                        os.makedirs(os.path.dirname(stem + suffix))
+                    shutil.copy2(os.path.join(product_folder, str(output), str(file)), stem + suffix)
+            entry['last_used'] = time.time()
+            self.hits += 1
+            self.saved_seconds += entry['seconds']
+            self.message(f'\tRestored {step} from cache (saved {datetime.timedelta(seconds=int(entry["seconds"]))}).')
+        else:
+            # Run the step and copy the files of each output dataset to the cache
+            step_start = time.time()
+            runStep()
+            step_seconds = time.time() - step_start
+            self.misses += 1
+            shutil.rmtree(product_folder, ignore_errors=True)
+            suffixes = []
+            for output, output_dataset in enumerate(output_datasets):
+                stem = datasetStem(os.path.abspath(output_dataset))
+                dataset_files = datasetFiles(os.path.abspath(output_dataset))
+                if len(dataset_files) == 0:
+                    raise ValueError(f'Output {output_dataset} of {step} was not created.')
+                os.makedirs(os.path.join(product_folder, str(output)))
+                for file, dataset_file in enumerate(dataset_files):
+                    shutil.copy2(dataset_file, os.path.join(product_folder, str(output), str(file)))
+                suffixes.append([os.path.abspath(dataset_file)[len(stem):] for dataset_file in dataset_files])
+            entry = {'step': step,
+                     'suffixes': suffixes,
+                     'bytes': sum(os.path.getsize(dataset_file) for output_dataset in output_datasets for dataset_file in datasetFiles(os.path.abspath(output_dataset))),
+                     'seconds': step_seconds,
+                     'last_used': time.time()}
+            self.index[key] = entry
+            self.message(f'\tCached {step} ({round(entry["bytes"] / 1024 ** 2)} MB).')
+        self.evict(key)
+        self.writeIndex()
+        return hit
+
+    # Define a function to report the hits and misses of the cache
+    def report(self):
+        if self.cache_folder is None:
+            return
+        total_bytes = sum(entry['bytes'] for entry in self.index.values())
+        self.message(f'Cache hits: {self.hits}, misses: {self.misses}, time saved: {datetime.timedelta(seconds=int(self.saved_seconds))}, cache size: {round(total_bytes / 1024 ** 3, 2)} of {round(self.max_bytes / 1024 ** 3, 2)} GB.')
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Prediction Mosaic
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.predictionMosaic --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Prediction Mosaic" performs the operations of "Convert Distribution-abundance Predictions to Rasters", the ArcGIS Pro "Mosaic to New Raster" tool, and the ArcGIS Pro "Post-process Distribution-abundance" tool in a single stage without intermediate rasters. A memory-mapped 8-bit signed scratch array covering the grid of the area of interest is allocated once, and the predictions of all watersheds are converted to positive integers (values less than 0 are set to 0 and values are rounded half up) and placed in their cells by workers that each write a disjoint set of watersheds. The scratch array is then extracted to the study area in square tiles across a pool of worker processes and written to a tiled and compressed 8-bit signed GeoTIFF with the projection of the area of interest and internal overviews.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+# Import geopandas and shapely for feature input
+import geopandas
+from shapely.geometry import box
+# Import rasterio for raster output and rasterization
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.features import rasterize
+from rasterio.windows import bounds as windowBounds
+from rasterio.windows import transform as windowTransform
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.predictionRasters import loadGrid
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import castInteger
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import gridTransform
+from package_GeospatialProcessing.rasterBlocks import roundHalfUp
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+# Import functions from the statistics package
+from package_Statistics.gridReference import cell_column
+from package_Statistics.variableSets import prediction
+
+# Define the data type and no data value of the output raster
+mosaic_dtype = 'int8'
+mosaic_nodata = -128
+
+# Define the study area geometries loaded once in each worker process
+worker_study_area = None
+
+
+# Define a function to convert predictions to positive integers as in "Post-process Distribution-abundance"
+def postProcess(values):
+    values = np.asarray(values, dtype=np.float64)
+    missing = ~np.isfinite(values)
+    return castInteger(roundHalfUp(np.maximum(values, 0)), missing, mosaic_dtype, mosaic_nodata)
+
+
+# Define a function to place the post-processed predictions of a set of watersheds in the scratch array
+def scatterPredictions(input_csvs, scratch_file, grid, value_column=prediction[0]):
+    scratch = np.load(scratch_file, mmap_mode='r+')
+    cells_written = 0
+    for input_csv in input_csvs:
+        header = list(pd.read_csv(input_csv, nrows=0).columns)
+        if cell_column in header:
+            input_data = pd.read_csv(input_csv, usecols=[cell_column, value_column])
+            cells = input_data[cell_column].to_numpy(dtype=np.int64)
+        else:
+            input_data = pd.read_csv(input_csv, usecols=['POINT_X', 'POINT_Y', value_column])
+            cells = grid.cellIndex(input_data['POINT_X'], input_data['POINT_Y']).astype(np.int64)
+        # The cells of each watershed are written by a single worker, so writes never overlap between workers
+        row, column = grid.cellRowColumn(cells)
+        scratch[row, column] = postProcess(input_data[value_column].to_numpy())
+        cells_written += len(cells)
+    scratch.flush()
+    del scratch
+    return cells_written
+
+
+# Define a function to load the study area geometries once when a worker process starts
+def initializeWorker(study_area, study_area_layer, crs):
+    global worker_study_area
+    if study_area is None:
+        worker_study_area = None
+        return
+    geometries = geopandas.read_file(study_area, layer=study_area_layer).geometry
+    if crs is not None and geometries.crs is not None:
+        geometries = geometries.to_crs(crs)
+    geometries = geometries.dropna()
+    worker_study_area = geometries[~geometries.is_empty].reset_index(drop=True)
+
+
+# Define a function to read a tile of the scratch array and extract it to the study area
+def extractTile(scratch_file, window, transform):
+    scratch = np.load(scratch_file, mmap_mode='r')
+    tile = np.array(scratch[window.row_off:window.row_off + window.height, window.col_off:window.col_off + window.width])
+    del scratch
+    if worker_study_area is not None and np.any(tile != mosaic_nodata):
+        # Cells with centers outside of the study area are no data
+        selection = worker_study_area.sindex.query(box(*windowBounds(window, transform)), predicate='intersects')
+        inside = np.zeros(tile.shape, dtype=np.uint8)
+        if len(selection) > 0:
+            inside = rasterize(worker_study_area.iloc[selection],
+                               out_shape=tile.shape,
+                               transform=windowTransform(window, transform),
+                               fill=0,
+                               default_value=1,
+                               dtype='uint8')
+        tile[inside == 0] = mosaic_nodata
+    return window, tile
+
+
+# Define a function to calculate the overview levels of a raster until the overview fits within a single block
+def overviewLevels(height, width, block_size=default_block_size):
+    levels = []
+    level = 2
+    while max(height, width) / level >= block_size:
+        levels.append(level)
+        level *= 2
+    return levels
+
+
+# Define a function to mosaic watershed predictions into a single post-processed raster on the grid of the area of interest
+def predictionMosaic(prediction_folder, grid_file, output_raster, study_area=None, study_area_layer=None, value_column=prediction[0],
+                     workers=None, block_size=default_block_size):
+    total_start = time.time()
+    grid = loadGrid(grid_file)
+    transform = gridTransform(grid)
+    input_csvs = sorted(os.path.join(prediction_folder, file) for file in os.listdir(prediction_folder)
+                        if file.endswith('.csv') and file != 'manifest.csv')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Allocate the memory-mapped scratch array filled with no data
+    print(f'Allocating a {grid.height} x {grid.width} scratch array...')
+    scratch_file = output_raster + '.scratch.npy'
+    scratch = np.lib.format.open_memmap(scratch_file, mode='w+', dtype=mosaic_dtype, shape=(grid.height, grid.width))
+    for window in blockWindows(grid.height, grid.width, block_size * 16):
+        scratch[window.row_off:window.row_off + window.height, window.col_off:window.col_off + window.width] = mosaic_nodata
+    scratch.flush()
+    del scratch
+    try:
+        # Place the predictions of each worker's disjoint set of watersheds in the scratch array, largest watersheds spread across workers
+        input_csvs = sorted(input_csvs, key=os.path.getsize, reverse=True)
+        print(f'Placing predictions of {len(input_csvs)} watersheds...')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            cells = sum(executor.map(scatterPredictions,
+                                     [input_csvs[worker::workers] for worker in range(workers)],
+                                     [scratch_file] * workers,
+                                     [grid] * workers,
+                                     [value_column] * workers))
+        print(f'\tPlaced {cells} cells')
+        # Extract the tiles to the study area in parallel and write them to the output raster
+        print('Extracting tiles to study area and writing output raster...')
+        profile = tiledProfile(grid.height, grid.width, transform, grid.crs, mosaic_dtype, mosaic_nodata, block_size)
+        windows = list(blockWindows(grid.height, grid.width, block_size))
+        with rasterio.open(output_raster + '.partial', 'w', **profile) as output_dataset:
+            with ProcessPoolExecutor(max_workers=workers, initializer=initializeWorker, initargs=(study_area, study_area_layer, grid.crs)) as executor:
+                for window, tile in executor.map(extractTile, [scratch_file] * len(windows), windows, [transform] * len(windows), chunksize=64):
+                    output_dataset.write(tile, 1, window=window)
+        # Build internal overviews
+        levels = overviewLevels(grid.height, grid.width, block_size)
+        if len(levels) > 0:
+            print(f'Building overviews at levels {levels}...')
+            with rasterio.open(output_raster + '.partial', 'r+') as output_dataset:
+                output_dataset.build_overviews(levels, Resampling.nearest)
+                output_dataset.update_tags(ns='rio_overview', resampling='nearest')
+        os.replace(output_raster + '.partial', output_raster)
+    finally:
+        os.remove(scratch_file)
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Mosaic and post-process watershed predictions into a single raster on the grid of the area of interest.')
+    parser.add_argument('--prediction-folder', required=True, help='Folder containing the watershed prediction csv tables.')
+    parser.add_argument('--grid', required=True, help='Grid reference json, a folder containing grid.json, or the area of interest raster.')
+    parser.add_argument('--output-raster', required=True, help='Output 8-bit signed GeoTIFF.')
+    parser.add_argument('--study-area', default=None, help='Optional polygon feature class that defines the area of valid statistical inference.')
+    parser.add_argument('--study-area-layer', default=None, help='Layer of the study area within a geodatabase or geopackage.')
+    parser.add_argument('--value-column', default=prediction[0], help='Column that is mosaicked (default: prediction).')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores).')
+    parser.add_argument('--block-size', type=int, default=default_block_size, help='Width and height in cells of the tiles of the output raster.')
+    return parser.parse_args()
+
+
+# Run the mosaic when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    predictionMosaic(arguments.prediction_folder,
+                     arguments.grid,
+                     arguments.output_raster,
+                     study_area=arguments.study_area,
+                     study_area_layer=arguments.study_area_layer,
+                     value_column=arguments.value_column,
+                     workers=arguments.workers,
+                     block_size=arguments.block_size)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Prediction Rasters
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.predictionRasters --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Prediction Rasters" performs the operations of "Convert Distribution-abundance Predictions to Rasters" and "Convert Outlier Predictions to Rasters" without inferring the grid from coordinates. Each watershed prediction table is placed on the grid reference of the area of interest by its cell index, or by the cells that contain its coordinates for tables without a cell index, and written as a tiled and compressed GeoTIFF that covers the cells of the watershed and is associated with the projection of the area of interest.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+# Import rasterio for raster input and output
+import rasterio
+from rasterio.windows import Window
+from rasterio.windows import transform as windowTransform
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import gridTransform
+from package_GeospatialProcessing.rasterBlocks import rasterGrid
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+# Import functions from the statistics package
+from package_Statistics.gridReference import cell_column
+from package_Statistics.gridReference import readGrid
+from package_Statistics.variableSets import prediction
+
+# Define the no data value of the output rasters
+default_nodata = -9999
+
+
+# Define a function to read a grid reference from a grid json file, a folder containing a grid json file, or a raster
+def loadGrid(grid_file):
+    if os.path.isdir(grid_file) or grid_file.endswith('.json'):
+        return readGrid(grid_file)
+    with rasterio.open(grid_file) as grid_dataset:
+        return rasterGrid(grid_dataset)
+
+
+# Define a function to convert a prediction table to a raster on the grid
+def predictionRaster(input_csv, output_raster, grid, value_column=prediction[0], nodata=default_nodata, block_size=default_block_size):
+    header = list(pd.read_csv(input_csv, nrows=0).columns)
+    if cell_column in header:
+        input_data = pd.read_csv(input_csv, usecols=[cell_column, value_column])
+        cells = input_data[cell_column].to_numpy()
+    else:
+        input_data = pd.read_csv(input_csv, usecols=['POINT_X', 'POINT_Y', value_column])
+        cells = grid.cellIndex(input_data['POINT_X'], input_data['POINT_Y'])
+    # Place the values in the window of the grid that bounds the cells of the watershed
+    values, (row_off, col_off) = grid.scatter(cells, input_data[value_column].to_numpy(dtype=np.float32), np.float32(nodata))
+    if values.size == 0:
+        return 0
+    transform = windowTransform(Window(col_off, row_off, values.shape[1], values.shape[0]), gridTransform(grid))
+    profile = tiledProfile(values.shape[0], values.shape[1], transform, grid.crs, 'float32', nodata, block_size)
+    with rasterio.open(output_raster + '.partial', 'w', **profile) as output_dataset:
+        output_dataset.write(values, 1)
+    os.replace(output_raster + '.partial', output_raster)
+    return len(cells)
+
+
+# Define a function to convert a folder of prediction tables to rasters in parallel
+def predictionRasters(prediction_folder, raster_folder, grid_file, value_column=prediction[0], workers=None):
+    if not os.path.exists(raster_folder):
+        os.makedirs(raster_folder)
+    total_start = time.time()
+    grid = loadGrid(grid_file)
+    # Skip watersheds with an existing raster so that interrupted runs can be restarted
+    watersheds = sorted(os.path.splitext(file)[0] for file in os.listdir(prediction_folder) if file.endswith('.csv') and file != 'manifest.csv')
+    remaining = [watershed for watershed in watersheds if not os.path.exists(os.path.join(raster_folder, watershed + '.tif'))]
+    print(f'Converting {len(remaining)} of {len(watersheds)} prediction tables to rasters...')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(predictionRaster,
+                                   os.path.join(prediction_folder, watershed + '.csv'),
+                                   os.path.join(raster_folder, watershed + '.tif'),
+                                   grid,
+                                   value_column)
+                   for watershed in remaining]
+        for count, (watershed, future) in enumerate(zip(remaining, futures), 1):
+            cells = future.result()
+            print(f'\tConverted watershed {count} of {len(remaining)} ({watershed}, {cells} cells)')
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Convert watershed prediction tables to rasters on the grid of the area of interest.')
+    parser.add_argument('--prediction-folder', required=True, help='Folder containing the watershed prediction csv tables.')
+    parser.add_argument('--raster-folder', required=True, help='Output folder for the prediction rasters.')
+    parser.add_argument('--grid', required=True, help='Grid reference json, a folder containing grid.json, or the area of interest raster.')
+    parser.add_argument('--value-column', default=prediction[0], help='Column that is converted to raster values (e.g., prediction or outlier).')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores).')
+    return parser.parse_args()
+
+
+# Run the conversion when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    predictionRasters(arguments.prediction_folder, arguments.raster_folder, arguments.grid, value_column=arguments.value_column, workers=arguments.workers)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Raster Blocks
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_GeospatialProcessing folder in an Anaconda 3 installation.
+# Description: "Raster Blocks" contains the shared functions used to read and write rasters in square blocks, to align rasters that share a grid, and to convert float values to the integer formats written by the ArcGIS Pro tools.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and data manipulation
+import math
+import os
+import numpy as np
+# Import rasterio for raster windows and transforms
+from affine import Affine
+from rasterio.windows import Window
+# Import modules for distance transforms from SciPy
+from scipy.ndimage import distance_transform_edt
+
+# Import the grid reference and variable sets from the statistics package
+from package_Statistics.gridReference import GridReference
+from package_Statistics.variableSets import predictor_all
+
+# Define the default block size and coarse block size in cells
+default_block_size = 256
+default_coarse_size = 64
+
+# Define the numpy data type and no data value of each ArcGIS Pro bit depth
+bit_depths = {'16_BIT_SIGNED': ('int16', -32768),
+              '16_BIT_UNSIGNED': ('uint16', 65535)}
+
+
+# Define a function to iterate through square blocks of a raster
+def blockWindows(height, width, block_size=default_block_size):
+    for row in range(0, height, block_size):
+        for column in range(0, width, block_size):
+            yield Window(column, row, min(block_size, width - column), min(block_size, height - row))
+
+
+# Define a function to expand a window by a halo of cells within the extent of a raster
+def haloWindow(window, halo, height, width):
+    row = max(0, window.row_off - halo)
+    column = max(0, window.col_off - halo)
+    outer = Window(column, row,
+                   min(width, window.col_off + window.width + halo) - column,
+                   min(height, window.row_off + window.height + halo) - row)
+    inner = (slice(window.row_off - row, window.row_off - row + window.height),
+             slice(window.col_off - column, window.col_off - column + window.width))
+    return outer, inner
+
+
+# Define a function to calculate an upper bound of the distance to the nearest marked coarse block for the cells of each coarse block, with infinity where no block is marked
+def coarseBounds(coarse, cell_size=(1, 1), coarse_size=default_coarse_size):
+    cell_width, cell_height = cell_size
+    if not coarse.any():
+        return np.full(coarse.shape, np.inf, dtype=np.float32)
+    # The distance between block centers plus the diagonal of a block bounds the distance between any cells of the blocks
+    return (distance_transform_edt(~coarse, sampling=(coarse_size * cell_height, coarse_size * cell_width))
+            + coarse_size * np.hypot(cell_width, cell_height)).astype(np.float32)
+
+
+# Define a function to find the largest distance bound of the coarse blocks that cover a window
+def windowBound(bounds, window, coarse_size=default_coarse_size):
+    return float(bounds[window.row_off // coarse_size:-(-(window.row_off + window.height) // coarse_size),
+                        window.col_off // coarse_size:-(-(window.col_off + window.width) // coarse_size)].max())
+
+
+# Define a function to list the windows of the marked coarse blocks that have a cell within a distance of a window
+def nearbyBlocks(coarse, window, bound, height, width, cell_size=(1, 1), coarse_size=default_coarse_size):
+    cell_width, cell_height = cell_size
+    reach_rows, reach_columns = int(np.ceil(bound / cell_height)), int(np.ceil(bound / cell_width))
+    first_row = max(0, (window.row_off - reach_rows) // coarse_size)
+    first_column = max(0, (window.col_off - reach_columns) // coarse_size)
+    block_rows, block_columns = np.nonzero(coarse[first_row:(window.row_off + window.height + reach_rows) // coarse_size + 1,
+                                                  first_column:(window.col_off + window.width + reach_columns) // coarse_size + 1])
+    block_rows += first_row
+    block_columns += first_column
+    # Measure the gap in cells between the window and each block
+    row_gap = np.maximum(0, np.maximum(block_rows * coarse_size - (window.row_off + window.height - 1),
+                                       window.row_off - ((block_rows + 1) * coarse_size - 1)))
+    column_gap = np.maximum(0, np.maximum(block_columns * coarse_size - (window.col_off + window.width - 1),
+                                          window.col_off - ((block_columns + 1) * coarse_size - 1)))
+    selected = np.hypot(row_gap * cell_height, column_gap * cell_width) <= bound
+    return [Window(column * coarse_size, row * coarse_size, min(coarse_size, width - column * coarse_size), min(coarse_size, height - row * coarse_size))
+            for row, column in zip(block_rows[selected], block_columns[selected])]
+
+
+# Define a function to find the marked cells of a window, read with a halo of one cell, that border an unmarked cell, treating cells outside of the raster as marked
+def borderCells(marked, inner):
+    padded = np.ones((marked.shape[0] + 2, marked.shape[1] + 2), dtype=bool)
+    padded[1:-1, 1:-1] = marked
+    border = padded[1:-1, 1:-1] & ~(padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:])
+    return border[inner]
+
+
+# Define a function to find the row and column offsets of a grid origin within a raster on the same grid
+def gridOffset(transform, dataset, name='reference'):
+    column, row = ~dataset.transform * (transform.c, transform.f)
+    if not (math.isclose(column, round(column), abs_tol=1e-3) and math.isclose(row, round(row), abs_tol=1e-3)):
+        raise ValueError(f'Grid of {dataset.name} is not aligned with the grid of {name}.')
+    return int(round(row)), int(round(column))
+
+
+# Define a function to find the row and column offsets of a reference raster within an aligned raster
+def alignedOffset(reference, dataset):
+    # The rasters must share a cell size and projection
+    if not np.allclose(reference.res, dataset.res):
+        raise ValueError(f'Cell size {dataset.res} of {dataset.name} does not match cell size {reference.res} of {reference.name}.')
+    if reference.crs is not None and dataset.crs is not None and reference.crs != dataset.crs:
+        raise ValueError(f'Projection of {dataset.name} does not match the projection of {reference.name}.')
+    # The upper left corner of the reference raster must fall on a cell corner of the raster
+    row, column = gridOffset(reference.transform, dataset, reference.name)
+    # The raster must cover the full extent of the reference raster
+    if column < 0 or row < 0 or column + reference.width > dataset.width or row + reference.height > dataset.height:
+        raise ValueError(f'Extent of {dataset.name} does not cover the extent of {reference.name}.')
+    return row, column
+
+
+# Define a function to shift a block window of a reference raster to the matching window of an aligned raster
+def shiftWindow(window, offset):
+    row, column = offset
+    return Window(window.col_off + column, window.row_off + row, window.width, window.height)
+
+
+# Define a function to create the profile of a tiled and compressed output raster
+def tiledProfile(height, width, transform, crs, dtype, nodata, block_size=default_block_size):
+    if block_size % 16 != 0:
+        raise ValueError(f'Block size must be a multiple of 16 for tiled outputs but was {block_size}.')
+    return {'driver': 'GTiff',
+            'width': width,
+            'height': height,
+            'count': 1,
+            'dtype': dtype,
+            'crs': crs,
+            'transform': transform,
+            'nodata': nodata,
+            'tiled': True,
+            'blockxsize': block_size,
+            'blockysize': block_size,
+            'compress': 'deflate',
+            'predictor': 3 if np.issubdtype(np.dtype(dtype), np.floating) else 2,
+            'BIGTIFF': 'IF_SAFER'}
+
+
+# Define a function to round values half up to integers as Int(RoundDown(x + 0.5)) in ArcGIS Pro
+def roundHalfUp(values, scaling_factor=1):
+    values = np.asarray(values, dtype=np.float64) * scaling_factor
+    values += 0.5
+    return np.floor(values, out=values)
+
+
+# Define a function to cast integer values to an output data type with no data for missing values
+def castInteger(values, missing, dtype, nodata):
+    dtype = np.dtype(dtype)
+    # Clip values to the range of the data type, excluding the no data value
+    information = np.iinfo(dtype)
+    minimum = information.min + 1 if nodata == information.min else information.min
+    maximum = information.max - 1 if nodata == information.max else information.max
+    output = np.clip(np.nan_to_num(values, nan=0), minimum, maximum).astype(dtype)
+    output[missing] = nodata
+    return output
+
+
+# Define a function to sample the values of a raster at points, grouping the points by the internal blocks of the raster so that each block is read once, with nan for no data and points outside of the raster
+def samplePoints(dataset, x, y, band=1):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    column, row = ~dataset.transform * (x, y)
+    row = np.floor(row).astype(np.int64)
+    column = np.floor(column).astype(np.int64)
+    inside = np.nonzero((row >= 0) & (row < dataset.height) & (column >= 0) & (column < dataset.width))[0]
+    values = np.full(x.shape, np.nan, dtype=np.float64)
+    if len(inside) == 0:
+        return values
+    # Group the points by the block of the raster in which they fall
+    block_height, block_width = dataset.block_shapes[band - 1]
+    block_columns = -(-dataset.width // block_width)
+    block_keys = (row[inside] // block_height) * block_columns + column[inside] // block_width
+    order = np.argsort(block_keys, kind='stable')
+    inside = inside[order]
+    block_keys, starts = np.unique(block_keys[order], return_index=True)
+    for block_key, points in zip(block_keys, np.split(inside, starts[1:])):
+        # Read the block once and look up the values of all points within it
+        row_off = int(block_key // block_columns) * block_height
+        col_off = int(block_key % block_columns) * block_width
+        window = Window(col_off, row_off, min(block_width, dataset.width - col_off), min(block_height, dataset.height - row_off))
+        block = dataset.read(band, window=window, masked=True)
+        values[points] = block[row[points] - row_off, column[points] - col_off].astype(np.float64).filled(np.nan)
+    return values
+
+
+# Define a function to list the predictor rasters in the order of the predictor variables
+def predictorFiles(predictors_folder, predictors=predictor_all):
+    predictor_files = [os.path.join(predictors_folder, predictor + '.tif') for predictor in predictors]
+    missing = [predictor_file for predictor_file in predictor_files if not os.path.exists(predictor_file)]
+    if len(missing) > 0:
+        raise ValueError(f'{len(missing)} predictor rasters do not exist, e.g., {missing[0]}.')
+    return predictor_files
+
+
+# Define a function to create the grid reference of a raster
+def rasterGrid(dataset):
+    transform = dataset.transform
+    if transform.b != 0 or transform.d != 0:
+        raise ValueError(f'Grid of {dataset.name} is rotated and cannot be used as a grid reference.')
+    return GridReference(transform.c, transform.f, transform.a, -transform.e, dataset.height, dataset.width,
+                         dataset.crs.to_wkt() if dataset.crs is not None else None)
+
+
+# Define a function to create the transform of a grid reference
+def gridTransform(grid):
+    return Affine(grid.cell_width, 0, grid.origin_x, 0, -grid.cell_height, grid.origin_y)
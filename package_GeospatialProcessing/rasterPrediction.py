@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Raster Prediction
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.rasterPrediction --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Raster Prediction" applies the trained classifiers and regressors of one or more species directly to the predictor rasters without converting watersheds to point grids, extracting features to points, or converting the predicted points back to rasters. The area of interest raster (or a watershed raster on the same grid) is read in square blocks, the cells of each block that are not no data in the area of interest are flattened into a feature matrix read from the aligned windows of the predictor rasters, and the composite distribution-abundance prediction of each species is written into the matching block of a tiled float GeoTIFF. Predictor cells that are no data are passed to the models as missing values, as in the extracted point tables. Outputs are written to a partial file and renamed on completion, so existing outputs are complete and are skipped when an interrupted run is restarted. The models can optionally be converted once to compiled tree ensembles that predict the feature matrices directly.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and timing
+import argparse
+import datetime
+import os
+import time
+import numpy as np
+# Import rasterio for raster input and output
+import rasterio
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import alignedOffset
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import predictorFiles
+from package_GeospatialProcessing.rasterBlocks import shiftWindow
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+
+# Import functions from the statistics package
+from package_Statistics.modelFiles import loadModels
+from package_Statistics.predictWatersheds import engines
+from package_Statistics.predictWatersheds import speciesFolders
+from package_Statistics.streamingPrediction import compileModels
+from package_Statistics.streamingPrediction import featureMatrix
+from package_Statistics.streamingPrediction import memoryLabel
+from package_Statistics.streamingPrediction import peakMemory
+from package_Statistics.streamingPrediction import predictSpecies
+from package_Statistics.variableSets import predictor_all
+
+# Define the no data value of the output rasters
+default_nodata = -9999
+
+
+# Define a function to read the valid cells of a block from the predictor rasters into a feature matrix
+def readFeatures(datasets, offsets, window, valid):
+    features = np.empty((int(np.count_nonzero(valid)), len(datasets)), dtype=np.float32)
+    for index, (dataset, offset) in enumerate(zip(datasets, offsets)):
+        # Read the window of the predictor raster that is aligned with the block
+        band = dataset.read(1, window=shiftWindow(window, offset), masked=True)
+        features[:, index] = band.data[valid]
+        # Set no data cells to missing values
+        features[np.ma.getmaskarray(band)[valid], index] = np.nan
+    return features
+
+
+# Define a function to predict distribution-abundance for one or more species within an area of interest raster in blocks
+def predictRaster(area_of_interest, predictor_files, output_files, models, block_size=default_block_size, predictors=predictor_all, threads=1, nodata=default_nodata):
+    with rasterio.open(area_of_interest) as area_dataset:
+        datasets = [rasterio.open(predictor_file) for predictor_file in predictor_files]
+        try:
+            offsets = [alignedOffset(area_dataset, dataset) for dataset in datasets]
+            # Open a partial output raster for each species output that has not been completed
+            profile = tiledProfile(area_dataset.height, area_dataset.width, area_dataset.transform, area_dataset.crs, 'float32', nodata, block_size)
+            writers = [rasterio.open(output_file + '.partial', 'w', **profile) if output_file is not None else None
+                       for output_file in output_files]
+            cells = 0
+            for window in blockWindows(area_dataset.height, area_dataset.width, block_size):
+                # Identify the cells of the block within the area of interest
+                valid = area_dataset.read_masks(1, window=window) > 0
+                output_block = np.full((window.height, window.width), nodata, dtype=np.float32)
+                if valid.any():
+                    # Create a feature matrix shared by all species for the valid cells of the block
+                    feature_matrix = featureMatrix(readFeatures(datasets, offsets, window, valid), predictors, models, threads)
+                    cells += int(np.count_nonzero(valid))
+                # Predict each species and write the block to the output
+                for writer, species_models in zip(writers, models):
+                    if writer is not None:
+                        if valid.any():
+                            output_block[valid] = predictSpecies(feature_matrix, species_models, threads)['prediction'].to_numpy()
+                        writer.write(output_block, 1, window=window)
+            # Close and rename the completed outputs
+            for writer, output_file in zip(writers, output_files):
+                if writer is not None:
+                    writer.close()
+                    os.replace(output_file + '.partial', output_file)
+        finally:
+            for dataset in datasets:
+                dataset.close()
+    return cells
+
+
+# Define a function to identify the output rasters of an area of interest that have not been completed
+def pendingRasters(area_of_interest, prediction_folders):
+    # Outputs are only renamed to the final file name after they are completely written
+    name = os.path.splitext(os.path.basename(area_of_interest))[0]
+    output_files = [os.path.join(prediction_folder, name + '.tif') for prediction_folder in prediction_folders]
+    return [None if os.path.exists(output_file) else output_file for output_file in output_files]
+
+
+# Define a function to predict one or more area of interest rasters for one or more species
+def rasterPredictions(model_folders, predictors_folder, area_rasters, prediction_folders, block_size=default_block_size, threads=1, engine='xgboost'):
+    if engine not in engines:
+        raise ValueError(f'Engine must be one of {engines}.')
+    # Accept a single model folder, area of interest raster, and prediction folder
+    if isinstance(model_folders, str):
+        model_folders = [model_folders]
+    if isinstance(area_rasters, str):
+        area_rasters = [area_rasters]
+    if isinstance(prediction_folders, str):
+        prediction_folders = [prediction_folders]
+    prediction_folders = speciesFolders(model_folders, prediction_folders)
+    # Create the prediction folders if they do not exist
+    for prediction_folder in prediction_folders:
+        if not os.path.exists(prediction_folder):
+            os.makedirs(prediction_folder)
+    predictor_files = predictorFiles(predictors_folder)
+    models = [loadModels(model_folder, n_jobs=threads) for model_folder in model_folders]
+    # Convert the models to compiled tree ensembles once
+    if engine == 'ensemble':
+        models = compileModels(models)
+    # Skip area of interest rasters that have already been completed for all species
+    pending = {area_raster: pendingRasters(area_raster, prediction_folders) for area_raster in area_rasters}
+    remaining = [area_raster for area_raster in area_rasters if any(output_file is not None for output_file in pending[area_raster])]
+    print(f'Skipping {len(area_rasters) - len(remaining)} completed rasters; predicting {len(remaining)} of {len(area_rasters)} for {len(model_folders)} species...')
+    total_start = time.time()
+    count = 1
+    for area_raster in remaining:
+        iteration_start = time.time()
+        cells = predictRaster(area_raster, predictor_files, pending[area_raster], models, block_size=block_size, threads=threads)
+        iteration_elapsed = int(time.time() - iteration_start)
+        print(f'\tPredicted raster {count} of {len(remaining)} ({os.path.basename(area_raster)}, {cells} cells) in {datetime.timedelta(seconds=iteration_elapsed)} (Process lifetime peak memory: {memoryLabel(peakMemory())})')
+        count += 1
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Predict distribution-abundance directly from the predictor rasters in blocks.')
+    parser.add_argument('--model-folder', '--model-folders', dest='model_folders', nargs='+', required=True,
+                        help='One or more folders containing classifier.joblib, regressor.joblib, and threshold.txt.')
+    parser.add_argument('--predictors-folder', required=True, help='Folder containing one GeoTIFF per predictor variable named after the variable.')
+    parser.add_argument('--area-of-interest', nargs='+', required=True,
+                        help='One or more area of interest or watershed rasters on the grid of the predictor rasters.')
+    parser.add_argument('--prediction-folder', '--prediction-folders', dest='prediction_folders', nargs='+', required=True,
+                        help='One output folder per model folder, or a single root folder with one subfolder per species.')
+    parser.add_argument('--block-size', type=int, default=default_block_size, help='Width and height in cells of the blocks read and written at one time.')
+    parser.add_argument('--threads', type=int, default=1, help='Number of XGBoost threads.')
+    parser.add_argument('--engine', choices=engines, default='xgboost', help='Predict with XGBoost or with the models converted to compiled tree ensembles.')
+    return parser.parse_args()
+
+
+# Run the predictions when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    rasterPredictions(arguments.model_folders,
+                      arguments.predictors_folder,
+                      arguments.area_of_interest,
+                      arguments.prediction_folders,
+                      block_size=arguments.block_size,
+                      threads=arguments.threads,
+                      engine=arguments.engine)
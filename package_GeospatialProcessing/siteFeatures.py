@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Site Features
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_GeospatialProcessing folder in an Anaconda 3 installation.
+# Description: "Site Features" samples the values of all predictor rasters at all survey sites once and stores them in a site feature cache that is shared by the training tables of all taxa. Each site is identified by its site ID and coordinates, and each predictor is identified by a fingerprint of the name, size, and modification time of its raster, so that only new or moved sites and changed predictors are sampled when the cache is reused. The values of the sites of each taxon are then joined from the cache instead of being extracted from the predictor rasters.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and data manipulation
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+# Import rasterio for raster input
+import rasterio
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import samplePoints
+
+# Define the fields that identify a site in the site feature cache
+site_keys = ['siteID', 'site_x', 'site_y']
+
+
+# Define a function to read the name of the predictor of a predictor raster
+def predictorName(predictor_raster):
+    return os.path.splitext(os.path.basename(predictor_raster))[0]
+
+
+# Define a function to fingerprint a predictor raster by its name, size, and modification time
+def predictorFingerprint(predictor_raster):
+    status = os.stat(predictor_raster)
+    return hashlib.sha1(f'{os.path.basename(predictor_raster)}|{status.st_size}|{status.st_mtime_ns}'.encode('utf-8')).hexdigest()
+
+
+# Define a function to create the site keys of point features
+def siteKeys(sites):
+    return pd.DataFrame({'siteID': sites['siteID'].astype(str).to_numpy(),
+                         'site_x': sites.geometry.x.to_numpy(),
+                         'site_y': sites.geometry.y.to_numpy()})
+
+
+# Define a function to read a site feature cache and the fingerprints of its predictors
+def readCache(cache_file):
+    if cache_file is None or not os.path.exists(cache_file) or not os.path.exists(cache_file + '.json'):
+        return None, {}
+    with open(cache_file + '.json', 'r') as fingerprint_file:
+        fingerprints = json.load(fingerprint_file)
+    cache = pd.read_csv(cache_file, dtype={'siteID': str}, float_precision='round_trip').set_index(site_keys)
+    return cache, fingerprints
+
+
+# Define a function to write a site feature cache and the fingerprints of its predictors
+def writeCache(features, fingerprints, cache_file):
+    features.reset_index().to_csv(cache_file + '.partial', header=True, index=False, sep=',', encoding='utf-8')
+    with open(cache_file + '.json.partial', 'w') as fingerprint_file:
+        json.dump(fingerprints, fingerprint_file, indent=2)
+    os.replace(cache_file + '.partial', cache_file)
+    os.replace(cache_file + '.json.partial', cache_file + '.json')
+
+
+# Define a function to sample all predictor rasters at sites, reusing the values of unchanged sites and predictors from a cache
+def siteFeatures(sites, predictor_rasters, cache_file=None):
+    keys = siteKeys(sites).drop_duplicates(ignore_index=True)
+    index = pd.MultiIndex.from_frame(keys)
+    cache, cached_fingerprints = readCache(cache_file)
+    reuse = index.isin(cache.index) if cache is not None else np.zeros(len(index), dtype=bool)
+    features = pd.DataFrame(index=index)
+    fingerprints = {}
+    sampled = 0
+    for predictor_raster in predictor_rasters:
+        predictor = predictorName(predictor_raster)
+        fingerprints[predictor] = predictorFingerprint(predictor_raster)
+        values = np.full(len(index), np.nan, dtype=np.float64)
+        # Reuse cached values when the predictor raster has not changed
+        if cache is not None and predictor in cache.columns and cached_fingerprints.get(predictor) == fingerprints[predictor]:
+            values[reuse] = cache.loc[index[reuse], predictor].to_numpy(dtype=np.float64)
+            stale = ~reuse
+        else:
+            stale = np.ones(len(index), dtype=bool)
+        # Sample the predictor raster at the sites that are not cached
+        if stale.any():
+            with rasterio.open(predictor_raster) as predictor_dataset:
+                values[stale] = samplePoints(predictor_dataset, keys['site_x'].to_numpy()[stale], keys['site_y'].to_numpy()[stale])
+            sampled += 1
+        features[predictor] = values
+    print(f'\tSampled {sampled} of {len(predictor_rasters)} predictors at {len(index)} sites ({np.count_nonzero(reuse)} sites cached)')
+    if cache_file is not None:
+        writeCache(features, fingerprints, cache_file)
+    return features
+
+
+# Define a function to join the predictor values of sites from the site features, sampling any sites that are not in the site features
+def joinFeatures(sites, features, predictor_rasters):
+    index = pd.MultiIndex.from_frame(siteKeys(sites))
+    missing = ~index.isin(features.index)
+    if missing.any():
+        features = pd.concat([features, siteFeatures(sites[missing], predictor_rasters)])
+    values = features.loc[index, [predictorName(predictor_raster) for predictor_raster in predictor_rasters]]
+    sites = sites.copy()
+    for predictor in values.columns:
+        sites[predictor] = values[predictor].to_numpy()
+    return sites
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Watershed Grids
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_GeospatialProcessing.watershedGrids --help) or imported from the package_GeospatialProcessing folder.
+# Description: "Watershed Grids" performs the operations of the ArcGIS Pro "Prepare Watershed Units" tool and of "Extract Features to Points" without arcpy, point shapefiles, or csv tables. All watershed polygons are rasterized in a single pass onto the grid of the area of interest as a label raster with one label per watershed code, using the cell center rule of Polygon to Raster. The cells of each watershed are then written to a compact binary cell index, in which each watershed is a contiguous run of 32-bit integer cell indices (row times width plus column) of the grid reference of the area of interest in row-major order. Bands of rows are counted and written across a pool of worker processes, and each band writes its cells to precomputed positions so that no two workers write to the same part of the index. Predictor values are extracted from the aligned predictor rasters to the cells of each watershed in the index and written as columnar binary watershed tables, located by the cell index instead of coordinates, that "Predict Watersheds" reads directly.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+# Import geopandas and shapely for feature input
+import geopandas
+from shapely.geometry import box
+# Import rasterio for raster input, output, and rasterization
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import Window
+from rasterio.windows import bounds as windowBounds
+from rasterio.windows import transform as windowTransform
+
+# Import functions from the geospatial processing package
+from package_GeospatialProcessing.rasterBlocks import blockWindows
+from package_GeospatialProcessing.rasterBlocks import default_block_size
+from package_GeospatialProcessing.rasterBlocks import gridOffset
+from package_GeospatialProcessing.rasterBlocks import gridTransform
+from package_GeospatialProcessing.rasterBlocks import predictorFiles
+from package_GeospatialProcessing.rasterBlocks import rasterGrid
+from package_GeospatialProcessing.rasterBlocks import tiledProfile
+# Import functions from the statistics package
+from package_Statistics.gridReference import cell_column
+from package_Statistics.gridReference import cell_dtype
+from package_Statistics.gridReference import gridFromDict
+from package_Statistics.gridReference import grid_name
+from package_Statistics.variableSets import cell_index
+from package_Statistics.variableSets import predictor_all
+from package_Statistics.watershedTables import defineSchema
+from package_Statistics.watershedTables import table_alignment
+from package_Statistics.watershedTables import table_extension
+from package_Statistics.watershedTables import writeTable
+
+# Define the file format constants of the cell index
+index_extension = '.wci'
+index_magic = b'WSINDEX1'
+
+# Define the default number of rows in each band of the label raster that is indexed by a worker
+default_band_rows = 1024
+
+
+# Define a function to rasterize watershed polygons onto the grid of the area of interest as a label raster
+def labelWatersheds(watersheds, area_of_interest, label_raster, field='HUC10', layer=None, block_size=default_block_size):
+    with rasterio.open(area_of_interest) as area_dataset:
+        height, width = area_dataset.height, area_dataset.width
+        transform, crs = area_dataset.transform, area_dataset.crs
+        # Assign a label from 1 to each watershed code in sorted order, dissolving features that share a code
+        features = geopandas.read_file(watersheds, layer=layer)
+        if crs is not None and features.crs is not None:
+            features = features.to_crs(crs)
+        features = features[~features.geometry.is_empty & features.geometry.notna()].reset_index(drop=True)
+        codes = sorted(features[field].astype(str).unique())
+        labels = features[field].astype(str).map({code: label for label, code in enumerate(codes, 1)}).to_numpy(dtype=np.uint32)
+        geometries = features.geometry
+        spatial_index = geometries.sindex
+        profile = tiledProfile(height, width, transform, crs, 'uint32', 0, block_size)
+        with rasterio.open(label_raster + '.partial', 'w', **profile) as label_dataset:
+            for window in blockWindows(height, width, block_size):
+                # Rasterize the watersheds that intersect the block within the cells with data in the area of interest
+                block = np.zeros((window.height, window.width), dtype=np.uint32)
+                selection = spatial_index.query(box(*windowBounds(window, transform)), predicate='intersects')
+                if len(selection) > 0:
+                    block = rasterize(zip(geometries.iloc[selection], labels[selection].tolist()),
+                                      out_shape=block.shape,
+                                      transform=windowTransform(window, transform),
+                                      fill=0,
+                                      all_touched=False,
+                                      dtype='uint32')
+                    block[area_dataset.read_masks(1, window=window) == 0] = 0
+                label_dataset.write(block, 1, window=window)
+    os.replace(label_raster + '.partial', label_raster)
+    return codes
+
+
+# Define a function to count the cells of each watershed in a band of rows of the label raster
+def bandCounts(label_raster, row_off, band_rows, watershed_count):
+    with rasterio.open(label_raster) as label_dataset:
+        labels = label_dataset.read(1, window=Window(0, row_off, label_dataset.width, min(band_rows, label_dataset.height - row_off)))
+    return np.bincount(labels.ravel(), minlength=watershed_count + 1)[1:watershed_count + 1]
+
+
+# Define a function to write the cells of each watershed in a band of rows to their positions in the cell index
+def bandCells(label_raster, row_off, band_rows, index_file, data_start, cell_count, positions):
+    with rasterio.open(label_raster) as label_dataset:
+        width = label_dataset.width
+        labels = label_dataset.read(1, window=Window(0, row_off, width, min(band_rows, label_dataset.height - row_off))).ravel()
+    cells = np.flatnonzero(labels)
+    if len(cells) == 0:
+        return 0
+    # Sort the cells by watershed, keeping row-major order within each watershed
+    order = np.argsort(labels[cells], kind='stable')
+    cells = cells[order]
+    cell_labels = labels[cells].astype(np.int64)
+    # Place each cell after the cells of the same watershed in the preceding bands
+    first = np.searchsorted(cell_labels, cell_labels, side='left')
+    destination = positions[cell_labels - 1] + np.arange(len(cells)) - first
+    index = np.memmap(index_file, dtype=cell_dtype, mode='r+', offset=data_start, shape=(cell_count,))
+    index[destination] = (cells + row_off * width).astype(cell_dtype)
+    index.flush()
+    del index
+    return len(cells)
+
+
+# Define a function to write the header of a cell index and allocate its data block
+def allocateIndex(index_file, header, cell_count):
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(index_magic) + 8 + len(header_bytes)) // table_alignment) * table_alignment
+    with open(index_file, 'wb') as index:
+        index.write(index_magic)
+        index.write(struct.pack('<Q', len(header_bytes)))
+        index.write(header_bytes)
+        index.truncate(data_start + cell_count * np.dtype(cell_dtype).itemsize)
+    return data_start
+
+
+# Define a function to index the cells of each watershed in a label raster across a pool of worker processes
+def indexWatersheds(label_raster, codes, index_file, workers=None, band_rows=default_band_rows):
+    with rasterio.open(label_raster) as label_dataset:
+        height = label_dataset.height
+        grid = rasterGrid(label_dataset)
+    band_offsets = list(range(0, height, band_rows))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Count the cells of each watershed in each band
+        band_counts = np.array(list(executor.map(bandCounts,
+                                                 [label_raster] * len(band_offsets),
+                                                 band_offsets,
+                                                 [band_rows] * len(band_offsets),
+                                                 [len(codes)] * len(band_offsets))), dtype=np.int64).reshape(len(band_offsets), len(codes))
+        # Calculate the offset of each watershed in the index and of each band within each watershed
+        counts = band_counts.sum(axis=0)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        band_positions = offsets + np.cumsum(band_counts, axis=0) - band_counts
+        header = {'watersheds': codes,
+                  'counts': counts.tolist(),
+                  'offsets': offsets.tolist(),
+                  'grid': grid.toDict()}
+        cell_count = int(counts.sum())
+        data_start = allocateIndex(index_file + '.partial', header, cell_count)
+        # Write the cells of each band to disjoint positions in the index
+        list(executor.map(bandCells,
+                          [label_raster] * len(band_offsets),
+                          band_offsets,
+                          [band_rows] * len(band_offsets),
+                          [index_file + '.partial'] * len(band_offsets),
+                          [data_start] * len(band_offsets),
+                          [cell_count] * len(band_offsets),
+                          list(band_positions)))
+    os.replace(index_file + '.partial', index_file)
+    return header
+
+
+# Define a function to read the header of a cell index
+def readIndexHeader(index_file):
+    with open(index_file, 'rb') as index:
+        if index.read(len(index_magic)) != index_magic:
+            raise ValueError(f'{index_file} is not a watershed cell index.')
+        header_length = struct.unpack('<Q', index.read(8))[0]
+        header = json.loads(index.read(header_length).decode('utf-8'))
+    header['data_start'] = -(-(len(index_magic) + 8 + header_length) // table_alignment) * table_alignment
+    return header
+
+
+# Define a function to read the cell numbers of a watershed from a cell index as a read-only memory-mapped array
+def watershedCells(index_file, watershed, header=None):
+    if header is None:
+        header = readIndexHeader(index_file)
+    if watershed not in header['watersheds']:
+        raise KeyError(f'{index_file} does not contain watershed {watershed}.')
+    position = header['watersheds'].index(watershed)
+    count = header['counts'][position]
+    if count == 0:
+        return np.empty(0, dtype=cell_dtype)
+    return np.memmap(index_file,
+                     dtype=cell_dtype,
+                     mode='r',
+                     offset=header['data_start'] + header['offsets'][position] * np.dtype(cell_dtype).itemsize,
+                     shape=(count,))
+
+
+# Define a function to extract predictor values to the cells of a watershed and write a watershed table
+def extractWatershed(index_file, watershed, predictor_files, output_file, predictors=predictor_all):
+    header = readIndexHeader(index_file)
+    grid = gridFromDict(header['grid'])
+    cells = np.asarray(watershedCells(index_file, watershed, header))
+    row, column = grid.cellRowColumn(cells)
+    transform = gridTransform(grid)
+    columns = {}
+    missing = np.zeros(len(cells), dtype=bool)
+    if len(cells) > 0:
+        # Read the window of each predictor raster that bounds the watershed
+        window = Window(int(column.min()), int(row.min()), int(column.max() - column.min()) + 1, int(row.max() - row.min()) + 1)
+        for predictor, predictor_file in zip(predictors, predictor_files):
+            with rasterio.open(predictor_file) as predictor_dataset:
+                if not np.allclose(predictor_dataset.res, (transform.a, -transform.e)):
+                    raise ValueError(f'Cell size {predictor_dataset.res} of {predictor_file} does not match the cell size of {index_file}.')
+                row_offset, column_offset = gridOffset(transform, predictor_dataset, index_file)
+                band = predictor_dataset.read(1, window=Window(window.col_off + column_offset, window.row_off + row_offset, window.width, window.height),
+                                              masked=True, boundless=True)
+            values = band[row - window.row_off, column - window.col_off]
+            missing |= np.ma.getmaskarray(values)
+            columns[predictor] = values.data
+    # Remove cells with no data in any predictor, which cannot be stored as integers
+    for predictor in predictors:
+        columns[predictor] = columns[predictor][~missing] if len(cells) > 0 else np.empty(0, dtype=np.int16)
+    columns[cell_column] = cells[~missing]
+    writeTable(columns, defineSchema(predictors, cell_index), output_file, grid)
+    return len(cells) - int(np.count_nonzero(missing)), int(np.count_nonzero(missing))
+
+
+# Define a function to extract predictor values to all watersheds in a cell index across a pool of worker processes
+def extractWatersheds(index_file, predictors_folder, output_folder, workers=None):
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    total_start = time.time()
+    header = readIndexHeader(index_file)
+    predictor_files = predictorFiles(predictors_folder)
+    # Store the grid reference with the tables so that predictions can be converted to rasters
+    gridFromDict(header['grid']).write(os.path.join(output_folder, grid_name))
+    # Skip watersheds without cells and watersheds with an existing table so that interrupted runs can be restarted
+    remaining = [watershed for watershed, count in zip(header['watersheds'], header['counts'])
+                 if count > 0 and not os.path.exists(os.path.join(output_folder, watershed + table_extension))]
+    print(f'Extracting predictors to {len(remaining)} of {len(header["watersheds"])} watersheds...')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(extractWatershed,
+                                   index_file,
+                                   watershed,
+                                   predictor_files,
+                                   os.path.join(output_folder, watershed + table_extension))
+                   for watershed in remaining]
+        for count, (watershed, future) in enumerate(zip(remaining, futures), 1):
+            rows, removed = future.result()
+            print(f'\tExtracted watershed {count} of {len(remaining)} ({watershed}, {rows} rows, {removed} cells with no data removed)')
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Index the grid cells of watersheds and extract predictor values to watershed tables.')
+    subparsers = parser.add_subparsers(dest='operation', required=True)
+    index_parser = subparsers.add_parser('index', help='Rasterize watersheds onto the area of interest grid and index the cells of each watershed.')
+    index_parser.add_argument('--watersheds', required=True, help='Watershed feature class from the Watershed Boundary Dataset.')
+    index_parser.add_argument('--watershed-layer', default=None, help='Layer of the watersheds within a geodatabase or geopackage.')
+    index_parser.add_argument('--field', default='HUC10', help='Field that identifies each watershed.')
+    index_parser.add_argument('--area-of-interest', required=True, help='Raster that defines the extent, cell size, grid, and projection of the grids.')
+    index_parser.add_argument('--label-raster', required=True, help='Output GeoTIFF with the label of the watershed of each cell.')
+    index_parser.add_argument('--index-file', required=True, help=f'Output cell index (e.g., watersheds{index_extension}).')
+    index_parser.add_argument('--block-size', type=int, default=default_block_size, help='Width and height in cells of the blocks rasterized at one time.')
+    index_parser.add_argument('--band-rows', type=int, default=default_band_rows, help='Number of rows of the label raster indexed by a worker at one time.')
+    extract_parser = subparsers.add_parser('extract', help='Extract predictor values to the cells of each watershed in a cell index.')
+    extract_parser.add_argument('--index-file', required=True, help='Cell index created by the index operation.')
+    extract_parser.add_argument('--predictors-folder', required=True, help='Folder containing the formatted predictor rasters named by predictor.')
+    extract_parser.add_argument('--output-folder', required=True, help='Output folder for the columnar binary watershed tables.')
+    for operation_parser in [index_parser, extract_parser]:
+        operation_parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores).')
+    return parser.parse_args()
+
+
+# Run the indexing or extraction when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    if arguments.operation == 'index':
+        total_start = time.time()
+        print('Rasterizing watersheds onto the area of interest grid...')
+        watershed_codes = labelWatersheds(arguments.watersheds,
+                                          arguments.area_of_interest,
+                                          arguments.label_raster,
+                                          field=arguments.field,
+                                          layer=arguments.watershed_layer,
+                                          block_size=arguments.block_size)
+        print(f'Indexing the cells of {len(watershed_codes)} watersheds...')
+        index_header = indexWatersheds(arguments.label_raster, watershed_codes, arguments.index_file, workers=arguments.workers, band_rows=arguments.band_rows)
+        print(f'\tIndexed {sum(index_header["counts"])} cells ({sum(count == 0 for count in index_header["counts"])} watersheds with no cells in the area of interest)')
+        total_elapsed = int(time.time() - total_start)
+        print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+    else:
+        extractWatersheds(arguments.index_file, arguments.predictors_folder, arguments.output_folder, workers=arguments.workers)
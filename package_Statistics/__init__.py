@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Statistics Package
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Add the repository folder to the python path and import from package_Statistics in an Anaconda 3 installation.
+# Description: "Statistics Package" contains the shared functions used by the train, test, and predict notebooks.
+# ---------------------------------------------------------------------------
+
+from package_Statistics.compositeModel import compositeArray
+from package_Statistics.compositeModel import compositePrediction
+from package_Statistics.modelFiles import loadModels
+from package_Statistics.modelFiles import readThreshold
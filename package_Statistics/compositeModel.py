@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Composite Model
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Composite Model" composites the classifier and regressor predictions into a single distribution-abundance prediction using vectorized array operations. Predictions where the presence probability is less than the threshold are set to zero and predictions where the presence probability is greater than or equal to the threshold are set to the regression response.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation
+import numpy as np
+
+
+# Define a function to composite presence probabilities and regression responses as arrays
+def compositeArray(presence, response, threshold, minimum=None, maximum=None, out=None, dtype=np.float32):
+    # Convert the inputs to arrays without copying where possible
+    presence = np.asarray(presence)
+    response = np.asarray(response)
+    if presence.shape != response.shape:
+        raise ValueError(f'Presence shape {presence.shape} does not match response shape {response.shape}.')
+    # Create the output array unless an output array (which may be the response array itself) was provided
+    if out is None:
+        out = np.empty(response.shape, dtype=dtype)
+    elif out.shape != response.shape:
+        raise ValueError(f'Output shape {out.shape} does not match response shape {response.shape}.')
+    # Copy the regression response into the output
+    if out is not response:
+        np.copyto(out, response, casting='same_kind')
+    # Clip the regression response to the minimum and maximum values if provided
+    if minimum is not None or maximum is not None:
+        np.clip(out, minimum, maximum, out=out)
+    # Set predicted absences equal to zero
+    out[presence < threshold] = 0
+    # Propagate missing presence probabilities as missing predictions
+    if np.issubdtype(presence.dtype, np.floating) and np.issubdtype(out.dtype, np.floating):
+        out[np.isnan(presence)] = np.nan
+    # Return the composited predictions
+    return out
+
+
+# Define a function to composite model results in a data frame
+def compositePrediction(input_data, presence, response, threshold, minimum=None, maximum=None, dtype=np.float32):
+    # Composite the presence and response columns into the prediction column
+    input_data['prediction'] = compositeArray(input_data[presence[0]].to_numpy(),
+                                              input_data[response[0]].to_numpy(),
+                                              threshold,
+                                              minimum=minimum,
+                                              maximum=maximum,
+                                              dtype=dtype)
+    # Return the data frame with composited results
+    return input_data
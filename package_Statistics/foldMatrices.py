@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Fold Matrices
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Fold Matrices" builds the XGBoost matrices of every inner cross-validation fold once so that they can be reused by all evaluations of a bayesian optimization. Training matrices are histogram-quantized so that the features are binned once rather than in every fold of every evaluation, and can be built from selected rows of a shared matrix in batches without copying the rows. The models are also created from search parameter sets here so that they can be built without the bayesian optimization packages. The conversion time and memory of the cached matrices are reported so that the savings can be compared to converting the data frames in each evaluation.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation and timing
+import time
+import numpy as np
+# Import XGBoost
+import xgboost
+from xgboost import DMatrix
+from xgboost import XGBClassifier
+from xgboost import XGBRegressor
+# Import modules for cross validation and performance from Scikit Learn
+from sklearn.metrics import mean_squared_error
+from sklearn.metrics import r2_score
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import KFold
+
+# Define the number of rows copied at one time when a matrix is built from selected rows of a shared matrix
+default_batch_rows = 2 ** 16
+
+# Define the score functions for the scoring names used by the objective functions
+score_functions = {'roc_auc': roc_auc_score,
+                   'neg_mean_squared_error': lambda y_test, prediction: -mean_squared_error(y_test, prediction),
+                   'r2': r2_score}
+
+
+# Define a function to describe a matrix for a worker process by the file of a memory-mapped matrix, so that the worker maps the file rather than receiving a copy
+def workerMatrix(X):
+    if isinstance(X, np.memmap) and X.filename is not None:
+        return X.filename
+    return np.asarray(X, dtype=np.float32)
+
+
+# Define a function to open a matrix described for a worker process
+def openMatrix(matrix):
+    if isinstance(matrix, str):
+        return np.load(matrix, mmap_mode='r')
+    return matrix
+
+
+# Define a class to pass selected rows of a shared matrix to XGBoost in batches so that the selected rows are never copied at once
+class RowBatches(xgboost.DataIter):
+
+    def __init__(self, X, y, rows, batch_rows=default_batch_rows):
+        self.X = X
+        self.y = y
+        self.rows = rows
+        self.batch_rows = batch_rows
+        self.start = 0
+        super().__init__()
+
+    def next(self, input_data):
+        if self.start >= len(self.rows):
+            return False
+        batch = self.rows[self.start:self.start + self.batch_rows]
+        input_data(data=np.asarray(self.X[batch], dtype=np.float32), label=self.y[batch])
+        self.start += self.batch_rows
+        return True
+
+    def reset(self):
+        self.start = 0
+
+
+# Define a function to create a histogram-quantized training matrix from all or selected rows (requires XGBoost 1.7 or later)
+def quantileMatrix(X, y, max_bin=256, nthread=4, rows=None):
+    if rows is not None:
+        return xgboost.QuantileDMatrix(RowBatches(X, y, rows), max_bin=max_bin, nthread=nthread)
+    return xgboost.QuantileDMatrix(X, label=y, max_bin=max_bin, nthread=nthread)
+
+
+# Define a class to build and store the matrices of the inner cross validation folds
+class FoldMatrices:
+
+    def __init__(self, X, y, n_splits=10, validation_fraction=None, max_bin=256, nthread=4, rows=None):
+        build_start = time.perf_counter()
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        y = np.asarray(y)
+        # Split all rows, or the selected rows of a shared matrix, into the inner folds
+        if rows is None:
+            rows = np.arange(X.shape[0])
+        self.rows, self.features = len(rows), X.shape[1]
+        self.max_bin = max_bin
+        self.folds = []
+        for train_index, test_index in KFold(n_splits=n_splits, shuffle=False).split(rows):
+            train_index, test_index = rows[train_index], rows[test_index]
+            fold = {'test': DMatrix(X[test_index], nthread=nthread),
+                    'y_test': y[test_index]}
+            if validation_fraction is None:
+                fold['train'] = quantileMatrix(X, y, max_bin, nthread, train_index)
+            else:
+                # Hold out the end of the inner train split as the early stopping validation split
+                validation_rows = max(1, int(len(train_index) * validation_fraction))
+                fit_index = train_index[:-validation_rows]
+                valid_index = train_index[-validation_rows:]
+                fold['train'] = quantileMatrix(X, y, max_bin, nthread, fit_index)
+                fold['validation'] = DMatrix(X[valid_index], label=y[valid_index], nthread=nthread)
+            self.folds.append(fold)
+        self.build_seconds = time.perf_counter() - build_start
+        self.evaluations = 0
+
+    # Define a function to estimate the memory of the cached matrices in megabytes
+    def cachedMemory(self):
+        # Quantized training rows store one bin index per value and other rows store a float and a column index per value
+        bin_bytes = 1 if self.max_bin <= 256 else 2
+        train_rows = sum(fold['train'].num_row() for fold in self.folds)
+        other_rows = self.rows * len(self.folds) - train_rows
+        return (train_rows * bin_bytes + other_rows * 8) * self.features / 1024 ** 2
+
+    # Define a function to estimate the memory converted in each evaluation without the cache in megabytes
+    def convertedMemory(self):
+        # Each fold copies the training and test rows from the data frame to a float matrix and a quantized matrix
+        return self.rows * len(self.folds) * self.features * (4 + 8) / 1024 ** 2
+
+    # Define a function to report the time and memory saved by reusing the matrices
+    def report(self):
+        return {'evaluations': self.evaluations,
+                'build_seconds': round(self.build_seconds, 2),
+                'seconds_saved': round(self.build_seconds * max(0, self.evaluations - 1), 2),
+                'cached_mb': round(self.cachedMemory(), 1),
+                'converted_mb_per_evaluation': round(self.convertedMemory(), 1),
+                'converted_mb_saved': round(self.convertedMemory() * max(0, self.evaluations - 1), 1)}
+
+
+# Define a function to convert a set of search parameters to XGBoost keyword arguments
+def modelParameters(parameters, n_jobs=4, n_estimators=1000):
+    return {'max_depth': int(parameters[0]),
+            'learning_rate': parameters[1],
+            'n_estimators': n_estimators,
+            'verbosity': 0,
+            'booster': 'gbtree',
+            'n_jobs': n_jobs,
+            'gamma': parameters[2],
+            'min_child_weight': int(parameters[3]),
+            'max_delta_step': int(parameters[4]),
+            'subsample': parameters[5],
+            'colsample_bytree': parameters[6],
+            'colsample_bylevel': parameters[7],
+            'reg_alpha': parameters[8],
+            'reg_lambda': parameters[9],
+            'scale_pos_weight': parameters[10]}
+
+
+# Define a function to create a classifier from a set of search parameters
+def createClassifier(parameters, n_jobs=4, n_estimators=1000):
+    return XGBClassifier(objective='binary:logistic', **modelParameters(parameters, n_jobs, n_estimators))
+
+
+# Define a function to create a regressor from a set of search parameters
+def createRegressor(parameters, n_jobs=4, n_estimators=1000):
+    return XGBRegressor(objective='reg:squarederror', **modelParameters(parameters, n_jobs, n_estimators))
+
+
+# Define a function to convert a model to training parameters for the native XGBoost interface
+def boosterParameters(model):
+    return {key: value for key, value in model.get_xgb_params().items() if value is not None}
+
+
+# Define a function to train the booster of a model on selected rows of a shared matrix
+def trainRows(model, X, y, rows, nthread=4):
+    return xgboost.train(boosterParameters(model), quantileMatrix(X, y, nthread=nthread, rows=rows), num_boost_round=model.n_estimators)
+
+
+# Define a function to predict selected rows of a shared matrix with a booster in batches
+def predictRows(booster, X, rows, batch_rows=default_batch_rows):
+    predictions = [booster.predict(DMatrix(X[rows[start:start + batch_rows]])) for start in range(0, len(rows), batch_rows)]
+    return np.concatenate(predictions) if predictions else np.zeros(0, dtype=np.float32)
+
+
+# Define a function to train a booster on a fold with optional early stopping and return the number of trees used
+def trainBooster(parameters, n_estimators, fold, early_stopping_rounds=None, eval_metric=None):
+    if early_stopping_rounds is None:
+        return xgboost.train(parameters, fold['train'], num_boost_round=n_estimators), n_estimators
+    booster = xgboost.train(dict(parameters, eval_metric=eval_metric),
+                            fold['train'],
+                            num_boost_round=n_estimators,
+                            evals=[(fold['validation'], 'validation')],
+                            early_stopping_rounds=early_stopping_rounds,
+                            verbose_eval=False)
+    return booster, int(booster.best_iteration) + 1
+
+
+# Define a function to score a fold with a booster
+def scoreFold(booster, fold, trees, scoring):
+    prediction = booster.predict(fold['test'], iteration_range=(0, trees))
+    return score_functions[scoring](fold['y_test'], prediction)
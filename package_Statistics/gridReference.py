@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Grid Reference
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Grid Reference" defines the grid of the area of interest (upper left origin, cell size, projection, and shape) shared by the watershed tables, prediction outputs, and output rasters, and converts between cell center coordinates and a compact 32-bit integer cell index. The cell index of a cell is its row times the width of the grid plus its column, so that tables and outputs can be joined by an integer key and rasters can be reconstructed by placing each value in its cell without inferring the grid from coordinates.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and data manipulation
+import json
+import os
+import numpy as np
+
+# Define the cell index column and its data type
+cell_column = 'cell'
+cell_dtype = 'int32'
+
+# Define the file name of a grid reference stored in a folder
+grid_name = 'grid.json'
+
+
+# Define a class to convert between cell center coordinates and cell indices of the area of interest grid
+class GridReference:
+
+    def __init__(self, origin_x, origin_y, cell_width, cell_height, height, width, crs=None):
+        if height * width > np.iinfo(cell_dtype).max:
+            raise ValueError(f'A grid of {height} x {width} cells exceeds the range of a {cell_dtype} cell index.')
+        self.origin_x = float(origin_x)
+        self.origin_y = float(origin_y)
+        self.cell_width = float(cell_width)
+        self.cell_height = float(cell_height)
+        self.height = int(height)
+        self.width = int(width)
+        self.crs = crs
+
+    # Define a function to convert coordinates to the rows and columns of the cells that contain them, with -1 for points outside of the grid
+    def rowColumn(self, x, y):
+        column = np.floor((np.asarray(x, dtype=np.float64) - self.origin_x) / self.cell_width).astype(np.int64)
+        row = np.floor((self.origin_y - np.asarray(y, dtype=np.float64)) / self.cell_height).astype(np.int64)
+        outside = (row < 0) | (row >= self.height) | (column < 0) | (column >= self.width)
+        row[outside] = -1
+        column[outside] = -1
+        return row, column
+
+    # Define a function to convert coordinates to cell indices, raising an error for points outside of the grid
+    def cellIndex(self, x, y):
+        row, column = self.rowColumn(x, y)
+        if np.any(row < 0):
+            raise ValueError(f'{int(np.count_nonzero(row < 0))} points are outside of the grid.')
+        return (row * self.width + column).astype(cell_dtype)
+
+    # Define a function to convert cell indices to rows and columns
+    def cellRowColumn(self, cells):
+        return np.divmod(np.asarray(cells, dtype=np.int64), self.width)
+
+    # Define a function to convert cell indices to the coordinates of the cell centers
+    def cellCenters(self, cells):
+        row, column = self.cellRowColumn(cells)
+        return self.origin_x + (column + 0.5) * self.cell_width, self.origin_y - (row + 0.5) * self.cell_height
+
+    # Define a function to place values in a window of the grid that bounds their cells
+    def scatter(self, cells, values, fill):
+        row, column = self.cellRowColumn(cells)
+        values = np.asarray(values)
+        if len(row) == 0:
+            return np.full((0, 0), fill, dtype=values.dtype), (0, 0)
+        row_off, col_off = int(row.min()), int(column.min())
+        window = np.full((int(row.max()) - row_off + 1, int(column.max()) - col_off + 1), fill, dtype=values.dtype)
+        window[row - row_off, column - col_off] = values
+        return window, (row_off, col_off)
+
+    # Define a function to describe the grid as a dictionary
+    def toDict(self):
+        return {'origin_x': self.origin_x,
+                'origin_y': self.origin_y,
+                'cell_width': self.cell_width,
+                'cell_height': self.cell_height,
+                'height': self.height,
+                'width': self.width,
+                'crs': self.crs}
+
+    # Define a function to write the grid to a json file
+    def write(self, output_file):
+        if os.path.isdir(output_file):
+            output_file = os.path.join(output_file, grid_name)
+        with open(output_file + '.partial', 'w') as grid_file:
+            json.dump(self.toDict(), grid_file, indent=2)
+        os.replace(output_file + '.partial', output_file)
+
+
+# Define a function to create a grid reference from a dictionary
+def gridFromDict(grid):
+    return GridReference(grid['origin_x'], grid['origin_y'], grid['cell_width'], grid['cell_height'], grid['height'], grid['width'], grid.get('crs'))
+
+
+# Define a function to read a grid reference from a json file or a folder containing a grid json file
+def readGrid(input_file):
+    if os.path.isdir(input_file):
+        input_file = os.path.join(input_file, grid_name)
+    with open(input_file, 'r') as grid_file:
+        return gridFromDict(json.load(grid_file))
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Hyperparameter Optimization
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Hyperparameter Optimization" defines the cross-validated objective functions and the bayesian optimizer used to tune the XGBoost classifier and regressor. The XGBoost matrices of the inner folds are built once per optimization and reused by every evaluation. Optional modes add a budget with early stopping and pruning, batches of parameter sets evaluated concurrently across worker processes, and an initial design from previous optimizations.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+# Import packages for bayesian optimization
+import GPyOpt
+# Import modules for cross validation from Scikit Learn
+from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import KFold
+
+# Import functions from the statistics package
+from package_Statistics.foldMatrices import boosterParameters
+from package_Statistics.foldMatrices import createClassifier
+from package_Statistics.foldMatrices import createRegressor
+from package_Statistics.foldMatrices import FoldMatrices
+from package_Statistics.foldMatrices import openMatrix
+from package_Statistics.foldMatrices import scoreFold
+from package_Statistics.foldMatrices import trainBooster
+from package_Statistics.foldMatrices import workerMatrix
+
+# Define the hyperparameter search domain
+domain = [{'name': 'max_depth', 'type': 'discrete', 'domain': (3, 10)},
+          {'name': 'learning_rate', 'type': 'continuous', 'domain': (0, 1)},
+          {'name': 'gamma', 'type': 'continuous', 'domain': (0, 5)},
+          {'name': 'min_child_weight', 'type': 'discrete', 'domain': (0, 10)},
+          {'name': 'max_delta_step', 'type': 'continuous', 'domain': (0, 5)},
+          {'name': 'subsample', 'type': 'continuous', 'domain': (0.5, 1)},
+          {'name': 'colsample_bytree', 'type': 'continuous', 'domain': (0.3, 1)},
+          {'name': 'colsample_bylevel', 'type': 'continuous', 'domain': (0.3, 1)},
+          {'name': 'reg_alpha', 'type': 'continuous', 'domain': (0, 10)},
+          {'name': 'reg_lamda', 'type': 'continuous', 'domain': (0, 10)},
+          {'name': 'scale_pos_weight', 'type': 'continuous', 'domain': (0, 5)}]
+
+# Define the inner folds after which a budget-aware evaluation can be pruned
+default_rungs = (2, 5)
+
+# Define the relative tolerance of the best score within which an optimization is considered converged
+convergence_tolerance = 0.001
+
+# Define the objective function and fold matrices built once in each worker process of a batch optimization
+worker_objective = None
+worker_matrices = None
+
+
+# Define an optimization objective function for the xgboost classifier
+def cvClassifier(parameters, X, y, n_jobs=4):
+    # Define a 10-fold cross validation split method
+    cv_splits = KFold(n_splits=10, shuffle=False)
+    # Define the search parameter set
+    parameters = parameters[0]
+    # Define the cross validator
+    score = cross_val_score(createClassifier(parameters, n_jobs), X, y, scoring='roc_auc', cv=cv_splits).mean()
+    # Convert the mean score to array and return the inverse of the array for minimization
+    score = np.array(score)
+    return -score
+
+
+# Define an optimization objective function for the xgboost regressor
+def cvRegressor(parameters, X, y, n_jobs=4, scoring='neg_mean_squared_error'):
+    # Define a 10-fold cross validation split method
+    cv_splits = KFold(n_splits=10, shuffle=False)
+    # Define the search parameter set
+    parameters = parameters[0]
+    # Define the cross validator
+    score = cross_val_score(createRegressor(parameters, n_jobs), X, y, scoring=scoring, cv=cv_splits).mean()
+    # Convert the mean score to array and return the inverse of the array for minimization
+    score = np.array(score)
+    return -score
+
+
+# Define an optimization objective function that trains on cached inner fold matrices
+def cvCached(parameters, matrices, createModel, scoring, n_jobs=4):
+    # Define the search parameter set
+    parameters = parameters[0]
+    model = createModel(parameters, n_jobs=n_jobs)
+    booster_parameters = boosterParameters(model)
+    # Train and score each inner fold from the cached matrices
+    scores = []
+    for fold in matrices.folds:
+        booster, trees = trainBooster(booster_parameters, model.n_estimators, fold)
+        scores.append(scoreFold(booster, fold, trees, scoring))
+    matrices.evaluations += 1
+    # Convert the mean score to array and return the inverse of the array for minimization
+    score = np.array(np.mean(scores))
+    return -score
+
+
+# Define a class for a budget-aware cross validation objective with early stopping and pruning
+class BudgetObjective:
+
+    def __init__(self, createModel, matrices, scoring, eval_metric, n_jobs=4, early_stopping_rounds=50,
+                 rungs=default_rungs, prune_tolerance=0.05):
+        self.createModel = createModel
+        self.matrices = matrices
+        self.scoring = scoring
+        self.eval_metric = eval_metric
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        self.rungs = rungs
+        self.prune_tolerance = prune_tolerance
+        # Store the fold scores of the best complete evaluation and the history of all evaluations
+        self.incumbent_scores = None
+        self.history = []
+
+    # Define a function to determine whether the first folds of an evaluation are clearly worse than the incumbent
+    def prune(self, scores):
+        if self.incumbent_scores is None or len(scores) not in self.rungs:
+            return False
+        incumbent = np.mean(self.incumbent_scores[:len(scores)])
+        return np.mean(scores) < incumbent - self.prune_tolerance * abs(incumbent)
+
+    def __call__(self, parameters):
+        evaluation_start = time.time()
+        # Define the search parameter set
+        parameters = parameters[0]
+        model = self.createModel(parameters, n_jobs=self.n_jobs)
+        booster_parameters = boosterParameters(model)
+        scores = []
+        trees = []
+        pruned = False
+        for fold in self.matrices.folds:
+            # Train with early stopping on the validation split and score the inner test split
+            booster, fold_trees = trainBooster(booster_parameters, model.n_estimators, fold,
+                                               self.early_stopping_rounds, self.eval_metric)
+            trees.append(fold_trees)
+            scores.append(scoreFold(booster, fold, fold_trees, self.scoring))
+            # Stop the evaluation when its first folds are clearly worse than the incumbent
+            if self.prune(scores):
+                pruned = True
+                break
+        self.matrices.evaluations += 1
+        score = np.mean(scores)
+        if not pruned and (self.incumbent_scores is None or score > np.mean(self.incumbent_scores)):
+            self.incumbent_scores = scores
+        self.history.append({'score': score,
+                             'folds': len(scores),
+                             'pruned': pruned,
+                             'trees': int(np.ceil(np.mean(trees))),
+                             'seconds': round(time.time() - evaluation_start, 2)})
+        # Convert the mean score to array and return the inverse of the array for minimization
+        score = np.array(score)
+        return -score
+
+
+# Define an optimization function
+def bayesianOptimizer(objective_function, initial, iterations, plot_file=None, max_time=None, max_evaluations=None, initial_design=None):
+    # Limit the initial design and iterations to the evaluation budget
+    if initial_design is not None:
+        initial = len(initial_design)
+    if max_evaluations is not None:
+        initial = min(initial, max_evaluations)
+        iterations = min(iterations, max_evaluations - initial)
+    optimization_start = time.time()
+    # Initialize the Bayesian Optimizer, evaluating the initial design if one is given
+    optimizer = GPyOpt.methods.BayesianOptimization(f=objective_function,
+                                                    domain=domain,
+                                                    X=None if initial_design is None else np.asarray(initial_design)[:initial],
+                                                    model_type='GP',
+                                                    initial_design_numdata=initial,
+                                                    initial_design_type='random',
+                                                    acquisition_type='EI',
+                                                    exact_feval=False,
+                                                    maximize=False)
+    # Run iterations of optimization within the remaining time budget
+    if max_time is None:
+        optimizer.run_optimization(max_iter=iterations)
+    else:
+        optimizer.run_optimization(max_iter=iterations, max_time=max(0, max_time - (time.time() - optimization_start)))
+    # Plot convergence
+    if plot_file is not None:
+        optimizer.plot_convergence(filename=plot_file)
+    # Return results
+    return optimizer
+
+
+# Define a function to create either the full or the budget-aware objective on cached fold matrices
+def optimizationObjective(createModel, X, y, scoring, eval_metric, n_jobs, budget, rows=None):
+    if budget is None:
+        matrices = FoldMatrices(X, y, nthread=n_jobs, rows=rows)
+        return partial(cvCached, matrices=matrices, createModel=createModel, scoring=scoring, n_jobs=n_jobs), matrices
+    budget = dict(budget)
+    budget.pop('max_time', None)
+    budget.pop('max_evaluations', None)
+    validation_fraction = budget.pop('validation_fraction', 0.1)
+    matrices = FoldMatrices(X, y, validation_fraction=validation_fraction, nthread=n_jobs, rows=rows)
+    return BudgetObjective(createModel, matrices, scoring, eval_metric, n_jobs=n_jobs, **budget), matrices
+
+
+# Define a function to build the objective function once when a batch optimization worker process starts
+def initializeWorker(createModel, X, y, scoring, eval_metric, n_jobs, budget, rows=None):
+    global worker_objective, worker_matrices
+    worker_objective, worker_matrices = optimizationObjective(createModel, openMatrix(X), y, scoring, eval_metric, n_jobs, budget, rows)
+
+
+# Define a function to evaluate a set of search parameters in a batch optimization worker process
+def evaluateParameters(parameters, incumbent_scores=None):
+    # Prune budget-aware evaluations against the best evaluation of all workers when the evaluation was submitted
+    budget_objective = isinstance(worker_objective, BudgetObjective)
+    if budget_objective:
+        worker_objective.incumbent_scores = incumbent_scores
+    score = float(worker_objective(np.asarray(parameters)[np.newaxis, :]))
+    return {'score': score,
+            'history': worker_objective.history[-1] if budget_objective else None,
+            'incumbent_scores': worker_objective.incumbent_scores if budget_objective else None,
+            'worker': os.getpid(),
+            'matrices': worker_matrices.report()}
+
+
+# Define a function to combine the fold matrix reports of the worker processes of a batch optimization
+def combineReports(reports):
+    combined = {key: round(sum(report[key] for report in reports), 2)
+                for key in ['evaluations', 'build_seconds', 'seconds_saved', 'cached_mb', 'converted_mb_saved']}
+    combined['converted_mb_per_evaluation'] = max((report['converted_mb_per_evaluation'] for report in reports), default=0)
+    return combined
+
+
+# Define a function to find the evaluations and wall-clock time after which an optimization was within a tolerance of its best score
+def convergenceReport(Y, seconds, batch_size=1, tolerance=convergence_tolerance):
+    best = np.minimum.accumulate(np.ravel(Y))
+    if len(best) == 0:
+        return None
+    converged = int(np.argmax(best <= best[-1] + tolerance * abs(best[-1])))
+    return {'batch_size': batch_size,
+            'evaluations': len(best),
+            'seconds': round(seconds[-1], 2),
+            'converged_evaluations': converged + 1,
+            'converged_seconds': round(seconds[converged], 2),
+            'best_score': float(-best[-1])}
+
+
+# Define a function to run a batch bayesian optimization with concurrent evaluations in a pool of worker processes
+def batchOptimizer(createModel, X, y, scoring, eval_metric, initial, iterations, plot_file=None, n_jobs=4, budget=None, batch_size=4,
+                   initial_design=None, rows=None):
+    max_time = None if budget is None else budget.get('max_time')
+    max_evaluations = None if budget is None else budget.get('max_evaluations')
+    # Limit the initial design and iterations to the evaluation budget
+    if initial_design is not None:
+        initial = len(initial_design)
+    if max_evaluations is not None:
+        initial = min(initial, max_evaluations)
+        iterations = min(iterations, max_evaluations - initial)
+    optimization_start = time.time()
+    if initial_design is None:
+        X_evaluated = GPyOpt.experiment_design.initial_design('random', GPyOpt.Design_space(domain), initial)
+    else:
+        X_evaluated = np.asarray(initial_design, dtype=np.float64)[:initial]
+    results = []
+    seconds = []
+    incumbent_scores = None
+    # Build the fold matrices once in each worker and evaluate the initial design and each batch concurrently
+    with ProcessPoolExecutor(max_workers=batch_size,
+                             initializer=initializeWorker,
+                             initargs=(createModel, workerMatrix(X), np.asarray(y), scoring, eval_metric, n_jobs, budget, rows)) as executor:
+        pending = X_evaluated
+        while len(pending) > 0:
+            for result in executor.map(evaluateParameters, pending, [incumbent_scores] * len(pending)):
+                results.append(result)
+                seconds.append(time.time() - optimization_start)
+                if result['incumbent_scores'] is not None and (incumbent_scores is None
+                                                               or np.mean(result['incumbent_scores']) > np.mean(incumbent_scores)):
+                    incumbent_scores = result['incumbent_scores']
+            # Propose the next batch from the evaluations so far within the remaining iterations and time
+            remaining = initial + iterations - len(results)
+            if remaining <= 0 or (max_time is not None and time.time() - optimization_start >= max_time):
+                break
+            proposer = GPyOpt.methods.BayesianOptimization(f=None,
+                                                           domain=domain,
+                                                           X=X_evaluated,
+                                                           Y=np.array([[result['score']] for result in results]),
+                                                           model_type='GP',
+                                                           acquisition_type='EI',
+                                                           evaluator_type='local_penalization' if min(batch_size, remaining) > 1 else 'sequential',
+                                                           batch_size=min(batch_size, remaining),
+                                                           exact_feval=False,
+                                                           maximize=False)
+            pending = proposer.suggest_next_locations()
+            X_evaluated = np.vstack([X_evaluated, pending])
+    # Store the evaluations in an optimizer so that results are accessed in the same way as a sequential optimization
+    Y_evaluated = np.array([[result['score']] for result in results])
+    optimizer = GPyOpt.methods.BayesianOptimization(f=None,
+                                                    domain=domain,
+                                                    X=X_evaluated,
+                                                    Y=Y_evaluated,
+                                                    model_type='GP',
+                                                    acquisition_type='EI',
+                                                    exact_feval=False,
+                                                    maximize=False)
+    optimizer.Y_best = np.minimum.accumulate(Y_evaluated.ravel())
+    # Plot convergence
+    if plot_file is not None:
+        optimizer.plot_convergence(filename=plot_file)
+    if budget is not None:
+        # Store the evaluation history so that the number of trees of the best evaluation can be recovered
+        optimizer.evaluations = [result['history'] for result in results]
+    # Store the fold matrix report of each worker from its last evaluation
+    worker_reports = {result['worker']: result['matrices'] for result in results}
+    optimizer.matrix_report = combineReports(list(worker_reports.values()))
+    optimizer.convergence = convergenceReport(Y_evaluated, seconds, batch_size)
+    return optimizer
+
+
+# Define a function to run the bayesian optimizer with either the full or the budget-aware objective on cached fold matrices
+def optimizeModel(createModel, X, y, scoring, eval_metric, initial, iterations, plot_file, n_jobs, budget, batch_size=None, initial_design=None, rows=None):
+    if batch_size is not None:
+        return batchOptimizer(createModel, X, y, scoring, eval_metric, initial, iterations, plot_file, n_jobs, budget, batch_size, initial_design, rows)
+    objective, matrices = optimizationObjective(createModel, X, y, scoring, eval_metric, n_jobs, budget, rows)
+    if budget is None:
+        optimizer = bayesianOptimizer(objective, initial, iterations, plot_file, initial_design=initial_design)
+    else:
+        optimizer = bayesianOptimizer(objective, initial, iterations, plot_file, budget.get('max_time'), budget.get('max_evaluations'), initial_design)
+        # Store the evaluation history so that the number of trees of the best evaluation can be recovered
+        optimizer.evaluations = objective.history
+    # Store the time and memory saved by reusing the fold matrices
+    optimizer.matrix_report = matrices.report()
+    return optimizer
+
+
+# Define a function to optimize the classifier hyperparameters on a training dataset
+def optimizeClassifier(X, y, initial=50, iterations=250, plot_file=None, n_jobs=4, budget=None, batch_size=None, initial_design=None, rows=None):
+    return optimizeModel(createClassifier, X, y, 'roc_auc', 'logloss',
+                         initial, iterations, plot_file, n_jobs, budget, batch_size, initial_design, rows)
+
+
+# Define a function to optimize the regressor hyperparameters on a training dataset
+def optimizeRegressor(X, y, initial=100, iterations=400, plot_file=None, n_jobs=4, scoring='neg_mean_squared_error', budget=None, batch_size=None,
+                      initial_design=None, rows=None):
+    return optimizeModel(createRegressor, X, y, scoring, 'rmse',
+                         initial, iterations, plot_file, n_jobs, budget, batch_size, initial_design, rows)
+
+
+# Define a function to select the best set of parameters from an optimizer
+def bestParameters(optimizer):
+    return optimizer.X[np.argmin(optimizer.Y)]
+
+
+# Define a function to select the number of trees of the best evaluation from an optimizer
+def bestEstimators(optimizer, default=1000):
+    evaluations = getattr(optimizer, 'evaluations', None)
+    if not evaluations:
+        return default
+    return evaluations[int(np.argmin(optimizer.Y))]['trees']
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Model Files
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Model Files" reads the classifier, regressor, and threshold files written by the train and test notebooks.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation
+import os
+# Import joblib
+import joblib
+
+
+# Define a function to read threshold values from text file
+def readThreshold(inFile):
+    threshold_reader = open(inFile, "r")
+    threshold = threshold_reader.readlines()
+    threshold_reader.close()
+    outThreshold = float(threshold[0])
+    return outThreshold
+
+
+# Define a function to load the trained models and threshold from a model folder
+def loadModels(model_folder, n_jobs=None):
+    # Import the trained models
+    classifier = joblib.load(os.path.join(model_folder, 'classifier.joblib'))
+    regressor = joblib.load(os.path.join(model_folder, 'regressor.joblib'))
+    # Set the number of threads used by each model for prediction if provided
+    if n_jobs is not None:
+        classifier.set_params(n_jobs=n_jobs)
+        regressor.set_params(n_jobs=n_jobs)
+    # Read threshold from text file in the model folder
+    threshold = readThreshold(os.path.join(model_folder, 'threshold.txt'))
+    # Return the models and threshold
+    return classifier, regressor, threshold
@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Nested Validation
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_Statistics.nestedValidation --help) or imported from the package_Statistics folder.
+# Description: "Nested Validation" runs the outer folds of the distribution-abundance nested cross-validation as independent jobs across a pool of worker processes, splitting the available cores between parallel folds and XGBoost threads. The workers share a memory-mapped predictor matrix and select the rows of each fold by fold number. Each completed fold is written to a checkpoint so that an interrupted run resumes from the completed folds. Optional settings add an optimization budget, batch optimization, and warm starts from an optimizer history.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+# Import modules for model selection from Scikit Learn
+from sklearn.model_selection import KFold
+from sklearn.utils import shuffle
+# Import joblib
+import joblib
+
+# Import functions from the statistics package
+from package_Statistics.compositeModel import compositeArray
+from package_Statistics.foldMatrices import openMatrix
+from package_Statistics.foldMatrices import predictRows
+from package_Statistics.foldMatrices import trainRows
+from package_Statistics.foldMatrices import workerMatrix
+from package_Statistics.hyperparameterOptimization import bestEstimators
+from package_Statistics.hyperparameterOptimization import bestParameters
+from package_Statistics.hyperparameterOptimization import createClassifier
+from package_Statistics.hyperparameterOptimization import createRegressor
+from package_Statistics.hyperparameterOptimization import optimizeClassifier
+from package_Statistics.hyperparameterOptimization import optimizeRegressor
+from package_Statistics.optimizerHistory import default_warm_initial
+from package_Statistics.optimizerHistory import default_warm_iterations
+from package_Statistics.optimizerHistory import priorRuns
+from package_Statistics.optimizerHistory import recordHistory
+from package_Statistics.optimizerHistory import warmStart
+from package_Statistics.thresholdOptimization import innerThreshold
+from package_Statistics.variableSets import absence
+from package_Statistics.variableSets import all_variables
+from package_Statistics.variableSets import coordinates
+from package_Statistics.variableSets import cover
+from package_Statistics.variableSets import distribution
+from package_Statistics.variableSets import iteration
+from package_Statistics.variableSets import prediction
+from package_Statistics.variableSets import predictor_all
+from package_Statistics.variableSets import presence
+from package_Statistics.variableSets import response
+from package_Statistics.variableSets import strata
+from package_Statistics.variableSets import zero_variable
+
+# Define the default optimization settings
+default_settings = {'classifier_initial': 50,
+                    'classifier_iterations': 250,
+                    'regressor_initial': 100,
+                    'regressor_iterations': 400,
+                    'regressor_scoring': 'neg_mean_squared_error',
+                    'budget': None,
+                    'batch_size': None,
+                    'warm_start': None}
+
+# Define the data types of the test prediction columns
+prediction_dtypes = {absence[0]: np.float32,
+                     presence[0]: np.float32,
+                     response[0]: np.float32,
+                     distribution[0]: np.float64,
+                     prediction[0]: np.float32}
+
+# Define the shared arrays of the outer cross validation stored once in each worker process
+fold_data = None
+
+
+# Define a function to read the taxon data and prepare it for training
+def loadTaxonData(input_file):
+    # Create data frame of input data
+    input_data = pd.read_csv(input_file)
+    # Convert values to floats
+    input_data[predictor_all + cover + coordinates] = input_data[predictor_all + cover + coordinates].astype(float)
+    # Convert values to integers
+    input_data[strata + zero_variable] = input_data[strata + zero_variable].astype('int32')
+    # Shuffle data
+    return shuffle(input_data, random_state=21)
+
+
+# Define a function to assign each row to an outer cross validation fold with AIM and non-AIM data split separately
+def outerFoldIds(input_data, n_splits=10, random_state=314):
+    outer_cv_splits = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    aim = (input_data['project'] == 'AIM NPR-A').to_numpy()
+    fold_ids = np.zeros(len(input_data), dtype=np.int8)
+    for project_rows in [np.flatnonzero(aim), np.flatnonzero(~aim)]:
+        for fold, (train_index, test_index) in enumerate(outer_cv_splits.split(project_rows), 1):
+            fold_ids[project_rows[test_index]] = fold
+    return fold_ids
+
+
+# Define a function to create the shared arrays of the outer cross validation from the taxon data, optionally mapping the predictors from a file
+def foldData(input_data, n_splits=10, matrix_file=None):
+    aim = (input_data['project'] == 'AIM NPR-A').to_numpy()
+    X = np.ascontiguousarray(input_data[predictor_all].to_numpy(dtype=np.float32))
+    if matrix_file is not None:
+        # Write the predictors to a file that the worker processes map rather than each receiving a copy
+        np.save(matrix_file, X)
+        X = np.load(matrix_file, mmap_mode='r')
+    # Order AIM rows before non-AIM rows so that the train and test rows of each fold are in the order of the original splits
+    return {'X': X,
+            'zero': input_data[zero_variable[0]].to_numpy(dtype='int32'),
+            'cover': input_data[cover[0]].to_numpy(dtype=np.float64),
+            'aim': aim,
+            'fold_ids': outerFoldIds(input_data, n_splits),
+            'order': np.concatenate([np.flatnonzero(aim), np.flatnonzero(~aim)])}
+
+
+# Define a function to select the rows of an outer fold from the shared arrays
+def foldRows(fold_data, fold, test=False):
+    order = fold_data['order']
+    selected = (fold_data['fold_ids'][order] == fold) if test else (fold_data['fold_ids'][order] != fold)
+    return order[selected]
+
+
+# Define a function to split the available cores between parallel folds and XGBoost threads
+def splitCores(folds, workers=None, threads=None, cores=None):
+    if cores is None:
+        cores = os.cpu_count() or 1
+    if workers is None:
+        workers = max(1, min(folds, cores // (threads or 1)))
+    if threads is None:
+        threads = max(1, cores // workers)
+    return workers, threads
+
+
+# Define a function to allocate a share or the remainder of the outer fold budget to one optimization
+def optimizationBudget(budget, share=None, elapsed=0, evaluations=0):
+    if budget is None:
+        return None
+    budget = dict(budget)
+    if budget.get('max_time') is not None:
+        if share is None:
+            budget['max_time'] = max(0, budget['max_time'] - elapsed)
+        else:
+            budget['max_time'] = budget['max_time'] * share
+    if budget.get('max_evaluations') is not None:
+        if share is None:
+            budget['max_evaluations'] = max(1, budget['max_evaluations'] - evaluations)
+        else:
+            budget['max_evaluations'] = max(1, int(budget['max_evaluations'] * share))
+    return budget
+
+
+# Define a function to store the shared arrays of the outer cross validation once when a worker process starts
+def initializeWorker(data):
+    global fold_data
+    fold_data = dict(data, X=openMatrix(data['X']))
+
+
+# Define a function to identify the checkpoint file of an outer fold
+def checkpointFile(checkpoint_folder, fold):
+    return os.path.join(checkpoint_folder, f'fold{fold}.joblib')
+
+
+# Define a function to read the checkpoint of a completed outer fold
+def readCheckpoint(checkpoint_folder, fold, settings):
+    checkpoint_path = checkpointFile(checkpoint_folder, fold)
+    if not os.path.exists(checkpoint_path):
+        return None
+    checkpoint = joblib.load(checkpoint_path)
+    if 'test_rows' not in checkpoint:
+        raise ValueError(f'{checkpoint_path} was created by an earlier version of nested validation. Use a new output folder or remove the checkpoints.')
+    if checkpoint['settings'] != settings:
+        raise ValueError(f'{checkpoint_path} was created with settings {checkpoint["settings"]}. Use a new output folder or remove the checkpoints to change settings.')
+    return checkpoint
+
+
+# Define a function to train and test one outer fold and write its checkpoint
+def trainFold(fold, checkpoint_folder, plots_folder, settings, threads=4):
+    fold_start = time.time()
+    # Seed the optimizations from the best hyperparameter sets of previous optimizations with a reduced budget
+    classifier_design, classifier_initial, classifier_iterations = warmStart(settings['warm_start'], 'classifier', 'roc_auc', fold,
+                                                                             settings['classifier_initial'], settings['classifier_iterations'])
+    regressor_design, regressor_initial, regressor_iterations = warmStart(settings['warm_start'], 'regressor', settings['regressor_scoring'], fold,
+                                                                          settings['regressor_initial'], settings['regressor_iterations'])
+    # Share the outer fold budget between the classifier and regressor in proportion to their evaluations
+    classifier_evaluations = classifier_initial + classifier_iterations
+    classifier_share = classifier_evaluations / (classifier_evaluations + regressor_initial + regressor_iterations)
+    # Split the threads of the fold between the concurrent evaluations of a batch optimization
+    evaluation_threads = threads if settings['batch_size'] is None else max(1, threads // settings['batch_size'])
+
+    # Identify the train rows of the classifier, which are read from the shared predictors without copying them
+    X = fold_data['X']
+    train_rows = foldRows(fold_data, fold)
+
+    # Conduct Bayesian Optimization on the classifier train dataset using inner cross validation
+    optimizer_classify = optimizeClassifier(X, fold_data['zero'],
+                                            initial=classifier_initial,
+                                            iterations=classifier_iterations,
+                                            plot_file=os.path.join(plots_folder, f'convergence_classifier{fold}.png'),
+                                            n_jobs=evaluation_threads,
+                                            budget=optimizationBudget(settings['budget'], classifier_share),
+                                            batch_size=settings['batch_size'],
+                                            initial_design=classifier_design,
+                                            rows=train_rows)
+    if settings['warm_start'] is not None:
+        recordHistory(settings['warm_start']['history_folder'], settings['warm_start']['taxon'], 'classifier', 'roc_auc', fold,
+                      optimizer_classify.X, optimizer_classify.Y)
+    # Select best set of parameters and number of trees for the classifier
+    classifier_parameters = bestParameters(optimizer_classify)
+    classifier_estimators = bestEstimators(optimizer_classify)
+    classifier = createClassifier(classifier_parameters, n_jobs=threads, n_estimators=classifier_estimators)
+
+    # Calculate the optimal threshold and performance of the presence-absence classification in inner cross validation
+    threshold, sensitivity, specificity, auc, accuracy = innerThreshold(classifier, X, fold_data['zero'], rows=train_rows)
+
+    # Train classifier
+    classifier_booster = trainRows(classifier, X, fold_data['zero'], train_rows, threads)
+
+    # Identify the train rows of the regressor from the AIM presences of the train split
+    regressor_rows = train_rows[fold_data['aim'][train_rows] & (fold_data['cover'][train_rows] >= 1)]
+
+    # Conduct bayesian optimization of xgboost regressor
+    optimizer_regress = optimizeRegressor(X, fold_data['cover'],
+                                          initial=regressor_initial,
+                                          iterations=regressor_iterations,
+                                          plot_file=os.path.join(plots_folder, f'convergence_regressor{fold}.png'),
+                                          n_jobs=evaluation_threads,
+                                          scoring=settings['regressor_scoring'],
+                                          budget=optimizationBudget(settings['budget'],
+                                                                    elapsed=time.time() - fold_start,
+                                                                    evaluations=len(optimizer_classify.Y)),
+                                          batch_size=settings['batch_size'],
+                                          initial_design=regressor_design,
+                                          rows=regressor_rows)
+    if settings['warm_start'] is not None:
+        recordHistory(settings['warm_start']['history_folder'], settings['warm_start']['taxon'], 'regressor', settings['regressor_scoring'], fold,
+                      optimizer_regress.X, optimizer_regress.Y)
+    # Select best set of hyperparameters and number of trees for the regressor
+    regressor_parameters = bestParameters(optimizer_regress)
+    regressor_estimators = bestEstimators(optimizer_regress)
+    # Train regressor
+    regressor = createRegressor(regressor_parameters, n_jobs=threads, n_estimators=regressor_estimators)
+    regressor_booster = trainRows(regressor, X, fold_data['cover'], regressor_rows, threads)
+
+    # Identify the test rows
+    test_rows = foldRows(fold_data, fold, test=True)
+    # Use the classifier to predict presence probabilities
+    presence_prediction = predictRows(classifier_booster, X, test_rows)
+    # Convert probability to presence-absence
+    distribution_prediction = np.zeros(len(test_rows))
+    distribution_prediction[presence_prediction >= threshold] = 1
+    # Use the regressor to predict foliar cover response
+    response_prediction = predictRows(regressor_booster, X, test_rows)
+    # Composite the classifier and regressor predictions
+    test_predictions = {absence[0]: 1 - presence_prediction,
+                        presence[0]: presence_prediction,
+                        distribution[0]: distribution_prediction,
+                        response[0]: response_prediction,
+                        prediction[0]: compositeArray(presence_prediction, response_prediction, threshold)}
+
+    # Write the checkpoint to a partial file and rename on completion so that existing checkpoints are always complete
+    checkpoint = {'fold': fold,
+                  'settings': settings,
+                  'threads': threads,
+                  'classifier_X': optimizer_classify.X,
+                  'classifier_Y': optimizer_classify.Y,
+                  'classifier_parameters': classifier_parameters,
+                  'classifier_estimators': classifier_estimators,
+                  'classifier_evaluations': getattr(optimizer_classify, 'evaluations', None),
+                  'classifier_matrices': optimizer_classify.matrix_report,
+                  'classifier_convergence': getattr(optimizer_classify, 'convergence', None),
+                  'classifier_seeds': 0 if classifier_design is None else len(classifier_design),
+                  'regressor_X': optimizer_regress.X,
+                  'regressor_Y': optimizer_regress.Y,
+                  'regressor_parameters': regressor_parameters,
+                  'regressor_estimators': regressor_estimators,
+                  'regressor_evaluations': getattr(optimizer_regress, 'evaluations', None),
+                  'regressor_matrices': optimizer_regress.matrix_report,
+                  'regressor_convergence': getattr(optimizer_regress, 'convergence', None),
+                  'regressor_seeds': 0 if regressor_design is None else len(regressor_design),
+                  'threshold': threshold,
+                  'threshold_performance': {'sensitivity': sensitivity,
+                                            'specificity': specificity,
+                                            'auc': auc,
+                                            'accuracy': accuracy},
+                  'test_rows': test_rows.astype('int32'),
+                  'test_predictions': test_predictions,
+                  'seconds': round(time.time() - fold_start, 2),
+                  'completed': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    checkpoint_path = checkpointFile(checkpoint_folder, fold)
+    joblib.dump(checkpoint, checkpoint_path + '.partial')
+    os.replace(checkpoint_path + '.partial', checkpoint_path)
+    return checkpoint
+
+
+# Define a function to combine the test predictions of the outer folds in arrays allocated once for all rows
+def outerResults(input_data, data, checkpoints):
+    results = {column: np.full(len(input_data), np.nan, dtype=dtype) for column, dtype in prediction_dtypes.items()}
+    results[iteration[0]] = np.zeros(len(input_data), dtype=np.int64)
+    for checkpoint in checkpoints:
+        for column, values in checkpoint['test_predictions'].items():
+            results[column][checkpoint['test_rows']] = values
+        results[iteration[0]][checkpoint['test_rows']] = checkpoint['fold']
+    # Order the rows by fold with AIM rows before non-AIM rows within each fold
+    order = data['order'][np.argsort(data['fold_ids'][data['order']], kind='stable')]
+    outer_results = input_data[all_variables].iloc[order].reset_index(drop=True)
+    for column in absence + presence + response + distribution + prediction + iteration:
+        outer_results[column] = results[column][order]
+    return outer_results
+
+
+# Define a function to run the outer folds of the nested cross validation in parallel
+def nestedCrossValidation(input_data, output_folder, n_splits=10, workers=None, threads=None, settings=None):
+    settings = dict(default_settings, **(settings or {}))
+    # Create the checkpoint and plots folders if they do not exist
+    checkpoint_folder = os.path.join(output_folder, 'checkpoints')
+    plots_folder = os.path.join(output_folder, 'plots')
+    for folder in [checkpoint_folder, plots_folder]:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    # Create the memory-mapped predictor matrix and fold numbers and read the checkpoints of completed folds
+    matrix_file = os.path.join(checkpoint_folder, 'predictors.npy')
+    data = foldData(input_data, n_splits, matrix_file)
+    checkpoints = {fold: readCheckpoint(checkpoint_folder, fold, settings) for fold in range(1, n_splits + 1)}
+    remaining = [fold for fold, checkpoint in checkpoints.items() if checkpoint is None]
+    print(f'Resuming from {n_splits - len(remaining)} completed folds; training {len(remaining)} of {n_splits} outer folds...')
+    # Train the remaining folds across the process pool
+    if remaining:
+        workers, threads = splitCores(len(remaining), workers, threads)
+        print(f'Running {workers} folds in parallel with {threads} XGBoost threads per fold...')
+        total_start = time.time()
+        # Optimize the first fold alone when a warm start has no history so that the other folds can be seeded from it
+        waves = [remaining]
+        warm_start = settings['warm_start']
+        if warm_start is not None and len(remaining) > 1 and len(priorRuns(warm_start['history_folder'], warm_start['taxon'], 'classifier', 'roc_auc',
+                                                                           warm_start.get('reference_taxon'))) == 0:
+            print(f'No optimizer history for {warm_start["taxon"]}; optimizing fold {remaining[0]} before warm-starting the other folds...')
+            waves = [remaining[:1], remaining[1:]]
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializeWorker, initargs=(dict(data, X=workerMatrix(data['X'])),)) as executor:
+            for wave in waves:
+                futures = {executor.submit(trainFold,
+                                           fold,
+                                           checkpoint_folder,
+                                           plots_folder,
+                                           settings,
+                                           threads): fold
+                           for fold in wave}
+                for future in as_completed(futures):
+                    checkpoint = future.result()
+                    checkpoints[checkpoint['fold']] = checkpoint
+                    print(f'\tCompleted outer fold {checkpoint["fold"]} of {n_splits} (threshold = {checkpoint["threshold"]}) in {datetime.timedelta(seconds=int(checkpoint["seconds"]))}')
+                    if checkpoint.get('classifier_seeds', 0) > 0 or checkpoint.get('regressor_seeds', 0) > 0:
+                        print(f'\t\tWarm-started from {checkpoint["classifier_seeds"]} classifier and {checkpoint["regressor_seeds"]} regressor hyperparameter sets '
+                              f'({len(checkpoint["classifier_Y"])} and {len(checkpoint["regressor_Y"])} evaluations)')
+                    seconds_saved = checkpoint['classifier_matrices']['seconds_saved'] + checkpoint['regressor_matrices']['seconds_saved']
+                    memory_saved = checkpoint['classifier_matrices']['converted_mb_saved'] + checkpoint['regressor_matrices']['converted_mb_saved']
+                    print(f'\t\tReused fold matrices saved {datetime.timedelta(seconds=int(seconds_saved))} of conversion and {memory_saved:.0f} MB of copies')
+                    for model in ['classifier', 'regressor']:
+                        convergence = checkpoint.get(f'{model}_convergence')
+                        if convergence is not None:
+                            print(f'\t\tBatch {convergence["batch_size"]} {model} optimization converged after {convergence["converged_evaluations"]} of {convergence["evaluations"]} evaluations '
+                                  f'in {datetime.timedelta(seconds=int(convergence["converged_seconds"]))} of {datetime.timedelta(seconds=int(convergence["seconds"]))}')
+        total_elapsed = int(time.time() - total_start)
+        print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+    # Close and delete the predictor matrix file
+    del data['X']
+    os.remove(matrix_file)
+    # Combine the test results and thresholds in fold order
+    checkpoints = [checkpoints[fold] for fold in range(1, n_splits + 1)]
+    outer_results = outerResults(input_data, data, checkpoints)
+    threshold_list = [checkpoint['threshold'] for checkpoint in checkpoints]
+    return outer_results, threshold_list, checkpoints
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Run the outer folds of the distribution-abundance nested cross validation in parallel.')
+    parser.add_argument('--input-file', required=True, help='Csv file of species observations with features extracted from the Format Taxon Data tool.')
+    parser.add_argument('--output-folder', required=True, help='Output folder for the checkpoints, convergence plots, and test predictions.')
+    parser.add_argument('--regressor-scoring', default=default_settings['regressor_scoring'], choices=['neg_mean_squared_error', 'r2'],
+                        help='Scoring used to optimize the regressor hyperparameters.')
+    parser.add_argument('--early-stopping-rounds', type=int, default=None,
+                        help='Optimize with early stopping after this many rounds without improvement and prune clearly worse evaluations (default: fit all 1000 trees in every fold).')
+    parser.add_argument('--max-time', type=float, default=None, help='Wall-clock budget in minutes for the optimization of each outer fold.')
+    parser.add_argument('--max-evaluations', type=int, default=None, help='Budget of optimizer evaluations shared by the classifier and regressor of each outer fold.')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Number of hyperparameter sets proposed and evaluated concurrently in each optimization step (default: one at a time).')
+    parser.add_argument('--history-folder', default=None,
+                        help='Folder of optimizer histories shared between runs. Each optimization is recorded and warm-started from earlier folds of the taxon or the reference taxon.')
+    parser.add_argument('--taxon', default=None, help='Name of the taxon in the optimizer history (default: name of the input file).')
+    parser.add_argument('--reference-taxon', default=None, help='Taxon in the optimizer history used to warm-start optimizations when the taxon has no history.')
+    parser.add_argument('--warm-start-initial', type=int, default=default_warm_initial,
+                        help='Number of previous hyperparameter sets evaluated as the initial design of a warm-started optimization.')
+    parser.add_argument('--warm-start-iterations', type=int, default=default_warm_iterations,
+                        help='Number of bayesian optimization iterations of a warm-started optimization.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of folds trained in parallel (default: all folds or all cores).')
+    parser.add_argument('--threads', type=int, default=None, help='Number of XGBoost threads per fold (default: cores divided by workers).')
+    return parser.parse_args()
+
+
+# Run the nested cross validation when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    taxon_data = loadTaxonData(arguments.input_file)
+    # Define the optimization budget if early stopping or a budget is requested
+    optimization_budget = None
+    if arguments.early_stopping_rounds is not None or arguments.max_time is not None or arguments.max_evaluations is not None:
+        optimization_budget = {'early_stopping_rounds': arguments.early_stopping_rounds or 50,
+                               'max_time': None if arguments.max_time is None else arguments.max_time * 60,
+                               'max_evaluations': arguments.max_evaluations}
+    # Define the warm start if an optimizer history folder is provided
+    optimization_warm_start = None
+    if arguments.history_folder is not None:
+        optimization_warm_start = {'history_folder': arguments.history_folder,
+                                   'taxon': arguments.taxon or os.path.splitext(os.path.basename(arguments.input_file))[0],
+                                   'reference_taxon': arguments.reference_taxon,
+                                   'initial': arguments.warm_start_initial,
+                                   'iterations': arguments.warm_start_iterations}
+    results, thresholds, fold_checkpoints = nestedCrossValidation(taxon_data,
+                                                                  arguments.output_folder,
+                                                                  workers=arguments.workers,
+                                                                  threads=arguments.threads,
+                                                                  settings={'regressor_scoring': arguments.regressor_scoring,
+                                                                            'budget': optimization_budget,
+                                                                            'batch_size': arguments.batch_size,
+                                                                            'warm_start': optimization_warm_start})
+    # Export test results to csv
+    results.to_csv(os.path.join(arguments.output_folder, 'prediction.csv'), header=True, index=False, sep=',', encoding='utf-8')
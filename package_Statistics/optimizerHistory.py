@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Optimizer History
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Optimizer History" stores the evaluated hyperparameter sets and scores of each bayesian optimization in a history folder that can be shared between outer folds and taxa, with one file per taxon, model, and outer fold. A new optimization can be warm-started from the stored history of earlier folds of the same taxon, or of a reference taxon when the taxon has no history, by evaluating the best hyperparameter sets of the previous optimizations as its initial design instead of a random design. Only the hyperparameter sets are reused; every set is evaluated again on the inner folds of the new optimization.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation and data manipulation
+import datetime
+import os
+import re
+import numpy as np
+# Import joblib
+import joblib
+
+# Import functions from the statistics package
+from package_Statistics.hyperparameterOptimization import domain
+
+# Define the default initial design and iterations of a warm-started optimization
+default_warm_initial = 10
+default_warm_iterations = 60
+
+
+# Define a function to create the prefix of the history files of a taxon and model
+def historyPrefix(taxon, model):
+    return f'{re.sub("[^A-Za-z0-9]+", "_", taxon)}_{model}_fold'
+
+
+# Define a function to identify the history file of an optimization
+def historyFile(history_folder, taxon, model, fold):
+    return os.path.join(history_folder, f'{historyPrefix(taxon, model)}{fold}.joblib')
+
+
+# Define a function to write the evaluated hyperparameter sets and scores of an optimization to the history folder
+def recordHistory(history_folder, taxon, model, scoring, fold, X, Y):
+    if not os.path.exists(history_folder):
+        os.makedirs(history_folder)
+    record = {'taxon': taxon,
+              'model': model,
+              'scoring': scoring,
+              'fold': fold,
+              'parameters': [variable['name'] for variable in domain],
+              'X': np.asarray(X, dtype=np.float64),
+              'Y': np.asarray(Y, dtype=np.float64).ravel(),
+              'created': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    history_path = historyFile(history_folder, taxon, model, fold)
+    joblib.dump(record, history_path + '.partial')
+    os.replace(history_path + '.partial', history_path)
+    return history_path
+
+
+# Define a function to read the optimizations of a taxon and model from the history folder
+def readHistory(history_folder, taxon, model, scoring):
+    if history_folder is None or not os.path.exists(history_folder):
+        return []
+    parameters = [variable['name'] for variable in domain]
+    prefix = historyPrefix(taxon, model)
+    records = []
+    for file in sorted(os.listdir(history_folder)):
+        if not (file.startswith(prefix) and file.endswith('.joblib')):
+            continue
+        record = joblib.load(os.path.join(history_folder, file))
+        # Skip optimizations of other scorings or search domains, since their scores or parameters are not comparable
+        if record['taxon'] == taxon and record['model'] == model and record['scoring'] == scoring and record['parameters'] == parameters:
+            records.append(record)
+    return records
+
+
+# Define a function to find the previous optimizations of a taxon, or of a reference taxon when the taxon has none
+def priorRuns(history_folder, taxon, model, scoring, reference_taxon=None, exclude_fold=None):
+    runs = [record for record in readHistory(history_folder, taxon, model, scoring) if record['fold'] != exclude_fold]
+    if len(runs) == 0 and reference_taxon is not None:
+        runs = readHistory(history_folder, reference_taxon, model, scoring)
+    return runs
+
+
+# Define a function to select the best distinct hyperparameter sets of previous optimizations as an initial design
+def seedDesign(runs, size):
+    if len(runs) == 0:
+        return None
+    # Scores are only comparable within an optimization, so the sets are taken by their rank within each optimization
+    candidates = []
+    for run in runs:
+        for rank, index in enumerate(np.argsort(run['Y'], kind='stable')):
+            candidates.append((rank, run['Y'][index], tuple(run['X'][index])))
+    candidates.sort(key=lambda candidate: candidate[:2])
+    seeds = []
+    for rank, score, parameters in candidates:
+        if parameters not in seeds:
+            seeds.append(parameters)
+        if len(seeds) == size:
+            break
+    return np.array(seeds)
+
+
+# Define a function to select the initial design and budget of an optimization from the history folder
+def warmStart(warm_start, model, scoring, fold, initial, iterations):
+    if warm_start is None:
+        return None, initial, iterations
+    runs = priorRuns(warm_start['history_folder'], warm_start['taxon'], model, scoring,
+                     warm_start.get('reference_taxon'), exclude_fold=fold)
+    design = seedDesign(runs, warm_start.get('initial', default_warm_initial))
+    # Optimizations without previous history start from a random design with the full budget
+    if design is None:
+        return None, initial, iterations
+    return design, len(design), warm_start.get('iterations', default_warm_iterations)
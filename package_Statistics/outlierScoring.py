@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Outlier Scoring
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Outlier Scoring" scores grid points with the standard scaler and rbf one-class outlier detector trained by "Create Sample Outlier Detector" in a single fused pass of batched matrix products. The scaler is folded into the kernel so that unscaled features are scored directly. The exact mode evaluates the kernel against all support vectors, and the approximate mode compresses the support vectors to a smaller set of landmark points with a Nystrom projection, where the number of landmarks controls the trade-off between agreement with the exact model and speed.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation and timing
+import time
+import numpy as np
+import pandas as pd
+# Import modules for clustering from Scikit Learn
+from sklearn.cluster import KMeans
+
+# Define the default number of rows scored in each batch
+default_batch_rows = 8192
+
+
+# Define a function to calculate an rbf kernel between two sets of points in place
+def rbfKernel(X, X_norm, landmarks, landmark_norm, gamma):
+    # Calculate squared distances from the squared norms and the inner products
+    kernel = X @ landmarks.T
+    kernel *= -2
+    kernel += X_norm[:, np.newaxis]
+    kernel += landmark_norm[np.newaxis, :]
+    np.maximum(kernel, 0, out=kernel)
+    # Convert the squared distances to kernel values
+    kernel *= -gamma
+    np.exp(kernel, out=kernel)
+    return kernel
+
+
+# Define a class to score points with a fused scaler and rbf one-class outlier detector
+class OutlierScorer:
+
+    def __init__(self, scaler, outlier_detector, n_components=None, batch_rows=default_batch_rows, dtype=np.float32, random_state=314):
+        if outlier_detector.kernel != 'rbf':
+            raise ValueError(f'Outlier scoring requires an rbf kernel but the outlier detector uses {outlier_detector.kernel}.')
+        self.dtype = np.dtype(dtype)
+        self.batch_rows = batch_rows
+        self.gamma = float(outlier_detector._gamma)
+        self.intercept = float(outlier_detector.intercept_[0])
+        # Fold the scaler into an affine transformation applied to each batch
+        self.scale = (1 / scaler.scale_).astype(self.dtype)
+        self.offset = (-scaler.mean_ / scaler.scale_).astype(self.dtype)
+        support_vectors = np.asarray(outlier_detector.support_vectors_, dtype=np.float64)
+        dual_coef = np.asarray(outlier_detector.dual_coef_, dtype=np.float64)[0]
+        if n_components is None or n_components >= len(support_vectors):
+            # Use all support vectors for the exact decision function
+            landmarks = support_vectors
+            weights = dual_coef
+        else:
+            # Compress the support vectors to cluster centers and project the dual coefficients onto the centers
+            landmarks = KMeans(n_clusters=n_components, n_init=1, random_state=random_state).fit(support_vectors).cluster_centers_
+            landmark_kernel = rbfKernel(landmarks, np.sum(landmarks ** 2, axis=1), landmarks, np.sum(landmarks ** 2, axis=1), self.gamma)
+            cross_kernel = rbfKernel(landmarks, np.sum(landmarks ** 2, axis=1), support_vectors, np.sum(support_vectors ** 2, axis=1), self.gamma)
+            weights = np.linalg.pinv(landmark_kernel, hermitian=True) @ (cross_kernel @ dual_coef)
+        self.n_components = len(landmarks)
+        self.landmarks = landmarks.astype(self.dtype)
+        self.landmark_norm = np.sum(landmarks ** 2, axis=1).astype(self.dtype)
+        self.weights = weights.astype(self.dtype)
+
+    # Define a function to calculate the decision function for unscaled features
+    def decisionFunction(self, X):
+        X = np.asarray(X)
+        decision = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.batch_rows):
+            # Scale the batch in the precision of the scorer
+            batch = X[start:start + self.batch_rows].astype(self.dtype)
+            batch *= self.scale
+            batch += self.offset
+            kernel = rbfKernel(batch, np.einsum('ij,ij->i', batch, batch), self.landmarks, self.landmark_norm, self.gamma)
+            decision[start:start + len(batch)] = kernel @ self.weights + self.intercept
+        return decision
+
+    # Define a function to predict inliers as 1 and outliers as -1 for unscaled features
+    def predict(self, X):
+        return np.where(self.decisionFunction(X) > 0, 1, -1)
+
+
+# Define a function to report the agreement and speed of outlier scorers with the exact model on a holdout
+def scorerAgreement(scaler, outlier_detector, X_holdout, component_list, batch_rows=default_batch_rows):
+    X_holdout = np.asarray(X_holdout, dtype=np.float64)
+    # Score the holdout with the exact scikit-learn model
+    exact_start = time.perf_counter()
+    exact_decision = outlier_detector.decision_function(scaler.transform(X_holdout))
+    exact_seconds = time.perf_counter() - exact_start
+    exact_prediction = np.where(exact_decision > 0, 1, -1)
+    # Score the holdout with each scorer
+    report = []
+    for n_components in component_list:
+        scorer = OutlierScorer(scaler, outlier_detector, n_components=n_components, batch_rows=batch_rows)
+        scorer_start = time.perf_counter()
+        decision = scorer.decisionFunction(X_holdout)
+        scorer_seconds = time.perf_counter() - scorer_start
+        report.append({'n_components': scorer.n_components,
+                       'agreement': np.mean(np.where(decision > 0, 1, -1) == exact_prediction),
+                       'max_decision_error': np.max(np.abs(decision - exact_decision)),
+                       'exact_seconds': round(exact_seconds, 3),
+                       'scorer_seconds': round(scorer_seconds, 3),
+                       'speedup': round(exact_seconds / scorer_seconds, 1)})
+    return pd.DataFrame(report)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Predict Watersheds
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_Statistics.predictWatersheds --help) or imported from the package_Statistics folder.
+# Description: "Predict Watersheds" applies the trained classifiers and regressors of one or more species to the watershed point grid tables (csv or columnar binary tables) in parallel across a pool of worker processes. The models and thresholds are loaded once per worker process, and each watershed is read once in fixed-size row chunks that are shared by the models of all species, so that peak memory is bounded by the configured memory limit. Watersheds with a completed output for every species are skipped so that an interrupted run can be resumed, and the row count and elapsed time of each watershed are written to a manifest in each prediction folder. The models can optionally be converted once per worker process to compiled tree ensembles that predict the 16-bit integer predictors of the columnar tables directly.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import csv
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+# Import functions from the statistics package
+from package_Statistics.modelFiles import loadModels
+from package_Statistics.streamingPrediction import chunkRows
+from package_Statistics.streamingPrediction import compileModels
+from package_Statistics.streamingPrediction import memoryLabel
+from package_Statistics.streamingPrediction import peakMemory
+from package_Statistics.streamingPrediction import streamDistributionAbundance
+from package_Statistics.variableSets import output_columns
+from package_Statistics.variableSets import predictor_all
+from package_Statistics.watershedTables import listWatersheds
+from package_Statistics.watershedTables import watershedFile
+
+# Define the prediction engines
+engines = ['xgboost', 'ensemble']
+
+# Define the manifest file name and columns
+manifest_name = 'manifest.csv'
+manifest_columns = ['watershed', 'rows', 'chunk_rows', 'seconds', 'worker_peak_mb', 'completed']
+
+# Define the models loaded once in each worker process
+worker_models = None
+worker_threads = 1
+worker_chunk_rows = None
+
+
+# Define a function to load the models of all species once when a worker process starts
+def initializeWorker(model_folders, threads, chunk_rows, engine='xgboost'):
+    global worker_models, worker_threads, worker_chunk_rows
+    worker_models = [loadModels(model_folder, n_jobs=threads) for model_folder in model_folders]
+    # Convert the models to compiled tree ensembles once per worker process
+    if engine == 'ensemble':
+        worker_models = compileModels(worker_models)
+    worker_threads = threads
+    worker_chunk_rows = chunk_rows
+
+
+# Define a function to predict a watershed in chunks using the models loaded in the worker process
+def predictWorker(watershed, input_file, output_files):
+    iteration_start = time.time()
+    rows = streamDistributionAbundance(input_file, output_files, worker_models, chunk_rows=worker_chunk_rows, threads=worker_threads)
+    iteration_elapsed = time.time() - iteration_start
+    # The peak memory of a worker covers every watershed it has predicted so far, not only this watershed
+    peak_memory = peakMemory()
+    record = {'watershed': watershed,
+              'rows': rows,
+              'chunk_rows': worker_chunk_rows,
+              'seconds': round(iteration_elapsed, 2),
+              'worker_peak_mb': None if peak_memory is None else round(peak_memory),
+              'completed': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    return [record if output_file is not None else None for output_file in output_files]
+
+
+# Define a function to identify the output files of a watershed that have not been completed
+def pendingOutputs(watershed, prediction_folders):
+    # Outputs are only renamed to the final file name after they are completely written
+    output_files = [os.path.join(prediction_folder, watershed + '.csv') for prediction_folder in prediction_folders]
+    return [None if os.path.exists(output_file) else output_file for output_file in output_files]
+
+
+# Define a function to append a record to a manifest
+def appendManifest(manifest_file, record):
+    write_header = not os.path.exists(manifest_file)
+    with open(manifest_file, 'a', newline='') as manifest:
+        writer = csv.DictWriter(manifest, fieldnames=manifest_columns)
+        if write_header:
+            writer.writeheader()
+        writer.writerow(record)
+
+
+# Define a function to pair model folders with prediction folders
+def speciesFolders(model_folders, prediction_folders):
+    if len(prediction_folders) == len(model_folders):
+        return list(prediction_folders)
+    if len(prediction_folders) == 1:
+        # Store the predictions of each species in a subfolder named after its model folder
+        return [os.path.join(prediction_folders[0], os.path.basename(os.path.normpath(model_folder)))
+                for model_folder in model_folders]
+    raise ValueError('Provide one prediction folder per model folder or a single root prediction folder.')
+
+
+# Define a function to predict all watersheds for one or more species in parallel
+def predictWatersheds(model_folders, watershed_folder, prediction_folders, watersheds=None, workers=None, threads=1, memory_limit=None, engine='xgboost'):
+    if engine not in engines:
+        raise ValueError(f'Engine must be one of {engines}.')
+    # Accept a single model folder and prediction folder
+    if isinstance(model_folders, str):
+        model_folders = [model_folders]
+    if isinstance(prediction_folders, str):
+        prediction_folders = [prediction_folders]
+    prediction_folders = speciesFolders(model_folders, prediction_folders)
+    # Create the prediction folders if they do not exist
+    for prediction_folder in prediction_folders:
+        if not os.path.exists(prediction_folder):
+            os.makedirs(prediction_folder)
+    # List all watersheds if watersheds are not specified
+    if watersheds is None:
+        watersheds = listWatersheds(watershed_folder)
+    # Skip watersheds that have already been completed for all species
+    pending = {watershed: pendingOutputs(watershed, prediction_folders) for watershed in watersheds}
+    remaining = [watershed for watershed in watersheds if any(output_file is not None for output_file in pending[watershed])]
+    print(f'Skipping {len(watersheds) - len(remaining)} completed watersheds; predicting {len(remaining)} of {len(watersheds)} for {len(model_folders)} species...')
+    # Submit the largest watersheds first to balance the load across workers
+    remaining = sorted(remaining, key=lambda watershed: os.path.getsize(watershedFile(watershed_folder, watershed)), reverse=True)
+    manifest_files = [os.path.join(prediction_folder, manifest_name) for prediction_folder in prediction_folders]
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    # Determine the chunk size from the memory limit of each worker
+    chunk_rows = chunkRows(memory_limit, len(predictor_all), len(output_columns) * len(model_folders))
+    print(f'Predicting in chunks of {chunk_rows} rows...')
+    # Predict the watersheds across the process pool
+    total_start = time.time()
+    count = 1
+    failed = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializeWorker, initargs=(model_folders, threads, chunk_rows, engine)) as executor:
+        futures = {executor.submit(predictWorker,
+                                   watershed,
+                                   watershedFile(watershed_folder, watershed),
+                                   pending[watershed]): watershed
+                   for watershed in remaining}
+        for future in as_completed(futures):
+            # Record a failed watershed and continue so that the outputs of the other watersheds are still written to the manifests
+            try:
+                records = future.result()
+            except Exception as error:
+                failed[futures[future]] = error
+                print(f'\tFailed to predict watershed {futures[future]}: {error!r}')
+                continue
+            for manifest_file, record in zip(manifest_files, records):
+                if record is not None:
+                    appendManifest(manifest_file, record)
+            record = next(record for record in records if record is not None)
+            print(f'\tPredicted watershed {count} of {len(remaining)} ({record["watershed"]}, {record["rows"]} rows) in {datetime.timedelta(seconds=int(record["seconds"]))} (Worker lifetime peak memory: {memoryLabel(record["worker_peak_mb"])})')
+            count += 1
+    total_elapsed = int(time.time() - total_start)
+    print(f'Completed at {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")} (Elapsed time: {datetime.timedelta(seconds=total_elapsed)})')
+    # Report the failed watersheds after the manifests of all completed watersheds have been written
+    if failed:
+        raise RuntimeError(f'{len(failed)} of {len(remaining)} watersheds failed to predict ({", ".join(sorted(failed))}); '
+                           f'rerun to predict them, since completed watersheds are skipped.') from next(iter(failed.values()))
+
+
+# Define a function to parse command line arguments
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Predict distribution-abundance for watershed point grid tables in parallel.')
+    parser.add_argument('--model-folder', '--model-folders', dest='model_folders', nargs='+', required=True,
+                        help='One or more folders containing classifier.joblib, regressor.joblib, and threshold.txt.')
+    parser.add_argument('--watershed-folder', required=True, help='Folder containing the watershed tables with features extracted.')
+    parser.add_argument('--prediction-folder', '--prediction-folders', dest='prediction_folders', nargs='+', required=True,
+                        help='One output folder per model folder, or a single root folder with one subfolder per species.')
+    parser.add_argument('--watersheds', nargs='+', default=None, help='Watershed codes or file names to predict (default: all tables).')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: cores divided by threads).')
+    parser.add_argument('--threads', type=int, default=1, help='Number of XGBoost threads per worker process.')
+    parser.add_argument('--memory-limit', type=float, default=None, help='Approximate memory in MB for the chunk data of each worker (default: chunks of 500000 rows).')
+    parser.add_argument('--engine', choices=engines, default='xgboost', help='Predict with XGBoost or with the models converted to compiled tree ensembles.')
+    return parser.parse_args()
+
+
+# Run the predictions when executed as a script
+if __name__ == '__main__':
+    arguments = parseArguments()
+    selected_watersheds = arguments.watersheds
+    if selected_watersheds is not None:
+        selected_watersheds = [os.path.splitext(watershed)[0] for watershed in selected_watersheds]
+    predictWatersheds(arguments.model_folders,
+                      arguments.watershed_folder,
+                      arguments.prediction_folders,
+                      watersheds=selected_watersheds,
+                      workers=arguments.workers,
+                      threads=arguments.threads,
+                      memory_limit=arguments.memory_limit,
+                      engine=arguments.engine)
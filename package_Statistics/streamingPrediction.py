@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Streaming Prediction
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Streaming Prediction" predicts watershed tables in fixed-size row chunks so that peak memory is bounded regardless of watershed size. Each chunk is read from the csv or columnar binary table, predicted by the distribution-abundance models or the outlier detector, and appended to the output csv before the next chunk is read. The models can optionally be converted once to compiled tree ensembles that predict the chunk arrays directly instead of XGBoost matrices.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and memory reporting
+import os
+import numpy as np
+import pandas as pd
+from xgboost import DMatrix
+# Import resource to report memory if it is available (it is not available on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Import functions from the statistics package
+from package_Statistics.compositeModel import compositeArray
+from package_Statistics.treeEnsemble import TreeEnsemble
+from package_Statistics.variableSets import absence
+from package_Statistics.variableSets import cell_index
+from package_Statistics.variableSets import outlier
+from package_Statistics.variableSets import output_columns
+from package_Statistics.variableSets import prediction
+from package_Statistics.variableSets import predictor_all
+from package_Statistics.variableSets import presence
+from package_Statistics.variableSets import response
+from package_Statistics.watershedTables import keyColumns
+from package_Statistics.watershedTables import readColumns
+from package_Statistics.watershedTables import readHeader
+from package_Statistics.watershedTables import table_extension
+
+# Define the default chunk size in rows
+default_chunk_rows = 500000
+
+
+# Define a function to estimate the memory required per row while predicting a chunk
+def estimateRowBytes(predictor_count, output_count):
+    # Chunk data frame (up to 8 bytes per value when read from csv), float32 prediction matrix, and output columns with csv text
+    return predictor_count * (8 + 4) + output_count * (8 + 24) + 64
+
+
+# Define a function to convert a memory limit in megabytes to a number of rows per chunk
+def chunkRows(memory_limit, predictor_count=len(predictor_all), output_count=len(output_columns)):
+    if memory_limit is None:
+        return default_chunk_rows
+    return max(1000, int(memory_limit * 1024 ** 2 // estimateRowBytes(predictor_count, output_count)))
+
+
+# Define a function to report the peak resident memory over the lifetime of the current process in megabytes, or None if it is unavailable
+def peakMemory():
+    if resource is None:
+        return None
+    # The maximum resident set size is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Define a function to format a memory figure in megabytes for progress messages
+def memoryLabel(megabytes):
+    if megabytes is None:
+        return 'unavailable'
+    return f'{round(megabytes)} MB'
+
+
+# Define a function to read a watershed table in chunks of rows
+def iterateChunks(input_file, columns, chunk_rows=default_chunk_rows):
+    if input_file.endswith(table_extension):
+        header = readHeader(input_file)
+        table_columns = readColumns(input_file, columns, header=header)
+        for start in range(0, header['rows'], chunk_rows):
+            yield pd.DataFrame({column: np.array(table_columns[column][start:start + chunk_rows]) for column in columns})
+    else:
+        for chunk in pd.read_csv(input_file, usecols=columns, chunksize=chunk_rows):
+            yield chunk[columns].reset_index(drop=True)
+
+
+# Define a class to append chunks to a csv that is renamed on completion so that existing outputs are always complete
+class ChunkWriter:
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.partial_file = output_file + '.partial'
+        self.header = True
+
+    def write(self, output_data):
+        output_data.to_csv(self.partial_file, mode='w' if self.header else 'a', header=self.header,
+                           index=False, sep=',', encoding='utf-8')
+        self.header = False
+
+    def close(self, columns):
+        # Write a header for watersheds without any rows
+        if self.header:
+            pd.DataFrame(columns=columns).to_csv(self.partial_file, header=True, index=False, sep=',', encoding='utf-8')
+        os.replace(self.partial_file, self.output_file)
+
+
+# Define a function to identify the boosting iterations used by a trained model
+def iterationRange(model):
+    try:
+        best_iteration = model.best_iteration
+    except AttributeError:
+        best_iteration = None
+    if best_iteration is None:
+        return (0, 0)
+    return (0, int(best_iteration) + 1)
+
+
+# Define a function to convert the classifiers and regressors of one or more species to compiled tree ensembles
+def compileModels(models):
+    return [(TreeEnsemble(classifier, iterationRange(classifier)), TreeEnsemble(regressor, iterationRange(regressor)), threshold)
+            for classifier, regressor, threshold in models]
+
+
+# Define a function to create the feature matrix of a chunk for the XGBoost models or the compiled tree ensembles
+def featureMatrix(features, predictors, models, threads=1):
+    # Compiled tree ensembles predict the array directly so that 16-bit integer predictors are not converted
+    if all(isinstance(species_models[0], TreeEnsemble) for species_models in models):
+        return features
+    return DMatrix(features, feature_names=predictors, nthread=threads)
+
+
+# Define a function to predict the composite distribution-abundance of one species from a feature matrix
+def predictSpecies(feature_matrix, models, threads=1):
+    classifier, regressor, threshold = models
+    if isinstance(classifier, TreeEnsemble):
+        # Predict the compiled classifier and regressor
+        presence_prediction = classifier.predict(feature_matrix, threads)
+        response_prediction = regressor.predict(feature_matrix, threads)
+    else:
+        # Predict the classifier
+        presence_prediction = classifier.get_booster().predict(feature_matrix, iteration_range=iterationRange(classifier))
+        # Predict the regressor
+        response_prediction = regressor.get_booster().predict(feature_matrix, iteration_range=iterationRange(regressor))
+    # Composite the classifier and regressor predictions
+    prediction = compositeArray(presence_prediction, response_prediction, threshold)
+    return pd.DataFrame({'absence': 1 - presence_prediction,
+                         'presence': presence_prediction,
+                         'response': response_prediction,
+                         'prediction': prediction})
+
+
+# Define a function to predict distribution-abundance for one or more species in chunks
+def streamDistributionAbundance(input_file, output_files, models, chunk_rows=default_chunk_rows, predictors=predictor_all, threads=1):
+    # Open a chunk writer for each species output that has not been completed
+    writers = [ChunkWriter(output_file) if output_file is not None else None for output_file in output_files]
+    rows = 0
+    # Locate the output rows by the cell index or the coordinates of the input table
+    keys = keyColumns(input_file)
+    species_columns = keys + absence + presence + response + prediction
+    for chunk in iterateChunks(input_file, predictors + keys, chunk_rows):
+        # Create a feature matrix shared by all species for the chunk
+        feature_matrix = featureMatrix(chunk[predictors].to_numpy(), predictors, models, threads)
+        key_data = chunk[keys]
+        del chunk
+        # Predict each species and append the results to the output
+        for writer, species_models in zip(writers, models):
+            if writer is not None:
+                species_data = predictSpecies(feature_matrix, species_models, threads)
+                writer.write(pd.concat([key_data, species_data], axis=1)[species_columns])
+        rows += len(key_data)
+    # Rename the completed outputs
+    for writer in writers:
+        if writer is not None:
+            writer.close(species_columns)
+    return rows
+
+
+# Define a function to predict outliers in an array of features
+def detectOutliers(X, scaler, outlier_detector):
+    # Scale the X data
+    X_scaled = scaler.transform(X)
+    # Predict outliers in the scaled X data
+    return outlier_detector.predict(X_scaled)
+
+
+# Define a function to predict outliers in chunks, optionally with a fused outlier scorer
+def streamOutliers(input_file, output_file, scaler, outlier_detector, chunk_rows=default_chunk_rows, predictors=predictor_all, scorer=None):
+    writer = ChunkWriter(output_file)
+    rows = 0
+    keys = keyColumns(input_file)
+    for chunk in iterateChunks(input_file, predictors + keys, chunk_rows):
+        # Predict outliers in the chunk and append the results to the output
+        output_data = chunk[keys].astype(float) if keys != cell_index else chunk[keys].copy()
+        if scorer is None:
+            output_data[outlier[0]] = detectOutliers(chunk[predictors].astype(float), scaler, outlier_detector)
+        else:
+            output_data[outlier[0]] = scorer.predict(chunk[predictors].to_numpy())
+        writer.write(output_data)
+        rows += len(output_data)
+    writer.close(keys + outlier)
+    return rows
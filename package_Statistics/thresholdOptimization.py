@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Threshold Optimization
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Threshold Optimization" determines the presence-absence threshold at which sensitivity and specificity are as close to equal as possible from cross-validated probability predictions. The probabilities of presences and absences are sorted once so that the confusion counts of every candidate threshold are found by binary search, and the AUC is calculated once.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation
+import numpy as np
+# Import modules for cross validation and performance from Scikit Learn
+from sklearn.metrics import confusion_matrix
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import KFold
+
+# Import functions from the statistics package
+from package_Statistics.foldMatrices import predictRows
+from package_Statistics.foldMatrices import trainRows
+
+
+# Define a function to calculate performance metrics based on a specified threshold value
+def testPresenceThreshold(predict_probability, threshold, y_test):
+    # Create an empty array of zeroes that matches the length of the probability predictions
+    predict_thresholded = np.zeros(predict_probability.shape)
+    # Set values for all probabilities greater than or equal to the threshold equal to 1
+    predict_thresholded[predict_probability >= threshold] = 1
+    # Determine error rates
+    confusion_test = confusion_matrix(y_test, predict_thresholded)
+    true_negative = confusion_test[0,0]
+    false_negative = confusion_test[1,0]
+    true_positive = confusion_test[1,1]
+    false_positive = confusion_test[0,1]
+    # Calculate sensitivity and specificity
+    sensitivity = true_positive / (true_positive + false_negative)
+    specificity = true_negative / (true_negative + false_positive)
+    # Calculate AUC score
+    auc = roc_auc_score(y_test, predict_probability)
+    # Calculate overall accuracy
+    accuracy = (true_negative + true_positive) / (true_negative + false_positive + false_negative + true_positive)
+    # Return the thresholded probabilities and the performance metrics
+    return (sensitivity, specificity, auc, accuracy)
+
+
+# Define a function to calculate performance metrics for an array of threshold values from sorted probabilities
+def thresholdPerformance(predict_probability, y_test, thresholds):
+    predict_probability = np.asarray(predict_probability)
+    y_test = np.asarray(y_test)
+    # Compare thresholds in the precision of the probabilities so that ties match an element-wise comparison
+    if np.issubdtype(predict_probability.dtype, np.floating):
+        thresholds = np.asarray(thresholds).astype(predict_probability.dtype)
+    # Sort the probabilities of the presences and absences once
+    presence_probability = np.sort(predict_probability[y_test == 1])
+    absence_probability = np.sort(predict_probability[y_test != 1])
+    # Count the presences and absences below each threshold, which are predicted as absences
+    false_negative = np.searchsorted(presence_probability, thresholds, side='left')
+    true_negative = np.searchsorted(absence_probability, thresholds, side='left')
+    true_positive = len(presence_probability) - false_negative
+    false_positive = len(absence_probability) - true_negative
+    # Calculate sensitivity, specificity, and overall accuracy for each threshold
+    sensitivity = true_positive / (true_positive + false_negative)
+    specificity = true_negative / (true_negative + false_positive)
+    accuracy = (true_negative + true_positive) / (true_negative + false_positive + false_negative + true_positive)
+    return sensitivity, specificity, accuracy
+
+
+# Create a function to determine a presence threshold
+def determineOptimalThreshold(predict_probability, y_test, resolution=1000):
+    # Calculate sensitivity and specificity for all thresholds between 1/resolution and 1
+    thresholds = np.arange(1, resolution + 1) / resolution
+    sensitivity_list, specificity_list, accuracy_list = thresholdPerformance(predict_probability, y_test, thresholds)
+    # Find the first threshold number with the minimum absolute value difference between sensitivity and specificity
+    difference_list = np.absolute(sensitivity_list - specificity_list)
+    # The threshold number is counted from zero, so the selected threshold is one step below the evaluated threshold as in the original loop
+    threshold = int(np.argmin(difference_list)) / resolution
+    # Calculate the performance of the optimal threshold
+    sensitivity, specificity, accuracy = thresholdPerformance(predict_probability, y_test, [threshold])
+    auc = roc_auc_score(y_test, predict_probability)
+    # Return the optimal threshold and the performance metrics of the optimal threshold
+    return threshold, sensitivity[0], specificity[0], auc, accuracy[0]
+
+
+# Define a function to predict presence probabilities for a training dataset, or for selected rows of a shared matrix, in inner cross validation
+def predictInnerProbability(classifier, X, y, n_splits=10, rows=None):
+    # Define the inner cross validation split method
+    inner_cv_splits = KFold(n_splits=n_splits, shuffle=False)
+    if rows is not None:
+        # Train and predict each inner fold from the selected rows without copying the inner train rows
+        probability = np.empty(len(rows), dtype=np.float64)
+        for train_index, test_index in inner_cv_splits.split(rows):
+            booster = trainRows(classifier, X, y, rows[train_index], classifier.n_jobs)
+            probability[test_index] = predictRows(booster, X, rows[test_index])
+        return probability, np.asarray(y)[rows].astype('int32')
+    X = np.asarray(X)
+    y = np.asarray(y).astype('int32')
+    # Store the presence probability of each row predicted when it was in the inner test split
+    probability = np.empty(len(y), dtype=np.float64)
+    for train_index, test_index in inner_cv_splits.split(X):
+        # Train classifier on the inner train data
+        classifier.fit(X[train_index], y[train_index])
+        # Predict probabilities for inner test data
+        probability[test_index] = classifier.predict_proba(X[test_index])[:, 1]
+    # Return the probabilities and the observed classes
+    return probability, y
+
+
+# Define a function to determine the optimal threshold of a classifier in inner cross validation
+def innerThreshold(classifier, X, y, n_splits=10, rows=None):
+    probability, y = predictInnerProbability(classifier, X, y, n_splits, rows)
+    return determineOptimalThreshold(probability, y)
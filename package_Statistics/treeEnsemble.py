@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Tree Ensemble
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Tree Ensemble" converts a trained XGBoost classifier or regressor once into flat arrays of node features, thresholds, missing value directions, and leaf values, and predicts feature matrices from the flat arrays in blocks of rows across parallel threads. Trees without splits are added to the base margin, and every other tree is stored as a complete binary tree of its own depth, in which the children of node n are nodes 2n + 1 and 2n + 2 and the leaves of shallower branches are repeated down to the last level, so that every row takes the same number of steps through a tree without reading child indices or testing for leaves. When numba is available, the traversal is compiled and each thread advances the rows of a block one level at a time through one tree at a time, so that the nodes of a tree stay in cache; otherwise all trees are traversed one level at a time for a block of rows with vectorized array operations. Integer feature matrices, such as the 16-bit signed predictors of the columnar watershed tables, are compared to integer thresholds without conversion to floating point, which selects the same branch as the 32-bit floating point comparison of XGBoost; floating point feature matrices may contain missing values, which follow the default direction of each split. Predictions match XGBoost within floating point rounding of the summed leaf values.
+# ---------------------------------------------------------------------------
+
+# Import packages for data manipulation and parallel processing
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+# Import numba to compile the traversal if it is available
+try:
+    import numba
+    from numba import njit
+    from numba import prange
+except ImportError:
+    numba = None
+    prange = range
+
+# Define the maximum depth of a stored tree, the rows per block of the compiled traversal, and the row and tree pairs per block of the vectorized traversal
+maximum_depth = 16
+compiled_block_rows = 256
+vectorized_block_size = 2 ** 20
+
+
+# Define a function to read the base score of a booster from its learner parameters
+def baseScore(learner):
+    # The base score is written as a bracketed vector by recent versions of XGBoost
+    return float(str(learner['learner_model_param']['base_score']).strip('[]').split(',')[0])
+
+
+# Define a function to calculate the depth of a tree from its child indices
+def treeDepth(tree):
+    left_children = tree['left_children']
+    right_children = tree['right_children']
+    depth = 0
+    level = [0]
+    while True:
+        level = [child for node in level if left_children[node] != -1 for child in (left_children[node], right_children[node])]
+        if len(level) == 0:
+            return depth
+        depth += 1
+
+
+# Define a function to traverse all trees for blocks of rows and add the leaf values of each row to the output
+def traverseBlocks(features, tree_depths, node_features, thresholds, default_left, leaf_values, output, block_rows):
+    block_count = (features.shape[0] + block_rows - 1) // block_rows
+    for block in prange(block_count):
+        start = block * block_rows
+        stop = min(start + block_rows, features.shape[0])
+        nodes = np.empty(stop - start, dtype=np.intp)
+        for tree in range(tree_depths.shape[0]):
+            tree_features = node_features[tree]
+            tree_thresholds = thresholds[tree]
+            tree_default_left = default_left[tree]
+            nodes[:] = 0
+            # Advance every row of the block one level at a time so that the reads of different rows do not wait on each other
+            for level in range(tree_depths[tree]):
+                for row in range(stop - start):
+                    node = nodes[row]
+                    value = features[start + row, tree_features[node]]
+                    if value != value:
+                        nodes[row] = 2 * node + 2 - tree_default_left[node]
+                    else:
+                        nodes[row] = 2 * node + 1 + (value >= tree_thresholds[node])
+            inner_nodes = 2 ** tree_depths[tree] - 1
+            for row in range(stop - start):
+                output[start + row] += leaf_values[tree, nodes[row] - inner_nodes]
+
+
+# Compile the traversal if numba is available
+if numba is not None:
+    traverseBlocks = njit(parallel=True, nogil=True, cache=True)(traverseBlocks)
+
+
+# Define a class to store and predict a tree ensemble as flat node arrays
+class TreeEnsemble:
+
+    def __init__(self, model, iteration_range=(0, 0)):
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(booster.save_raw('json'))['learner']
+        objective = learner['objective']['name']
+        if objective not in ('binary:logistic', 'reg:squarederror', 'reg:linear'):
+            raise ValueError(f'Objective {objective} is not supported by the tree ensemble.')
+        gradient_booster = learner['gradient_booster']
+        if gradient_booster['name'] != 'gbtree':
+            raise ValueError(f'Booster {gradient_booster["name"]} is not supported by the tree ensemble.')
+        trees = gradient_booster['model']['trees']
+        # Select the trees of the boosting iterations used for prediction
+        parallel_trees = int(gradient_booster['model']['gbtree_model_param']['num_parallel_tree'])
+        start, stop = iteration_range
+        if stop == 0:
+            stop = len(trees) // parallel_trees
+        trees = trees[start * parallel_trees:stop * parallel_trees]
+        for tree in trees:
+            if any(split_type != 0 for split_type in tree.get('split_type', [])):
+                raise ValueError('Categorical splits are not supported by the tree ensemble.')
+        self.logistic = objective == 'binary:logistic'
+        self.feature_count = int(learner['learner_model_param']['num_feature'])
+        # Convert the base score to the margin of the objective
+        base_score = baseScore(learner)
+        self.base_margin = float(np.log(base_score / (1 - base_score))) if self.logistic else base_score
+        # Add the values of trees without splits to the base margin
+        depths = [treeDepth(tree) for tree in trees]
+        self.constant_trees = depths.count(0)
+        self.base_margin += float(sum(np.float32(tree['split_conditions'][0]) for tree, depth in zip(trees, depths) if depth == 0))
+        # Order the trees with splits from deepest to shallowest so that the trees still descending at each level are the first trees
+        trees = [tree for depth, index, tree in sorted(zip(depths, range(len(trees)), trees), key=lambda item: (-item[0], item[1])) if depth > 0]
+        self.tree_depths = np.array(sorted([depth for depth in depths if depth > 0], reverse=True), dtype=np.intp)
+        self.depth = int(self.tree_depths.max()) if len(trees) > 0 else 0
+        if self.depth > maximum_depth:
+            raise ValueError(f'Trees deeper than {maximum_depth} levels are not supported by the tree ensemble.')
+        # Store each tree as a complete binary tree of its own depth in rows of the size of the deepest tree
+        self.tree_count = len(trees)
+        self.features = np.zeros((self.tree_count, max(2 ** self.depth - 1, 1)), dtype=np.int32)
+        self.thresholds = np.full((self.tree_count, max(2 ** self.depth - 1, 1)), np.inf, dtype=np.float32)
+        self.default_left = np.ones((self.tree_count, max(2 ** self.depth - 1, 1)), dtype=np.uint8)
+        self.leaf_values = np.zeros((self.tree_count, 2 ** self.depth), dtype=np.float32)
+        for index, (tree, tree_depth) in enumerate(zip(trees, self.tree_depths)):
+            # Place each node of the tree at its position in the complete binary tree
+            stack = [(0, 0, 0)]
+            while stack:
+                node, position, depth = stack.pop()
+                left = tree['left_children'][node]
+                if left == -1:
+                    # Repeat the leaf value for every leaf below its position, so the direction of the padded splits does not matter
+                    leaves = 2 ** (tree_depth - depth)
+                    first_leaf = (position + 1) * leaves - 2 ** tree_depth
+                    self.leaf_values[index, first_leaf:first_leaf + leaves] = tree['split_conditions'][node]
+                else:
+                    self.features[index, position] = tree['split_indices'][node]
+                    self.thresholds[index, position] = tree['split_conditions'][node]
+                    self.default_left[index, position] = tree['default_left'][node]
+                    stack.append((left, 2 * position + 1, depth + 1))
+                    stack.append((tree['right_children'][node], 2 * position + 2, depth + 1))
+        # Split integer features at the smallest integer that is not less than the threshold
+        self.integer_thresholds = np.ceil(np.clip(self.thresholds.astype(np.float64), -2 ** 31, 2 ** 31 - 1)).astype(np.int32)
+
+    # Define a function to report the size of the node arrays
+    def report(self):
+        node_arrays = [self.features, self.thresholds, self.integer_thresholds, self.default_left, self.leaf_values]
+        return {'trees': self.tree_count,
+                'constant_trees': self.constant_trees,
+                'depth': self.depth,
+                'compiled': numba is not None,
+                'node_mb': round(sum(array.nbytes for array in node_arrays) / 1024 ** 2, 1)}
+
+    # Define a function to convert a feature matrix to the integer or floating point type compared to the thresholds
+    def prepareFeatures(self, features):
+        features = np.asarray(features)
+        if features.ndim != 2 or features.shape[1] != self.feature_count:
+            raise ValueError(f'Feature matrix must have {self.feature_count} columns.')
+        if np.issubdtype(features.dtype, np.integer):
+            # Integer thresholds are 32-bit, so wider integers are compared as 32-bit integers when their values fit
+            if features.dtype.itemsize < 4 or features.dtype == np.int32:
+                return np.ascontiguousarray(features), self.integer_thresholds
+            if features.size == 0 or (features.min() >= -2 ** 31 and features.max() < 2 ** 31 - 1):
+                return np.ascontiguousarray(features, dtype=np.int32), self.integer_thresholds
+        return np.ascontiguousarray(features, dtype=np.float32), self.thresholds
+
+    # Define a function to traverse all trees one level at a time for a block of rows with vectorized array operations
+    def blockMargin(self, block, thresholds):
+        # Locate the nodes of each tree and the feature values of each row in the flattened arrays
+        tree_offsets = np.arange(self.tree_count, dtype=np.intp) * self.features.shape[1]
+        row_offsets = (np.arange(block.shape[0], dtype=np.intp) * block.shape[1])[:, np.newaxis]
+        features = self.features.ravel()
+        thresholds = thresholds.ravel()
+        values = block.ravel()
+        nodes = np.zeros((block.shape[0], self.tree_count), dtype=np.intp)
+        for level in range(self.depth):
+            # Only the first trees are deeper than the level
+            active = int(np.count_nonzero(self.tree_depths > level))
+            positions = nodes[:, :active] + tree_offsets[:active]
+            feature_values = values.take(row_offsets + features.take(positions))
+            right = feature_values >= thresholds.take(positions)
+            if not np.issubdtype(block.dtype, np.integer):
+                # Missing values follow the default direction of the split
+                missing = np.isnan(feature_values)
+                if missing.any():
+                    right[missing] = self.default_left.ravel().take(positions[missing]) == 0
+            nodes[:, :active] = 2 * nodes[:, :active] + 1 + right
+        leaf_offsets = np.arange(self.tree_count, dtype=np.intp) * self.leaf_values.shape[1] - (2 ** self.tree_depths - 1)
+        return self.leaf_values.ravel().take(nodes + leaf_offsets).sum(axis=1, dtype=np.float64)
+
+    # Define a function to predict the margin of a feature matrix in blocks of rows across threads
+    def margin(self, features, threads=1):
+        features, thresholds = self.prepareFeatures(features)
+        if threads is None or threads < 1:
+            threads = 1
+        if numba is not None:
+            output = np.zeros(features.shape[0], dtype=np.float64)
+            numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+            traverseBlocks(features, self.tree_depths, self.features, thresholds, self.default_left, self.leaf_values, output, compiled_block_rows)
+            return output + self.base_margin
+        block_rows = max(1, vectorized_block_size // max(1, self.tree_count))
+        starts = range(0, features.shape[0], block_rows)
+        if threads == 1 or len(starts) <= 1:
+            blocks = [self.blockMargin(features[start:start + block_rows], thresholds) for start in starts]
+        else:
+            # The array operations release the global interpreter lock, so blocks are predicted concurrently
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                blocks = list(executor.map(lambda start: self.blockMargin(features[start:start + block_rows], thresholds), starts))
+        if len(blocks) == 0:
+            return np.full(0, self.base_margin)
+        return np.concatenate(blocks) + self.base_margin
+
+    # Define a function to predict a feature matrix as probabilities for classifiers or responses for regressors
+    def predict(self, features, threads=1):
+        margin = self.margin(features, threads)
+        if self.logistic:
+            margin = 1 / (1 + np.exp(-margin))
+        return margin.astype(np.float32)
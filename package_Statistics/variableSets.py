@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Variable Sets
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be imported from the package_Statistics folder in an Anaconda 3 installation.
+# Description: "Variable Sets" defines the predictor, coordinate, cell index, and output column names shared by the train, test, and predict steps. The predictor order must match the order used to train the classifier and regressor.
+# ---------------------------------------------------------------------------
+
+# Define variable sets
+predictor_all = ['compoundTopographic', 'dateFreeze_2000s', 'dateThaw_2000s', 'elevation', 'floodplainsDist', 'growingSeason_2000s', 'heatLoad', 'integratedMoisture', 'precipAnnual_2000s', 'roughness', 'siteExposure', 'slope', 'streamLargeDist', 'streamSmallDist', 'summerWarmth_2000s', 'surfaceArea', 'surfaceRelief', 'aspect', 'may_1_ultraBlue', 'may_2_blue', 'may_3_green', 'may_4_red', 'may_5_nearInfrared', 'may_6_shortInfrared1', 'may_7_shortInfrared2', 'may_evi2', 'may_nbr', 'may_ndmi', 'may_ndsi', 'may_ndvi', 'may_ndwi', 'june_1_ultraBlue', 'june_2_blue', 'june_3_green', 'june_4_red', 'june_5_nearInfrared', 'june_6_shortInfrared1', 'june_7_shortInfrared2', 'june_evi2', 'june_nbr', 'june_ndmi', 'june_ndsi', 'june_ndvi', 'june_ndwi', 'july_1_ultraBlue', 'july_2_blue', 'july_3_green', 'july_4_red', 'july_5_nearInfrared', 'july_6_shortInfrared1', 'july_7_shortInfrared2', 'july_evi2', 'july_nbr', 'july_ndmi', 'july_ndsi', 'july_ndvi', 'july_ndwi', 'august_1_ultraBlue', 'august_2_blue', 'august_3_green', 'august_4_red', 'august_5_nearInfrared', 'august_6_shortInfrared1', 'august_7_shortInfrared2', 'august_evi2', 'august_nbr', 'august_ndmi', 'august_ndsi', 'august_ndvi', 'august_ndwi', 'september_1_ultraBlue', 'september_2_blue', 'september_3_green', 'september_4_red', 'september_5_nearInfrared', 'september_6_shortInfrared1', 'september_7_shortInfrared2', 'september_evi2', 'september_nbr', 'september_ndmi', 'september_ndsi', 'september_ndvi', 'september_ndwi']
+coordinates = ['POINT_X', 'POINT_Y']
+cell_index = ['cell']
+absence = ['absence']
+presence = ['presence']
+response = ['response']
+prediction = ['prediction']
+outlier = ['outlier']
+output_columns = coordinates + absence + presence + response + prediction
+cell_output_columns = cell_index + absence + presence + response + prediction
+
+# Define variable sets for the train and test steps
+zero_variable = ['zero']
+strata = ['strata']
+cover = ['cover']
+retain_variables = ['project', 'siteID', 'siteCode', 'methodSurvey', 'methodCover', 'plotDimensions', 'vascularScope', 'nonvascularScope', 'lichenScope', 'date', 'datum', 'latitude', 'longitude', 'ten', 'twentyfive']
+all_variables = retain_variables + coordinates + predictor_all + zero_variable + strata + cover
+iteration = ['iteration']
+distribution = ['distribution']
+test_variables = all_variables + absence + presence + response + distribution + prediction + iteration
+
+# Define variable sets for the format taxon data step
+taxon_retain = ['cover', 'project', 'siteID', 'siteCode', 'methodSurvey', 'methodCover', 'plotDimensions', 'vascularScope', 'nonvascularScope', 'lichenScope', 'date', 'datum', 'latitude', 'longitude', 'strata', 'zero', 'ten', 'twentyfive']
+taxon_predictors = ['aspect'] + [predictor for predictor in predictor_all if predictor != 'aspect']
+taxon_variables = taxon_retain + coordinates + taxon_predictors
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Watershed Tables
+# Author: Timm Nawrocki, Alaska Center for Conservation Science
+# Created on: 2026-10-18
+# Usage: Must be executed in an Anaconda 3 installation from the repository folder (python -m package_Statistics.watershedTables --help) or imported from the package_Statistics folder.
+# Description: "Watershed Tables" reads and writes watershed point grid tables in a compact columnar binary format. Each table is a single file with a json header describing the typed schema followed by one contiguous block per column, so that columns can be read as memory-mapped arrays without parsing text. Predictor columns are stored as 16-bit signed integers unless their values require a wider integer type, and rows are located either by coordinates or by a 32-bit integer cell index with the grid reference stored in the header. The command line converts an existing folder of watershed csv tables.
+# ---------------------------------------------------------------------------
+
+# Import packages for file manipulation, data manipulation, and parallel processing
+import argparse
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Import variable sets from the statistics package
+from package_Statistics.gridReference import cell_column
+from package_Statistics.gridReference import cell_dtype
+from package_Statistics.gridReference import gridFromDict
+from package_Statistics.gridReference import readGrid
+from package_Statistics.variableSets import cell_index
+from package_Statistics.variableSets import coordinates
+from package_Statistics.variableSets import predictor_all
+
+# Define the file format constants
+table_extension = '.wst'
+table_magic = b'WSTABLE1'
+table_alignment = 64
+predictor_dtype = 'int16'
+coordinate_dtype = 'float64'
+
+
+# Define a function to create a typed schema from the predictor and coordinate variable sets
+def defineSchema(predictors=predictor_all, coordinate_columns=coordinates, dtypes=None):
+    schema = [(predictor, predictor_dtype) for predictor in predictors]
+    schema += [(coordinate, cell_dtype if coordinate == cell_column else coordinate_dtype) for coordinate in coordinate_columns]
+    # Override the data type of individual columns if provided
+    if dtypes is not None:
+        schema = [(column, dtypes.get(column, dtype)) for column, dtype in schema]
+    return schema
+
+
+# Define a function to cast a column to the schema data type, widening integer types when values do not fit
+def castColumn(column, values, dtype):
+    values = np.asarray(values)
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        if np.issubdtype(values.dtype, np.floating):
+            if not np.all(np.isfinite(values)):
+                raise ValueError(f'Column {column} contains missing values that cannot be stored as {dtype}.')
+            if not np.array_equal(values, np.round(values)):
+                raise ValueError(f'Column {column} contains fractional values that cannot be stored as {dtype}.')
+        if len(values) > 0:
+            minimum = values.min()
+            maximum = values.max()
+            for candidate in [dtype, np.dtype('int32'), np.dtype('int64')]:
+                if np.iinfo(candidate).min <= minimum and maximum <= np.iinfo(candidate).max:
+                    dtype = candidate
+                    break
+    return values.astype(dtype, copy=False)
+
+
+# Define a function to write a table of columns to the columnar binary format
+def writeTable(input_data, schema, output_file, grid=None):
+    # Cast each column to its schema data type
+    rows = len(input_data[schema[0][0]])
+    columns = []
+    for column, dtype in schema:
+        values = castColumn(column, input_data[column], dtype)
+        if len(values) != rows:
+            raise ValueError(f'Column {column} has {len(values)} rows but the table has {rows} rows.')
+        columns.append((column, values))
+    # Calculate the aligned offset of each column block after the header
+    header = {'rows': rows, 'columns': []}
+    # Store the grid of the cell index column with the table
+    if grid is not None:
+        header['grid'] = grid.toDict()
+    offset = 0
+    for column, values in columns:
+        header['columns'].append({'name': column, 'dtype': values.dtype.str, 'offset': offset})
+        offset += -(-values.nbytes // table_alignment) * table_alignment
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(table_magic) + 8 + len(header_bytes)) // table_alignment) * table_alignment
+    # Write the table to a partial file and rename on completion so that existing tables are always complete
+    partial_file = output_file + '.partial'
+    with open(partial_file, 'wb') as table:
+        table.write(table_magic)
+        table.write(struct.pack('<Q', len(header_bytes)))
+        table.write(header_bytes)
+        for entry, (column, values) in zip(header['columns'], columns):
+            table.seek(data_start + entry['offset'])
+            table.write(np.ascontiguousarray(values).tobytes())
+        table.truncate(data_start + offset)
+    os.replace(partial_file, output_file)
+
+
+# Define a function to read the header of a table
+def readHeader(input_file):
+    with open(input_file, 'rb') as table:
+        if table.read(len(table_magic)) != table_magic:
+            raise ValueError(f'{input_file} is not a watershed table.')
+        header_length = struct.unpack('<Q', table.read(8))[0]
+        header = json.loads(table.read(header_length).decode('utf-8'))
+    header['data_start'] = -(-(len(table_magic) + 8 + header_length) // table_alignment) * table_alignment
+    return header
+
+
+# Define a function to read the grid reference stored with a table
+def tableGrid(input_file, header=None):
+    if header is None:
+        header = readHeader(input_file)
+    return gridFromDict(header['grid']) if 'grid' in header else None
+
+
+# Define a function to identify the columns that locate the rows of a table, preferring the cell index over coordinates
+def keyColumns(input_file):
+    if input_file.endswith(table_extension):
+        columns = [entry['name'] for entry in readHeader(input_file)['columns']]
+    else:
+        columns = list(pd.read_csv(input_file, nrows=0).columns)
+    return cell_index if cell_column in columns else coordinates
+
+
+# Define a function to read columns from a table as read-only memory-mapped arrays
+def readColumns(input_file, columns=None, header=None):
+    if header is None:
+        header = readHeader(input_file)
+    entries = {entry['name']: entry for entry in header['columns']}
+    if columns is None:
+        columns = list(entries)
+    missing = [column for column in columns if column not in entries]
+    if missing:
+        raise KeyError(f'{input_file} does not contain columns {missing}.')
+    output_columns = {}
+    for column in columns:
+        entry = entries[column]
+        if header['rows'] == 0:
+            output_columns[column] = np.empty(0, dtype=entry['dtype'])
+        else:
+            output_columns[column] = np.memmap(input_file,
+                                               dtype=entry['dtype'],
+                                               mode='r',
+                                               offset=header['data_start'] + entry['offset'],
+                                               shape=(header['rows'],))
+    return output_columns
+
+
+# Define a function to read the predictor columns of a table into a single feature matrix
+def readFeatureMatrix(input_file, predictors=predictor_all, start=0, stop=None, dtype=None, header=None):
+    columns = readColumns(input_file, predictors, header=header)
+    # Use the widest predictor data type unless a data type is provided
+    if dtype is None:
+        dtype = np.result_type(*[columns[predictor].dtype for predictor in predictors])
+    stop = len(columns[predictors[0]]) if stop is None else min(stop, len(columns[predictors[0]]))
+    feature_matrix = np.empty((max(stop - start, 0), len(predictors)), dtype=dtype)
+    for index, predictor in enumerate(predictors):
+        feature_matrix[:, index] = columns[predictor][start:stop]
+    return feature_matrix
+
+
+# Define a function to read a table into a data frame
+def readTable(input_file, columns=None):
+    return pd.DataFrame({column: np.asarray(values) for column, values in readColumns(input_file, columns).items()})
+
+
+# Define a function to read a watershed from either a csv table or a columnar binary table
+def loadWatershed(input_file, columns):
+    if input_file.endswith(table_extension):
+        return readTable(input_file, columns)
+    return pd.read_csv(input_file, usecols=columns)[columns]
+
+
+# Define a function to identify the input file for a watershed, preferring the columnar binary table
+def watershedFile(watershed_folder, watershed):
+    for extension in [table_extension, '.csv']:
+        input_file = os.path.join(watershed_folder, watershed + extension)
+        if os.path.exists(input_file):
+            return input_file
+    raise FileNotFoundError(f'No table found for watershed {watershed} in {watershed_folder}.')
+
+
+# Define a function to list the watershed codes in a watershed folder
+def listWatersheds(watershed_folder):
+    watersheds = set()
+    for file in os.listdir(watershed_folder):
+        watershed, extension = os.path.splitext(file)
+        if extension in [table_extension, '.csv']:
+            watersheds.add(watershed)
+    return sorted(watersheds)
+
+
+# Define a function to convert a single watershed csv table to the columnar binary format, optionally replacing the coordinates with the cell index of a grid
+def convertWatershed(input_csv, output_file, schema, grid=None):
+    columns = [column for column, dtype in schema if column != cell_column]
+    if grid is not None:
+        columns = [column for column in columns if column not in coordinates] + coordinates
+    input_data = pd.read_csv(input_csv, usecols=columns)
+    if grid is not None:
+        input_data[cell_column] = grid.cellIndex(input_data['POINT_X'], input_data['POINT_Y'])
+    writeTable(input_data, schema, output_file, grid)
+    return len(input_data)
+
+
+# Define a function to convert a folder of watershed csv tables to the columnar binary format
+def convertWatershedFolder(csv_folder, output_folder, schema=None, workers=None, grid=None):
+    if schema is None:
+        schema = defineSchema(coordinate_columns=cell_index if grid is not None else coordinates)
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    # Identify the csv tables that have not already been converted
+    watersheds = sorted(os.path.splitext(file)[0] for file in os.listdir(csv_folder) if file.endswith('.csv'))
+    remaining = [watershed for watershed in watersheds
+                 if not os.path.exists(os.path.join(output_folder, watershed + table_extension))]
+    print(f'Converting {len(remaining)} of {len(watersheds)} watershed tables...')
+    # Convert the tables in parallel
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convertWatershed,
+                                   os.path.join(csv_folder, watershed + '.csv'),
+                                   os.path.join(output_folder, watershed + table_extension),
+                                   schema,
+                                   grid)
+                   for watershed in remaining]
+        count = 1
+        for watershed, future in zip(remaining, futures):
+            rows = future.result()
+            csv_size = os.path.getsize(os.path.join(csv_folder, watershed + '.csv'))
+            table_size = os.path.getsize(os.path.join(output_folder, watershed + table_extension))
+            print(f'\tConverted watershed {count} of {len(remaining)} ({watershed}, {rows} rows, {csv_size / table_size:.1f}x smaller)')
+            count += 1
+
+
+# Run the conversion when executed as a script
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert watershed csv tables to the columnar binary format.')
+    parser.add_argument('--csv-folder', required=True, help='Folder containing the watershed csv tables with features extracted.')
+    parser.add_argument('--output-folder', required=True, help='Output folder for the columnar binary watershed tables.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores).')
+    parser.add_argument('--grid', default=None, help='Optional grid reference json of the area of interest; if provided, POINT_X and POINT_Y are replaced by a 32-bit integer cell index.')
+    arguments = parser.parse_args()
+    convertWatershedFolder(arguments.csv_folder, arguments.output_folder, workers=arguments.workers,
+                           grid=readGrid(arguments.grid) if arguments.grid is not None else None)
@@ -10,8 +10,14 @@
 # Import python libraries
 import arcpy
 import os
+import sys
 from arcpy.sa import *
 
+# Add the repository folder to the python path to import the intermediate cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from package_GeospatialProcessing.intermediateCache import IntermediateCache
+from package_GeospatialProcessing.intermediateCache import default_cache_gigabytes
+
 # Set overwrite option
 arcpy.env.overwriteOutput = True
 
@@ -48,6 +54,10 @@ large_stream_dist = arcpy.GetParameterAsText(9)
 # Define output distance to small streams raster
 small_stream_dist = arcpy.GetParameterAsText(10)
 
+# Define optional cache folder for intermediate TauDEM products and its maximum size in gigabytes
+cache_folder = arcpy.GetParameterAsText(11)
+cache_gigabytes = arcpy.GetParameterAsText(12)
+
 # Import TauDEM Toolbox
 arcpy.ImportToolbox(TauDEM, "TauDEM")
 
@@ -73,30 +83,45 @@ influence_dem_w = os.path.join(work_folder, "influence_dem_w.tif")
 large_stream_line = os.path.join(work_geodatabase, "large_stream_line")
 small_stream_line = os.path.join(work_geodatabase, "small_stream_line")
 
+# Create the intermediate cache, which runs every step without caching if no cache folder is provided
+cache = IntermediateCache(cache_folder if cache_folder != "" else None,
+                          float(cache_gigabytes) if cache_gigabytes != "" else default_cache_gigabytes,
+                          arcpy.AddMessage)
+
 # Extract digital elevation model for Alaska to hydrographic area of influence
 arcpy.AddMessage("Extracting raster to area of interest...")
-outExtract = ExtractByMask(input_dem, area_of_influence)
-arcpy.CopyRaster_management(outExtract, influence_dem, "", "", "", "NONE", "NONE", "16_BIT_SIGNED", "NONE", "NONE", "TIFF", "NONE")
+def extractDEM():
+    outExtract = ExtractByMask(input_dem, area_of_influence)
+    arcpy.CopyRaster_management(outExtract, influence_dem, "", "", "", "NONE", "NONE", "16_BIT_SIGNED", "NONE", "NONE", "TIFF", "NONE")
+cache.run("ExtractByMask", [input_dem, area_of_influence], {"cell_size": cell_size}, [influence_dem], extractDEM)
 
 # Run "Pit Remove" function from TauDEM
 arcpy.AddMessage("Running pit remove...")
-arcpy.PitRemove_TauDEM(influence_dem, "", "", processes_number, influence_dem_fel)
+cache.run("PitRemove", [influence_dem], {}, [influence_dem_fel],
+          lambda: arcpy.PitRemove_TauDEM(influence_dem, "", "", processes_number, influence_dem_fel))
 
 # Run "D8 Flow Direction" function from TauDEM
 arcpy.AddMessage("Running D8 flow direction...")
-arcpy.D8FlowDir_TauDEM(influence_dem_fel, processes_number, influence_dem_p, influence_dem_sd8)
+cache.run("D8FlowDir", [influence_dem_fel], {}, [influence_dem_p, influence_dem_sd8],
+          lambda: arcpy.D8FlowDir_TauDEM(influence_dem_fel, processes_number, influence_dem_p, influence_dem_sd8))
 
 # Run "D8 Contributing Area" function from TauDEM
 arcpy.AddMessage("Running D8 contributing area...")
-arcpy.D8ContributingArea_TauDEM(influence_dem_p, "", "", "true", processes_number, influence_dem_ad8)
+cache.run("D8ContributingArea", [influence_dem_p], {"edge_contamination": "true"}, [influence_dem_ad8],
+          lambda: arcpy.D8ContributingArea_TauDEM(influence_dem_p, "", "", "true", processes_number, influence_dem_ad8))
 
 # Run "Peuker Douglas Stream Definition" function from TauDEM
 arcpy.AddMessage("Running Peuker Douglas stream definition...")
-arcpy.PeukerDouglasStreamDef_TauDEM(influence_dem_fel, influence_dem_p, "0.4", "0.1", "0.05", "50", "false", "", "", influence_dem_ad8, processes_number, influence_dem_ss, influence_dem_ssa, influence_dem_src, influence_dem_drp, "true", "5", "500", "10", "true")
+peuker_douglas = ["0.4", "0.1", "0.05", "50", "false", "true", "5", "500", "10", "true"]
+cache.run("PeukerDouglasStreamDef", [influence_dem_fel, influence_dem_p, influence_dem_ad8], {"parameters": peuker_douglas},
+          [influence_dem_ss, influence_dem_ssa, influence_dem_src, influence_dem_drp],
+          lambda: arcpy.PeukerDouglasStreamDef_TauDEM(influence_dem_fel, influence_dem_p, "0.4", "0.1", "0.05", "50", "false", "", "", influence_dem_ad8, processes_number, influence_dem_ss, influence_dem_ssa, influence_dem_src, influence_dem_drp, "true", "5", "500", "10", "true"))
 
 # Run "Stream Reach And Watershed" function from TauDEM
 arcpy.AddMessage("Running stream reach and watershed...")
-arcpy.StreamReachAndWatershed_TauDEM(influence_dem_fel, influence_dem_p, influence_dem_ad8, influence_dem_src, "", "false", processes_number, influence_dem_ord, influence_dem_tree, influence_dem_coord, influence_dem_net, influence_dem_w)
+cache.run("StreamReachAndWatershed", [influence_dem_fel, influence_dem_p, influence_dem_ad8, influence_dem_src], {"single_watershed": "false"},
+          [influence_dem_ord, influence_dem_tree, influence_dem_coord, influence_dem_net, influence_dem_w],
+          lambda: arcpy.StreamReachAndWatershed_TauDEM(influence_dem_fel, influence_dem_p, influence_dem_ad8, influence_dem_src, "", "false", processes_number, influence_dem_ord, influence_dem_tree, influence_dem_coord, influence_dem_net, influence_dem_w))
 
 # Define the projection of the stream network output to match the input Digital Elevation Model
 projection = arcpy.Describe(input_dem).spatialReference
@@ -147,4 +172,7 @@ if os.path.exists(influence_dem_tree) == True:
     os.remove(influence_dem_tree)
 arcpy.Delete_management(influence_dem_w)
 arcpy.Delete_management(large_stream_line)
-arcpy.Delete_management(small_stream_line)
\ No newline at end of file
+arcpy.Delete_management(small_stream_line)
+
+# Report the hits and misses of the intermediate cache
+cache.report()